@@ -0,0 +1,599 @@
+###############################################################################
+#  File: crush_archive.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               An archive of many seeded games in one file that any turn of
+#               any game can be read back from quickly.  Games are only ever
+#               added to the end of the archive, a move at a time, so a game is
+#               never held in memory while it is written.  Every K turns, and
+#               at the end of each game, a keyframe holds the whole state of
+#               the game: the board, the score and the state of the refill
+#               stream of its GameRandom.  The moves in between are written the
+#               way crush_replay writes them, with a checksum of each board.
+#               Beside the archive is an index of fixed size entries, one for
+#               each keyframe, sorted by game and turn.  Both files are read
+#               through mmap, so reading a turn is a binary search of the index,
+#               one seek to the keyframe before it and at most K - 1 moves played
+#               with playMove().
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from crush_replay import boardChecksum, codeMove, moveCode, readVarint, writeVarint
+import mmap
+import os
+import struct
+import tempfile
+
+# The first bytes of an archive and of its index, the last one being the
+# version of the format
+ARCHIVE_MAGIC = b"CCA\x01"
+INDEX_MAGIC = b"CCI\x01"
+
+# The index starts with a header of this many bytes, and each entry after it is
+# the same size: the game number and the turn packed into one 64-bit key, then
+# where the keyframe starts in the archive
+INDEX_HEADER = 16
+INDEX_ENTRY = struct.Struct("<QQ")
+
+# The state of a random.Random: 624 words and the position in them
+RANDOM_STATE = struct.Struct("<625I")
+
+# The number of turns between keyframes of a new archive
+KEYFRAME_EVERY = 16
+
+
+def indexKey(game, turn):
+    """
+    Method Name: indexKey()
+    Description: The key of a keyframe in the index.  Sorting by key sorts by game,
+    then by turn.
+    :param game: the game number
+    :param turn: the turn the keyframe was taken after
+    :return: the key
+    """
+    return (game << 32) | turn
+
+
+def writeKeyframe(out, game_seed, rows, cols, num_syms, turn, score, board, rng):
+    """
+    Method Name: writeKeyframe()
+    Description: Adds the whole state of a game to the end of a bytearray
+    :param out: the bytearray
+    :param game_seed: the seed of the game
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param num_syms: the number of different pieces in play
+    :param turn: the number of moves played so far
+    :param score: the score so far
+    :param board: the game board
+    :param rng: the GameRandom the game is played with
+    :return: none
+    """
+    for n in [game_seed, rows, cols, num_syms, turn, score]:
+        writeVarint(out, n)
+    out += bytes((v + 1) & 0xFF for row in board for v in row)
+    out += RANDOM_STATE.pack(*rng.refill.getstate()[1])
+
+
+def readKeyframe(data, pos):
+    """
+    Method Name: readKeyframe()
+    Description: Reads a keyframe written by writeKeyframe()
+    :param data: the bytes, or an mmap of them
+    :param pos: where the keyframe starts
+    :return: a tuple of a dictionary holding the "game_seed", "rows", "cols",
+             "num_syms", "turn", "score", "board" and "rng" of the game, and where
+             the next thing starts
+    """
+    header = []
+    for i in range(6):
+        n, pos = readVarint(data, pos)
+        header.append(n)
+    game_seed, rows, cols, num_syms, turn, score = header
+
+    cells = data[pos:pos + rows * cols]
+    pos += rows * cols
+    board = [[cells[r * cols + c] - 1 for c in range(cols)] for r in range(rows)]
+
+    state = RANDOM_STATE.unpack_from(data, pos)
+    pos += RANDOM_STATE.size
+    rng = GameRandom(game_seed, False)
+    rng.refill.setstate((rng.refill.VERSION, state, None))
+
+    return ({"game_seed": game_seed, "rows": rows, "cols": cols, "num_syms": num_syms, "turn": turn,
+             "score": score, "board": board, "rng": rng}, pos)
+
+
+class ArchiveWriter:
+    """
+    Class Name: ArchiveWriter
+    Description: Adds games to the end of an archive.  Start each game with
+    startGame(), play each move with playMove() and the GameRandom it gives, then
+    record() it, and finish the game with endGame().  Nothing but the game being
+    written is kept.  close() the writer before the archive is read.
+    """
+
+    def __init__(self, path, keyframe_every=None):
+        """
+        Method Name: __init__()
+        Description: Opens an archive to add games to, creating it if there is none.
+        An entry cut short at the end of the index, from a writer that was stopped
+        part way through, is dropped.
+        :param path: the archive file.  The index is the same path with ".idx"
+                     added.
+        :param keyframe_every: the number of turns between keyframes, or None for
+                               KEYFRAME_EVERY in a new archive and whatever an old
+                               one was made with
+        """
+        self.path = path
+        self.data = open(path, "ab")
+        if self.data.tell() == 0:
+            if keyframe_every is None:
+                keyframe_every = KEYFRAME_EVERY
+            if keyframe_every < 1:
+                self.data.close()
+                raise ValueError("keyframes cannot be %d turns apart" % keyframe_every)
+            header = bytearray(ARCHIVE_MAGIC)
+            writeVarint(header, keyframe_every)
+            self.data.write(header)
+        else:
+            with open(path, "rb") as f:
+                header = f.read(16)
+            if header[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+                self.data.close()
+                raise ValueError("%s is not a version %d archive" % (path, ARCHIVE_MAGIC[-1]))
+            every = readVarint(header, len(ARCHIVE_MAGIC))[0]
+            if keyframe_every is not None and keyframe_every != every:
+                self.data.close()
+                raise ValueError("%s has keyframes every %d turns, not %d" % (path, every, keyframe_every))
+            keyframe_every = every
+        self.keyframe_every = keyframe_every
+
+        self.index = open(path + ".idx", "ab")
+        size = self.index.tell()
+        if size == 0:
+            self.index.write(INDEX_MAGIC + bytes(INDEX_HEADER - len(INDEX_MAGIC)))
+            size = INDEX_HEADER
+        entries = (size - INDEX_HEADER) // INDEX_ENTRY.size
+        self.index.truncate(INDEX_HEADER + entries * INDEX_ENTRY.size)
+
+        # The next game goes after the last one in the index
+        self.games = 0
+        if entries > 0:
+            with open(path + ".idx", "rb") as f:
+                f.seek(INDEX_HEADER + (entries - 1) * INDEX_ENTRY.size)
+                key, offset = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+            self.games = (key >> 32) + 1
+        self.game = None
+
+    def keyframe(self, board, score):
+        """
+        Method Name: keyframe()
+        Description: Writes a keyframe of the game being written and its entry in
+        the index.  The keyframe is flushed before its entry is written, so the
+        index never points past the end of the archive.
+        :param board: the game board
+        :param score: the score so far
+        :return: none
+        """
+        game = self.game
+        out = bytearray()
+        writeKeyframe(out, game["game_seed"], game["rows"], game["cols"], game["num_syms"], game["turn"], score,
+                      board, game["rng"])
+        offset = self.data.tell()
+        self.data.write(out)
+        self.data.flush()
+        self.index.write(INDEX_ENTRY.pack(indexKey(game["number"], game["turn"]), offset))
+        game["keyframed"] = game["turn"]
+
+    def startGame(self, rows, cols, num_syms, game_seed):
+        """
+        Method Name: startGame()
+        Description: Creates and settles the first board of a game and writes it as
+        the game's first keyframe
+        :param rows: the number of rows on the board
+        :param cols: the number of columns on the board
+        :param num_syms: the number of different pieces in play
+        :param game_seed: the seed of the game's GameRandom, an int that is not
+                          negative
+        :return: a tuple of the game number, the board, the GameRandom to play the
+                 game with and the points scored while the board settled
+        """
+        if self.game is not None:
+            raise ValueError("game %d has not been ended" % self.game["number"])
+        if game_seed < 0:
+            raise ValueError("an archived game's seed cannot be negative")
+        rng = GameRandom(game_seed, False)
+        board = createBoard(rows, cols, num_syms, rng)
+        score = settle(board, num_syms, 1, None, None, rng)
+        self.game = {"number": self.games, "game_seed": game_seed, "rows": rows, "cols": cols,
+                     "num_syms": num_syms, "rng": rng, "turn": 0, "keyframed": -1}
+        self.games += 1
+        self.keyframe(board, score)
+        return (self.game["number"], board, rng, score)
+
+    def record(self, board, move, score):
+        """
+        Method Name: record()
+        Description: Writes a move that has just been played, and a keyframe after
+        it if one is due
+        :param board: the game board after the move settled
+        :param move: the (r1, c1, r2, c2) move
+        :param score: the score after the move
+        :return: none
+        """
+        game = self.game
+        if game is None:
+            raise ValueError("no game has been started")
+        out = bytearray()
+        writeVarint(out, moveCode(move[0], move[1], move[2], move[3], game["cols"]))
+        out += boardChecksum(board).to_bytes(4, "little")
+        self.data.write(out)
+        game["turn"] += 1
+        if game["turn"] % self.keyframe_every == 0:
+            self.keyframe(board, score)
+
+    def endGame(self, board, score):
+        """
+        Method Name: endGame()
+        Description: Finishes the game being written.  Its last turn is always a
+        keyframe, which is how the index knows how long the game is.
+        :param board: the final game board
+        :param score: the final score
+        :return: the game number
+        """
+        game = self.game
+        if game is None:
+            raise ValueError("no game has been started")
+        if game["keyframed"] != game["turn"]:
+            self.keyframe(board, score)
+        self.game = None
+        return game["number"]
+
+    def flush(self):
+        """
+        Method Name: flush()
+        Description: Writes out everything added so far, so a reader can see the
+        games that have been ended
+        :return: none
+        """
+        self.data.flush()
+        self.index.flush()
+
+    def close(self):
+        """
+        Method Name: close()
+        Description: Closes the archive.  A game that was not ended is kept up to
+        its last keyframe.
+        :return: none
+        """
+        self.data.close()
+        self.index.close()
+
+
+class ArchiveReader:
+    """
+    Class Name: ArchiveReader
+    Description: Reads any turn of any game in an archive, through mmap
+    """
+
+    def __init__(self, path):
+        """
+        Method Name: __init__()
+        Description: Opens an archive to read
+        :param path: the archive file
+        """
+        self.files = [open(path, "rb"), open(path + ".idx", "rb")]
+        self.data = mmap.mmap(self.files[0].fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(ARCHIVE_MAGIC)] != ARCHIVE_MAGIC:
+            self.close()
+            raise ValueError("%s is not a version %d archive" % (path, ARCHIVE_MAGIC[-1]))
+        self.keyframe_every = readVarint(self.data, len(ARCHIVE_MAGIC))[0]
+        self.index = mmap.mmap(self.files[1].fileno(), 0, access=mmap.ACCESS_READ)
+        if self.index[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            self.close()
+            raise ValueError("%s.idx is not a version %d index" % (path, INDEX_MAGIC[-1]))
+        self.entries = (len(self.index) - INDEX_HEADER) // INDEX_ENTRY.size
+
+    def entry(self, i):
+        """
+        Method Name: entry()
+        Description: Reads one entry of the index
+        :param i: which entry
+        :return: a tuple of the game number, the turn and where the keyframe starts
+        """
+        key, offset = INDEX_ENTRY.unpack_from(self.index, INDEX_HEADER + i * INDEX_ENTRY.size)
+        return (key >> 32, key & 0xFFFFFFFF, offset)
+
+    def lastAtOrBefore(self, game, turn):
+        """
+        Method Name: lastAtOrBefore()
+        Description: Binary searches the index for the last keyframe that comes no
+        later than a turn of a game
+        :param game: the game number
+        :param turn: the turn
+        :return: which entry, or -1 if every entry comes later
+        """
+        key = indexKey(game, turn)
+        lo = 0
+        hi = self.entries
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if INDEX_ENTRY.unpack_from(self.index, INDEX_HEADER + mid * INDEX_ENTRY.size)[0] <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    def games(self):
+        """
+        Method Name: games()
+        Description: The number of games in the archive
+        :return: the number of games
+        """
+        if self.entries == 0:
+            return 0
+        return self.entry(self.entries - 1)[0] + 1
+
+    def turns(self, game):
+        """
+        Method Name: turns()
+        Description: The number of moves played in a game
+        :param game: the game number
+        :return: the number of moves
+        """
+        i = self.lastAtOrBefore(game, 0xFFFFFFFF)
+        if i < 0 or self.entry(i)[0] != game:
+            raise ValueError("the archive has no game %d" % game)
+        return self.entry(i)[1]
+
+    def locate(self, game, turn):
+        """
+        Method Name: locate()
+        Description: Finds the keyframe to start reading a turn of a game from
+        :param game: the game number
+        :param turn: the turn
+        :return: a tuple of the turn of the keyframe and where it starts
+        """
+        i = self.lastAtOrBefore(game, turn)
+        if i < 0 or self.entry(i)[0] != game:
+            raise ValueError("the archive has no game %d" % game)
+        at, offset = self.entry(i)[1:]
+        if at != turn and (i + 1 == self.entries or self.entry(i + 1)[0] != game):
+            raise ValueError("game %d has no turn %d" % (game, turn))
+        return (at, offset)
+
+    def state(self, game, turn=None, verify=True):
+        """
+        Method Name: state()
+        Description: The state of a game after a turn, played on from the keyframe
+        before it
+        :param game: the game number
+        :param turn: the number of moves played, or None for the end of the game
+        :param verify: True to check the board against its checksum after every
+                       move played, raising ValueError at the first one that
+                       differs
+        :return: the keyframe dictionary of readKeyframe(), brought up to the turn.
+                 Its "rng" carries on the game from there.
+        """
+        if turn is None:
+            turn = self.turns(game)
+        at, offset = self.locate(game, turn)
+        frame, pos = readKeyframe(self.data, offset)
+        board = frame["board"]
+        for i in range(turn - at):
+            code, pos = readVarint(self.data, pos)
+            checksum = int.from_bytes(self.data[pos:pos + 4], "little")
+            pos += 4
+            r1, c1, r2, c2 = codeMove(code, frame["cols"])
+            points = playMove(board, r1, c1, r2, c2, frame["num_syms"], None, frame["rng"])
+            if points == -1:
+                raise ValueError("move %d of game %d is not allowed" % (at + i + 1, game))
+            frame["score"] += points
+            if verify and boardChecksum(board) != checksum:
+                raise ValueError("game %d does not match after turn %d" % (game, at + i + 1))
+        frame["turn"] = turn
+        return frame
+
+    def board(self, game, turn=None, verify=True):
+        """
+        Method Name: board()
+        Description: The board and score of a game after a turn
+        :param game: the game number
+        :param turn: the number of moves played, or None for the end of the game
+        :param verify: True to check every move played against its checksum
+        :return: a tuple of the board and the score
+        """
+        frame = self.state(game, turn, verify)
+        return (frame["board"], frame["score"])
+
+    def close(self):
+        """
+        Method Name: close()
+        Description: Closes the archive
+        :return: none
+        """
+        for m in ["data", "index"]:
+            if hasattr(self, m):
+                getattr(self, m).close()
+        for f in self.files:
+            f.close()
+
+
+def archiveGame(writer, rows, cols, num_syms, game_seed, turns, pick=hint):
+    """
+    Method Name: archiveGame()
+    Description: Plays a game without a window and adds it to an archive as it is
+    played
+    :param writer: the ArchiveWriter
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param num_syms: the number of different pieces in play
+    :param game_seed: the seed of the game
+    :param turns: the most moves to play.  The game stops early if there are no
+                  moves left.
+    :param pick: a function that picks the move to play on a board the way hint()
+                 does, returning -1, -1, -1, -1 when there is none
+    :return: a tuple of the game number, the final board and the final score
+    """
+    game, board, rng, score = writer.startGame(rows, cols, num_syms, game_seed)
+    for turn in range(turns):
+        r1, c1, r2, c2 = pick(board)
+        if r1 == -1:
+            break
+        score += playMove(board, r1, c1, r2, c2, num_syms, None, rng)
+        writer.record(board, (r1, c1, r2, c2), score)
+    writer.endGame(board, score)
+    return (game, board, score)
+
+
+#
+# Run a series of tests on the game archive
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_archive():
+    from crush_replay import recordGame
+
+    print("Testing the game archive...")
+
+    passed = 0
+    failed = 0
+    # The archive is written in a folder of its own, which is removed however the
+    # tests end
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "test.cca")
+
+        print("  Attempting to archive 12 games and read back every turn... ", end="")
+        sizes = [(8, 8, 6), (7, 7, 5), (6, 7, 4)]
+        problem = None
+        writer = ArchiveWriter(path, 5)
+        finals = []
+        for game in range(12):
+            rows, cols, syms = sizes[game % len(sizes)]
+            finals.append(archiveGame(writer, rows, cols, syms, 100 + game, 23 + game))
+        writer.close()
+
+        reader = ArchiveReader(path)
+        if reader.games() != 12:
+            problem = "the archive holds %d games" % reader.games()
+        for game in range(12):
+            if problem is not None:
+                break
+            rows, cols, syms = sizes[game % len(sizes)]
+            replay, board, score = recordGame(rows, cols, syms, 100 + game, 23 + game)
+            number, final_board, final_score = finals[game]
+            if number != game or (board, score) != (final_board, final_score):
+                problem = "game %d played differently in the archive" % game
+                break
+            if reader.turns(game) != len(replay.moves) or reader.board(game) != (board, score):
+                problem = "game %d did not end on the same board and score" % game
+                break
+            for turn in range(len(replay.moves) + 1):
+                at, offset = reader.locate(game, turn)
+                if turn - at >= 5 or at > turn:
+                    problem = "turn %d of game %d was read from turn %d" % (turn, game, at)
+                    break
+                middle, middle_score = reader.board(game, turn)
+                if boardChecksum(middle) != replay.checksums[turn]:
+                    problem = "turn %d of game %d did not match" % (turn, game)
+                    break
+            if problem is None and len(replay.moves) > 7 and reader.board(game, 7) != replay.seek(7, False):
+                problem = "the score after turn 7 of game %d did not match" % game
+            if problem is None:
+                try:
+                    reader.board(game, len(replay.moves) + 1)
+                    problem = "game %d read a turn past its end" % game
+                except ValueError:
+                    pass
+        reader.close()
+
+        if problem is None:
+            print("Success.")
+            passed += 1
+        else:
+            print("\nFAILED:", problem)
+            print()
+            failed += 1
+
+        print("  Attempting to carry on a game from a keyframe... ", end="")
+        reader = ArchiveReader(path)
+        frame = reader.state(0, 10)
+        reader.close()
+        replay, board, score = recordGame(8, 8, 6, 100, 23)
+        move = hint(frame["board"])
+        points = playMove(frame["board"], move[0], move[1], move[2], move[3], 6, None, frame["rng"])
+        if move == replay.moves[10] and boardChecksum(frame["board"]) == replay.checksums[11] and points != -1:
+            print("Success.")
+            passed += 1
+        else:
+            print("\nFAILED: the refills after the keyframe were not the same")
+            failed += 1
+
+        print("  Attempting to add games to an archive that was closed... ", end="")
+        problem = None
+        writer = ArchiveWriter(path)
+        extra = archiveGame(writer, 8, 8, 6, 500, 12)
+        writer.close()
+        reader = ArchiveReader(path)
+        if extra[0] != 12 or reader.games() != 13 or reader.board(12) != (extra[1], extra[2]):
+            problem = "the new game was not read back"
+        elif reader.board(3, 4) != recordGame(8, 8, 6, 103, 26)[0].seek(4, False):
+            problem = "the old games changed"
+        reader.close()
+        try:
+            ArchiveWriter(path, 6)
+            problem = "the keyframes were allowed to change"
+        except ValueError:
+            pass
+        if problem is None:
+            print("Success.")
+            passed += 1
+        else:
+            print("\nFAILED:", problem)
+            failed += 1
+
+        print("  Attempting to drop an index entry that was cut short... ", end="")
+        with open(path + ".idx", "ab") as f:
+            f.write(bytes(7))
+        writer = ArchiveWriter(path)
+        extra = archiveGame(writer, 7, 7, 5, 600, 9)
+        writer.close()
+        reader = ArchiveReader(path)
+        if reader.games() == 14 and reader.board(13) == (extra[1], extra[2]) and reader.turns(12) == 12:
+            print("Success.")
+            passed += 1
+        else:
+            print("\nFAILED: the archive did not read back after the cut")
+            failed += 1
+        reader.close()
+
+        print("  Attempting to catch a changed move... ", end="")
+        reader = ArchiveReader(path)
+        at, offset = reader.locate(0, 3)
+        frame, pos = readKeyframe(reader.data, offset)
+        reader.close()
+        with open(path, "r+b") as f:
+            f.seek(pos + 4)
+            byte = f.read(1)
+            f.seek(pos + 4)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        reader = ArchiveReader(path)
+        try:
+            reader.board(0, 2)
+            print("\nFAILED: the changed checksum was not caught")
+            failed += 1
+        except ValueError:
+            print("Success.")
+            passed += 1
+        reader.close()
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_archive()
@@ -0,0 +1,957 @@
+###############################################################################
+#  File: crush_batch.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               A batch of independent games played in lock-step, for training
+#               and tuning bots.  The boards are held in one 3-D numpy.int8
+#               array and every game moves forward one turn per step(), with
+#               no animations.  Each group of patterns is found on all the
+#               boards at once, scored the way collapse() scores it, and
+#               cleared; the pieces then fall down each column in the order
+#               looked up for its set of EMPTY cells.  Every board draws its
+#               new pieces from its own splitmix64 stream, so a game depends
+#               only on its seed and its moves, not on the other games in the
+#               batch.
+#
+#  External Libraries:
+#               numpy - only this file needs it, the rest of the game does not
+###############################################################################
+
+from crush_engine import *
+from crush_numpy import OFF_BOARD, SWAP_LINES, stillMatches
+from crush_zobrist import MASK64, QUIET_RANDOM, splitmix64
+from random import randrange, seed
+from time import time
+import numpy as np
+
+# The constants of splitmix64(), as numpy values so the arithmetic stays in
+# 64-bit unsigned integers and wraps the same way
+GAMMA = np.uint64(0x9E3779B97F4A7C15)
+MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+MIX2 = np.uint64(0x94D049BB133111EB)
+
+
+def splitmixArray(x):
+    """
+    Method Name: splitmixArray()
+    Description: splitmix64() for every number in an array at once
+    :param x: a numpy.uint64 array
+    :return: a numpy.uint64 array of the scrambled numbers
+    """
+    x = x + GAMMA
+    x = (x ^ (x >> np.uint64(30))) * MIX1
+    x = (x ^ (x >> np.uint64(27))) * MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+def batchMasks(arr, valid, cells):
+    """
+    Method Name: batchMasks()
+    Description: patternMask() for a stack of boards
+    :param arr: the N x rows x columns numpy game boards
+    :param valid: a boolean array that is True for every piece that can start a
+                  pattern, which is every piece but EMPTY and BURST
+    :param cells: the (row, column) offsets of the pattern from its starting cell
+    :return: a tuple of the starting cells the pattern fits at, as the slices
+             (r0, r1, c0, c1), and a boolean array that is True where it matches
+    """
+    rows = arr.shape[1]
+    cols = arr.shape[2]
+    r0 = -min(dr for dr, dc in cells)
+    r1 = rows - max(dr for dr, dc in cells)
+    c0 = -min(dc for dr, dc in cells)
+    c1 = cols - max(dc for dr, dc in cells)
+    if r0 >= r1 or c0 >= c1:
+        return ((r0, r1, c0, c1), None)
+
+    first = arr[:, r0:r1, c0:c1]
+    hit = valid[:, r0:r1, c0:c1].copy()
+    for dr, dc in cells[1:]:
+        hit &= arr[:, r0 + dr:r1 + dr, c0 + dc:c1 + dc] == first
+    return ((r0, r1, c0, c1), hit)
+
+
+def popcount(x):
+    """
+    Method Name: popcount()
+    Description: Counts the bits that are set in each number of a numpy.uint64 array
+    :param x: the array
+    :return: an array of the counts
+    """
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    return np.unpackbits(x.view(np.uint8).reshape(x.shape + (8,)), axis=-1).sum(axis=-1)
+
+
+def shiftBits(x, offset):
+    """
+    Method Name: shiftBits()
+    Description: Moves every bit of a bit board by a number of cells
+    :param x: a numpy.uint64 array of bit boards, bit r * columns + c for each cell
+    :param offset: the number of cells to move the bits down the board by, which can
+                   be negative
+    :return: the moved bit boards
+    """
+    if offset >= 0:
+        return x << np.uint64(offset)
+    return x >> np.uint64(-offset)
+
+
+# The compiled bit patterns made by bitPatterns(), one for each board size
+BIT_PATTERNS = {}
+
+# The column orders made by dropOrders(), one for each number of rows
+DROP_ORDERS = {}
+
+
+def bitPattern(rows, cols, pattern):
+    """
+    Method Name: bitPattern()
+    Description: Turns a pattern into bit board form for a board of up to 64 cells.
+    A cell is bit r * columns + c.
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param pattern: the pattern, from PATTERN_GROUPS
+    :return: a tuple of the bit board of the cells the pattern can start at, the
+             offsets of its cells and the offset of its BURST or None
+    """
+    name, cells, burst, at, points = pattern
+    fits = 0
+    for r in range(rows):
+        for c in range(cols):
+            if all(0 <= r + dr < rows and 0 <= c + dc < cols for dr, dc in cells):
+                fits |= 1 << (r * cols + c)
+    offsets = [dr * cols + dc for dr, dc in cells]
+    if burst is None:
+        return (np.uint64(fits), offsets, None)
+    return (np.uint64(fits), offsets, burst[0] * cols + burst[1])
+
+
+def bitPatterns(rows, cols):
+    """
+    Method Name: bitPatterns()
+    Description: Turns each group of PATTERN_GROUPS into bit board form with
+    bitPattern().  The tables are only built once for each board size.
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :return: a tuple of the list of groups and the compiled H3 and V3.  Each group
+             is a tuple of its patterns, their compiled forms, the points each of
+             its matches scores paired with whether they make a BURST, or None if
+             they do not all score the same, and which of H3 and V3 every one of
+             its patterns has in it.
+    """
+    if (rows, cols) in BIT_PATTERNS:
+        return BIT_PATTERNS[(rows, cols)]
+
+    groups = []
+    for direction, patterns in PATTERN_GROUPS:
+        compiled = [bitPattern(rows, cols, pattern) for pattern in patterns]
+        amounts = set((points, burst is not None) for name, cells, burst, at, points in patterns)
+        needs = []
+        for step in [(0, 1), (1, 0)]:
+            needs.append(all(any((r + step[0], c + step[1]) in cells and (r + 2 * step[0], c + 2 * step[1]) in cells
+                                 for r, c in cells) for name, cells, burst, at, points in patterns))
+        if len(amounts) == 1:
+            groups.append((patterns, compiled, amounts.pop(), needs))
+        else:
+            groups.append((patterns, compiled, None, needs))
+    lines = [bitPattern(rows, cols, H3), bitPattern(rows, cols, V3)]
+
+    BIT_PATTERNS[(rows, cols)] = (groups, lines)
+    return BIT_PATTERNS[(rows, cols)]
+
+
+def toBits(arr, num_colours):
+    """
+    Method Name: toBits()
+    Description: Makes a bit board of each colour on a stack of boards
+    :param arr: the N x rows x columns numpy game boards, of up to 64 cells each
+    :param num_colours: the number of colours to make bit boards for
+    :return: an N x num_colours numpy.uint64 array of bit boards
+    """
+    n = len(arr)
+    flat = np.zeros((n, 64), dtype=np.int8)
+    flat[:, :arr.shape[1] * arr.shape[2]] = arr.reshape(n, arr.shape[1] * arr.shape[2])
+    planes = flat[:, None, :] == np.arange(num_colours, dtype=np.int8)[None, :, None]
+    return np.packbits(planes, axis=2, bitorder="little").view("<u8")[:, :, 0].astype(np.uint64)
+
+
+def fromBits(bits, cells):
+    """
+    Method Name: fromBits()
+    Description: Turns one bit board for each board back into a boolean array
+    :param bits: a numpy.uint64 array with a bit board for each board
+    :param cells: the number of cells on each board
+    :return: an N x cells boolean array
+    """
+    as_bytes = bits.astype("<u8").view(np.uint8).reshape(len(bits), 8)
+    return np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :cells].astype(bool)
+
+
+def clearGroup(arr, sf, points, changed, direction, patterns):
+    """
+    Method Name: clearGroup()
+    Description: Clears one group of PATTERN_GROUPS from a stack of boards.  Within
+    the group, matches that do not share a cell are all cleared at once.  A board
+    where two of them share a cell is rechecked one match at a time in
+    collapse()'s order instead.
+    :param arr: the N x rows x columns numpy game boards, changed in place
+    :param sf: a numpy array of the score factor of each board, changed in place
+    :param points: a numpy array of the points each board has scored, added to
+    :param changed: a boolean array that is set for every board that changes
+    :param direction: the direction the group's rows are scanned in
+    :param patterns: the patterns in the group
+    :return: none
+    """
+    n, rows, cols = arr.shape
+    valid = (arr != EMPTY) & (arr != BURST)
+    found = []
+    count = np.zeros(arr.shape, dtype=np.int8)
+    for p, pattern in enumerate(patterns):
+        (r0, r1, c0, c1), hit = batchMasks(arr, valid, pattern[1])
+        if hit is None or not hit.any():
+            continue
+        found.append((p, pattern, r0, c0, hit))
+        for dr, dc in pattern[1]:
+            count[:, r0 + dr:r1 + dr, c0 + dc:c1 + dc] += hit
+    if len(found) == 0:
+        return
+
+    # Every match in the group, in the order collapse() checks them
+    boards = []
+    keys = []
+    cells = []
+    for (p, pattern, r0, c0, hit) in found:
+        b, r, c = np.nonzero(hit)
+        r = r + r0
+        c = c + c0
+        if direction == -1:
+            row_key = rows - 1 - r
+        else:
+            row_key = r
+        boards.append(b)
+        keys.append((row_key * cols + c) * len(patterns) + p)
+        cells.append(np.stack([np.full(len(b), p), r, c], axis=1))
+    boards = np.concatenate(boards)
+    keys = np.concatenate(keys)
+    cells = np.concatenate(cells)
+    order = np.lexsort((keys, boards))
+    boards = boards[order]
+    cells = cells[order]
+    changed[boards] = True
+
+    # The boards where two matches share a cell are done one match at a time
+    tangled = (count > 1).any(axis=(1, 2))
+    for b in np.nonzero(tangled)[0].tolist():
+        board = arr[b]
+        lo = np.searchsorted(boards, b, "left")
+        hi = np.searchsorted(boards, b, "right")
+        for (p, r, c) in cells[lo:hi].tolist():
+            name, offsets, burst, at, amount = patterns[p]
+            if not stillMatches(board, r, c, offsets):
+                continue
+            for dr, dc in offsets:
+                board[r + dr, c + dc] = EMPTY
+            if burst is not None:
+                board[r + burst[0], c + burst[1]] = BURST
+                points[b] += amount
+            else:
+                points[b] += amount * sf[b]
+            sf[b] += 1
+
+    # Everywhere else every match is cleared, each scoring with the score
+    # factor as it stands when collapse() gets to it
+    simple = ~tangled[boards]
+    boards = boards[simple]
+    cells = cells[simple]
+    if len(boards) == 0:
+        return
+    first = np.searchsorted(boards, boards)
+    rank = np.arange(len(boards)) - first
+    amounts = np.zeros(len(boards), dtype=np.int64)
+    for (p, pattern, r0, c0, hit) in found:
+        mine = cells[:, 0] == p
+        if pattern[2] is not None:
+            amounts[mine] = pattern[4]
+        else:
+            amounts[mine] = pattern[4] * (sf[boards[mine]] + rank[mine])
+    points += np.bincount(boards, weights=amounts, minlength=n).astype(np.int64)
+    sf += np.bincount(boards, minlength=n)
+
+    clear = (count > 0) & ~tangled[:, None, None]
+    arr[clear] = EMPTY
+    for (p, pattern, r0, c0, hit) in found:
+        if pattern[2] is not None:
+            mine = (cells[:, 0] == p)
+            arr[boards[mine], cells[mine, 1] + pattern[2][0], cells[mine, 2] + pattern[2][1]] = BURST
+
+
+def clearBatch(arr, sf):
+    """
+    Method Name: clearBatch()
+    Description: clearMatches() for a stack of boards.  The boards are compared by
+    value rather than by value mod 10, which is the same when there are no more
+    than BURST different pieces.  Boards of up to 64 cells are matched as one bit
+    board per colour, where each pattern is a few shifts and ANDs.  When the
+    matches of a group do not share a cell and all score the same, the points
+    only depend on how many there are, so they are scored without being sorted
+    into order.  Any other board is handed to clearGroup().
+    :param arr: the N x rows x columns numpy game boards, changed in place
+    :param sf: a numpy array of the score factor of each board, changed in place
+    :return: a tuple of a numpy array of the points each board scored and a
+             boolean array that is True for the boards that changed
+    """
+    n, rows, cols = arr.shape
+    points = np.zeros(n, dtype=np.int64)
+    changed = np.zeros(n, dtype=bool)
+    if rows * cols > 64:
+        for direction, patterns in PATTERN_GROUPS:
+            clearGroup(arr, sf, points, changed, direction, patterns)
+        return (points, changed)
+
+    # Every pattern has a line of 3 in it, so only the boards with one are looked at
+    bits = toBits(arr, BURST)
+    groups, lines = bitPatterns(rows, cols)
+    has_line = []
+    for (fits, offsets, burst) in lines:
+        hit = bits & fits
+        for offset in offsets[1:]:
+            hit &= shiftBits(bits, -offset)
+        has_line.append((hit != 0).any(axis=1))
+    live = np.nonzero(has_line[0] | has_line[1])[0]
+    if len(live) == 0:
+        return (points, changed)
+    if len(live) < n:
+        sub = arr[live]
+        sub_sf = sf[live]
+        sub_points, sub_changed = clearBatch(sub, sub_sf)
+        arr[live] = sub
+        sf[live] = sub_sf
+        points[live] = sub_points
+        changed[live] = sub_changed
+        return (points, changed)
+
+    flat = arr.reshape(n, rows * cols)
+    for (direction, patterns), (group, compiled, amount, needs) in zip(PATTERN_GROUPS, groups):
+        # Clearing never makes a new line, so the boards without the lines the
+        # group's patterns need can be left out
+        wanted = np.ones(n, dtype=bool)
+        for need, has in zip(needs, has_line):
+            if need:
+                wanted &= has
+        look = np.nonzero(wanted)[0]
+        if len(look) == 0:
+            continue
+        some = bits[look]
+
+        # The cells each pattern starts at, for every board and colour
+        found = []
+        for (fits, offsets, burst) in compiled:
+            hit = some & fits
+            for offset in offsets[1:]:
+                hit &= shiftBits(some, -offset)
+            found.append((hit, offsets, burst))
+        count = sum(popcount(hit).sum(axis=1, dtype=np.int64) for (hit, offsets, burst) in found)
+        if not count.any():
+            continue
+
+        # Find the boards where two matches share a cell
+        seen = np.zeros(some.shape, dtype=np.uint64)
+        shared = np.zeros(some.shape, dtype=np.uint64)
+        bursts = np.zeros(some.shape, dtype=np.uint64)
+        for (hit, offsets, burst) in found:
+            for offset in offsets:
+                cells = shiftBits(hit, offset)
+                shared |= seen & cells
+                seen |= cells
+            if burst is not None:
+                bursts |= shiftBits(hit, burst)
+        tangled = (shared != 0).any(axis=1)
+        if amount is None:
+            tangled |= count > 1
+
+        index = look[tangled]
+        if len(index) > 0:
+            sub = arr[index]
+            sub_sf = sf[index]
+            sub_points = np.zeros(len(index), dtype=np.int64)
+            clearGroup(sub, sub_sf, sub_points, np.zeros(len(index), dtype=bool), direction, patterns)
+            arr[index] = sub
+            sf[index] = sub_sf
+            points[index] += sub_points
+            changed[index] = True
+            bits[index] = toBits(sub, BURST)
+
+        simple = ~tangled & (count > 0)
+        index = look[simple]
+        if len(index) > 0:
+            k = count[simple]
+            each, makes_burst = amount
+            if makes_burst:
+                points[index] += each * k
+            else:
+                points[index] += each * (k * sf[index] + k * (k - 1) // 2)
+            sf[index] += k
+            changed[index] = True
+
+            cleared = np.bitwise_or.reduce(seen[simple], axis=1)
+            sub = flat[index]
+            sub[fromBits(cleared, rows * cols)] = EMPTY
+            burst_bits = np.bitwise_or.reduce(bursts[simple], axis=1)
+            if burst_bits.any():
+                sub[fromBits(burst_bits, rows * cols)] = BURST
+            flat[index] = sub
+            bits[index] &= ~cleared[:, None]
+
+    return (points, changed)
+
+
+def dropOrders(rows):
+    """
+    Method Name: dropOrders()
+    Description: The order a column of up to 8 cells is rearranged into once its
+    pieces have fallen, for every set of EMPTY cells it could have.  Bit r of
+    the set is row r.  The EMPTY cells go to the top and the pieces keep their
+    order below them.
+    :param rows: the number of rows on the board
+    :return: a 2^rows x rows numpy array of row numbers
+    """
+    if rows not in DROP_ORDERS:
+        orders = np.zeros((1 << rows, rows), dtype=np.intp)
+        for mask in range(1 << rows):
+            empties = [r for r in range(rows) if mask >> r & 1]
+            orders[mask] = empties + [r for r in range(rows) if not mask >> r & 1]
+        DROP_ORDERS[rows] = orders
+    return DROP_ORDERS[rows]
+
+
+def dropBatch(arr):
+    """
+    Method Name: dropBatch()
+    Description: Lets the pieces on a stack of boards fall into the EMPTY cells
+    below them, leaving the EMPTY cells at the top of each column.  Boards of up
+    to 8 rows look up how each column with a hole in it is rearranged in
+    dropOrders(); taller ones move each piece down by the number of EMPTY cells
+    below it.
+    :param arr: the N x rows x columns numpy game boards, changed in place
+    :return: none
+    """
+    n, rows, cols = arr.shape
+    if rows <= 8:
+        columns = arr.transpose(0, 2, 1).reshape(n * cols, rows)
+        masks = np.packbits(columns == EMPTY, axis=1, bitorder="little")[:, 0]
+        holed = np.nonzero(masks)[0]
+        if len(holed) == 0:
+            return
+        order = dropOrders(rows)[masks[holed]]
+        columns[holed] = np.take_along_axis(columns[holed], order, axis=1)
+        arr[:] = columns.reshape(n, cols, rows).transpose(0, 2, 1)
+        return
+
+    empty = arr == EMPTY
+    below = np.cumsum(empty[:, ::-1, :], axis=1, dtype=np.int16)[:, ::-1, :]
+    b, r, c = np.nonzero(~empty & (below > 0))
+    if len(b) == 0:
+        return
+    pieces = arr[b, r, c]
+    arr[b, r, c] = EMPTY
+    arr[b, r + below[b, r, c], c] = pieces
+
+
+def swapLines(pad, b, r1, c1, r2, c2):
+    """
+    Method Name: swapLines()
+    Description: evalSwapsArray() for a stack of boards, with one swap for each
+    board or the same swaps for all of them
+    :param pad: the boards with a border of 2 OFF_BOARD cells around each one
+    :param b: the board of each swap
+    :param r1: the row of the first piece of each swap
+    :param c1: the column of the first piece of each swap
+    :param r2: the row of the second piece of each swap
+    :param c2: the column of the second piece of each swap
+    :return: a boolean array that is True for every swap that makes a line
+    """
+    r1 = r1 + 2
+    c1 = c1 + 2
+    r2 = r2 + 2
+    c2 = c2 + 2
+    v1 = pad[b, r1, c1]
+    v2 = pad[b, r2, c2]
+
+    mask = np.zeros(np.broadcast(b, r1).shape, dtype=bool)
+    for (r, c, v, other_r, other_c, other_v) in [(r2, c2, v1, r1, c1, v2), (r1, c1, v2, r2, c2, v1)]:
+        for line in SWAP_LINES:
+            hit = np.ones(mask.shape, dtype=bool)
+            for (dr, dc) in line:
+                near = pad[b, r + dr, c + dc]
+                near = np.where((r + dr == other_r) & (c + dc == other_c), other_v, near)
+                hit &= near == v
+            mask |= hit
+    return mask
+
+
+class BatchEnv:
+    """
+    Class Name: BatchEnv
+    Description: Many games of the same size played at once, one move per game per
+    step().  A move that is not allowed leaves its game alone without using up a
+    turn, the way play() treats it.  A game is done when its turns run out or its
+    score reaches the target, and is left alone from then on.
+    """
+
+    def __init__(self, rows=8, cols=8, num_syms=6, max_turns=35, target_score=None):
+        """
+        Method Name: __init__()
+        Description: Sets up the size and rules of the games.  Call reset() to start
+        them.
+        :param rows: the number of rows on each board
+        :param cols: the number of columns on each board
+        :param num_syms: the number of different pieces in play, at most BURST
+        :param max_turns: the number of turns each game starts with
+        :param target_score: the score that ends a game, or None to play every turn
+        """
+        if num_syms > BURST:
+            raise ValueError("BatchEnv plays with at most %d different pieces" % BURST)
+        self.rows = rows
+        self.cols = cols
+        self.num_syms = num_syms
+        self.max_turns = max_turns
+        self.target_score = target_score
+
+        # Every swap on the board, the second piece right of or below the first
+        swaps = []
+        for r in range(rows):
+            for c in range(cols):
+                if c + 1 < cols:
+                    swaps.append((r, c, r, c + 1))
+                if r + 1 < rows:
+                    swaps.append((r, c, r + 1, c))
+        self.swaps = np.array(swaps, dtype=np.intp).reshape(-1, 4)
+
+        self.boards = np.zeros((0, rows, cols), dtype=np.int8)
+        self.states = np.zeros(0, dtype=np.uint64)
+        self.scores = np.zeros(0, dtype=np.int64)
+        self.turns_left = np.zeros(0, dtype=np.int64)
+        self.done = np.zeros(0, dtype=bool)
+
+    def refill(self, arr, index):
+        """
+        Method Name: refill()
+        Description: Fills the EMPTY cells of some boards with new pieces, row by
+        row, each board drawing the next numbers from its own stream
+        :param arr: the boards, changed in place
+        :param index: the game each board belongs to
+        :return: none
+        """
+        empty = (arr == EMPTY).reshape(len(arr), self.rows * self.cols)
+        b, i = np.nonzero(empty)
+        if len(b) == 0:
+            return
+        k = (np.cumsum(empty, axis=1, dtype=np.int16) - 1)[b, i].astype(np.uint64)
+        states = self.states[index]
+        pieces = splitmixArray(states[b] + k * GAMMA) % np.uint64(self.num_syms)
+        arr.reshape(len(arr), self.rows * self.cols)[b, i] = pieces.astype(np.int8)
+        self.states[index] = states + empty.sum(axis=1).astype(np.uint64) * GAMMA
+
+    def settle(self, index, sf):
+        """
+        Method Name: settle()
+        Description: settle() for some of the boards: clears, drops and refills them
+        in lock-step until none of them has anything left to clear
+        :param index: the games to settle
+        :param sf: a numpy array of the score factor each starts with
+        :return: a numpy array of the points each game scored
+        """
+        points = np.zeros(len(index), dtype=np.int64)
+        where = np.arange(len(index))
+        while len(index) > 0:
+            arr = self.boards[index]
+            scored, changed = clearBatch(arr, sf)
+            points[where] += scored
+            index = index[changed]
+            where = where[changed]
+            sf = sf[changed]
+            arr = arr[changed]
+            dropBatch(arr)
+            self.refill(arr, index)
+            self.boards[index] = arr
+        return points
+
+    def reset(self, seeds):
+        """
+        Method Name: reset()
+        Description: Starts one game for each seed on a settled random board
+        :param seeds: a list of the seed for each game
+        :return: the N x rows x columns boards
+        """
+        n = len(seeds)
+        self.states = np.array([splitmix64(s & MASK64) for s in seeds], dtype=np.uint64)
+        self.boards = np.full((n, self.rows, self.cols), EMPTY, dtype=np.int8)
+        index = np.arange(n)
+        self.refill(self.boards, index)
+        self.settle(index, np.ones(n, dtype=np.int64))
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.turns_left = np.full(n, self.max_turns, dtype=np.int64)
+        self.done = np.zeros(n, dtype=bool)
+        return self.boards.copy()
+
+    def legalMoves(self):
+        """
+        Method Name: legalMoves()
+        Description: legalMoves() for every game at once
+        :return: a boolean array with a row for each game and a column for each
+                 swap in self.swaps, True for the swaps the game allows
+        """
+        pad = np.pad(self.boards, ((0, 0), (2, 2), (2, 2)), constant_values=OFF_BOARD)
+        b = np.arange(len(self.boards))[:, None]
+        s = self.swaps
+        lines = swapLines(pad, b, s[None, :, 0], s[None, :, 1], s[None, :, 2], s[None, :, 3])
+        v1 = self.boards[:, s[:, 0], s[:, 1]]
+        v2 = self.boards[:, s[:, 2], s[:, 3]]
+        return lines | ((v1 == BURST) != (v2 == BURST))
+
+    def makesLine(self, b, r1, c1, r2, c2):
+        """
+        Method Name: makesLine()
+        Description: Tries one swap on each of some boards.  The boards are settled,
+        so any line through one of the swapped cells is made by the swap.
+        :param b: the game of each swap
+        :param r1: the row of the first piece of each swap
+        :param c1: the column of the first piece of each swap
+        :param r2: the row of the second piece of each swap
+        :param c2: the column of the second piece of each swap
+        :return: a boolean array that is True for every swap that makes a line
+        """
+        if self.rows * self.cols > 64:
+            pad = np.pad(self.boards[b], ((0, 0), (2, 2), (2, 2)), constant_values=OFF_BOARD)
+            return swapLines(pad, np.arange(len(b)), r1, c1, r2, c2)
+
+        arr = self.boards[b]
+        where = np.arange(len(b))
+        arr[where, r1, c1], arr[where, r2, c2] = arr[where, r2, c2], arr[where, r1, c1]
+        # BURSTs are never cleared, so a line of them can stay on a settled
+        # board, and canSwap() allows a swap through it
+        bits = toBits(arr, BURST + 1)
+        covered = np.zeros(len(b), dtype=np.uint64)
+        for (fits, offsets, burst) in bitPatterns(self.rows, self.cols)[1]:
+            hit = bits & fits
+            for offset in offsets[1:]:
+                hit &= shiftBits(bits, -offset)
+            hit = np.bitwise_or.reduce(hit, axis=1)
+            for offset in offsets:
+                covered |= shiftBits(hit, offset)
+        swapped = (np.uint64(1) << (r1 * self.cols + c1).astype(np.uint64)) | \
+                  (np.uint64(1) << (r2 * self.cols + c2).astype(np.uint64))
+        return (covered & swapped) != 0
+
+    def step(self, moves):
+        """
+        Method Name: step()
+        Description: Plays one move in every game that is not done
+        :param moves: an N x 4 array of the (r1, c1, r2, c2) swap for each game
+        :return: a tuple of the N x rows x columns boards, the points each move
+                 scored, the turns left in each game and whether each game is done
+        """
+        n = len(self.boards)
+        moves = np.asarray(moves, dtype=np.intp).reshape(n, 4)
+        r1, c1, r2, c2 = moves[:, 0], moves[:, 1], moves[:, 2], moves[:, 3]
+        rewards = np.zeros(n, dtype=np.int64)
+
+        # Only neighbouring pieces on the board can be swapped
+        ok = ~self.done & (((r1 == r2) & (abs(c1 - c2) == 1)) | ((c1 == c2) & (abs(r1 - r2) == 1)))
+        ok &= (np.minimum(r1, r2) >= 0) & (np.maximum(r1, r2) < self.rows) & \
+              (np.minimum(c1, c2) >= 0) & (np.maximum(c1, c2) < self.cols)
+        b = np.nonzero(ok)[0]
+        r1, c1, r2, c2 = r1[b], c1[b], r2[b], c2[b]
+        v1 = self.boards[b, r1, c1]
+        v2 = self.boards[b, r2, c2]
+        burst = (v1 == BURST) != (v2 == BURST)
+        lines = ~burst & self.makesLine(b, r1, c1, r2, c2)
+
+        # Swap the pieces
+        played = burst | lines
+        self.boards[b[played], r1[played], c1[played]] = v2[played]
+        self.boards[b[played], r2[played], c2[played]] = v1[played]
+        self.turns_left[b[played]] -= 1
+
+        # A BURST destroys every piece of the colour it was swapped with, and
+        # itself, for 30 points each
+        if burst.any():
+            index = b[burst]
+            target = np.where(v1[burst] == BURST, v2[burst], v1[burst])
+            arr = self.boards[index]
+            destroyed = (arr == target[:, None, None]) | (arr == EMPTY)
+            rewards[index] += 30 * (destroyed.sum(axis=(1, 2)) + 1)
+            arr[destroyed] = EMPTY
+            burst_r = np.where(v1[burst] == BURST, r2[burst], r1[burst])
+            burst_c = np.where(v1[burst] == BURST, c2[burst], c1[burst])
+            arr[np.arange(len(index)), burst_r, burst_c] = EMPTY
+            dropBatch(arr)
+            self.refill(arr, index)
+            self.boards[index] = arr
+
+        # Then every board that was played settles
+        index = b[played]
+        rewards[index] += self.settle(index, np.ones(len(index), dtype=np.int64))
+
+        self.scores += rewards
+        self.done |= self.turns_left <= 0
+        if self.target_score is not None:
+            self.done |= self.scores >= self.target_score
+        return (self.boards.copy(), rewards, self.turns_left.copy(), self.done.copy())
+
+
+def playOne(board, state, r1, c1, r2, c2, num_syms):
+    """
+    Method Name: playOne()
+    Description: The one-board version of BatchEnv.step(), written with the list
+    functions from crush_engine.py.  It is slow, and is used to check BatchEnv.
+    :param board: the list of lists game board, changed in place
+    :param state: the board's splitmix64 stream
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param num_syms: the number of different pieces in play
+    :return: a tuple of the points scored, or -1 if the move is not allowed, and
+             the stream after the move
+    """
+    rows = len(board)
+    cols = len(board[0])
+
+    def refill(state):
+        k = 0
+        for r in range(rows):
+            for c in range(cols):
+                if board[r][c] == EMPTY:
+                    board[r][c] = splitmix64((state + k * int(GAMMA)) & MASK64) % num_syms
+                    k += 1
+        return (state + k * int(GAMMA)) & MASK64
+
+    def drop():
+        for c in range(cols):
+            pieces = [board[r][c] for r in range(rows) if board[r][c] != EMPTY]
+            pieces = [EMPTY] * (rows - len(pieces)) + pieces
+            for r in range(rows):
+                board[r][c] = pieces[r]
+
+    if not (r1 == r2 and abs(c1 - c2) == 1 or c1 == c2 and abs(r1 - r2) == 1):
+        return (-1, state)
+    points = 0
+    if isBurstSwap(board, r1, c1, r2, c2):
+        syncAnim = []
+        asyncAnim = []
+        burstSwap(board, r1, c1, r2, c2, syncAnim, asyncAnim, 0, None, None, None, QUIET_RANDOM)
+        for anim in syncAnim:
+            if anim[0] == "destroy":
+                board[anim[1]][anim[2]] = EMPTY
+        points += sum(anim[4] for anim in asyncAnim)
+        drop()
+        state = refill(state)
+    elif canSwap(board, r1, c1, r2, c2):
+        swap(board, r1, c1, r2, c2)
+    else:
+        return (-1, state)
+
+    sf = 1
+    while True:
+        asyncAnim = []
+        sf, changed = clearMatches(board, Journal(), sf, [], asyncAnim)
+        if not changed:
+            return (points, state)
+        points += sum(anim[4] for anim in asyncAnim)
+        drop()
+        state = refill(state)
+
+
+#
+# Run a series of tests on the clearBatch function
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_clearBatch():
+    print("Testing clearBatch...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3), (12, 15, 3)]:
+        print("  Attempting to clear 100 random boards at once: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        boards = []
+        for game in range(100):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            for i in range(game % 4):
+                board[randrange(rows)][randrange(cols)] = BURST
+            board[randrange(rows)][randrange(cols)] = EMPTY
+            boards.append(board)
+        arr = np.array(boards, dtype=np.int8)
+        sf = np.array([1 + game % 3 for game in range(100)], dtype=np.int64)
+        points, changed = clearBatch(arr, sf)
+
+        problem = None
+        for game in range(100):
+            asyncAnim = []
+            sf1, changed1 = clearMatches(boards[game], Journal(), 1 + game % 3, [], asyncAnim)
+            if arr[game].tolist() != boards[game] or sf[game] != sf1 or changed[game] != changed1 or \
+                    points[game] != sum(anim[4] for anim in asyncAnim):
+                problem = game
+                break
+
+        if problem is not None:
+            print("\nFAILED: clearBatch differed from clearMatches on game", problem)
+            print("The board from clearMatches was:")
+            pprint(boards[problem])
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the BatchEnv class
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_BatchEnv():
+    print("Testing BatchEnv...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 6), (6, 7, 4), (9, 9, 6), (10, 8, 5)]:
+        print("  Attempting to play 40 games of 20 turns against playOne(): %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        seed(rows * cols + syms)
+        env = BatchEnv(rows, cols, syms, 15, 6000)
+        seeds = list(range(40))
+        env.reset(seeds)
+        boards = env.boards.tolist()
+        states = [int(s) for s in env.states]
+        scores = [0] * len(seeds)
+        turns = [15] * len(seeds)
+
+        problem = None
+        for step in range(20):
+            # Mostly allowed moves, with a few that are not
+            legal = env.legalMoves()
+            if any(env.swaps[legal[i]].tolist() != [list(m) for m in legalMoves(boards[i])]
+                   for i in range(len(seeds))):
+                problem = ("legalMoves() differed", step)
+                break
+            moves = []
+            for i in range(len(seeds)):
+                choices = np.nonzero(legal[i])[0]
+                if len(choices) == 0 or randrange(10) == 0:
+                    moves.append(env.swaps[randrange(len(env.swaps))].tolist())
+                else:
+                    moves.append(env.swaps[choices[randrange(len(choices))]].tolist())
+            arr, rewards, turns_left, done = env.step(moves)
+
+            for i in range(len(seeds)):
+                if turns[i] > 0 and scores[i] < 6000:
+                    points, states[i] = playOne(boards[i], states[i], moves[i][0], moves[i][1],
+                                                moves[i][2], moves[i][3], syms)
+                    if points >= 0:
+                        turns[i] -= 1
+                        scores[i] += points
+                else:
+                    points = -1
+                if arr[i].tolist() != boards[i] or rewards[i] != max(points, 0) or turns_left[i] != turns[i] or \
+                        done[i] != (turns[i] == 0 or scores[i] >= 6000):
+                    problem = ("game %d played differently" % i, step)
+                    break
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on step", problem[1])
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # A line of BURSTs stays on the board, and swaps through it are allowed
+    for (rows, cols, syms) in [(8, 8, 6), (9, 9, 6)]:
+        print("  Attempting to find the legal moves of 40 boards with BURSTs: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        seed(rows * cols)
+        env = BatchEnv(rows, cols, syms)
+        env.reset(list(range(40)))
+        for i in range(40):
+            r = randrange(rows)
+            c = randrange(cols - 2)
+            env.boards[i, r, c:c + 3] = BURST
+            for j in range(3):
+                env.boards[i, randrange(rows), randrange(cols)] = BURST
+        boards = env.boards.tolist()
+        legal = env.legalMoves()
+        b = np.repeat(np.arange(40), len(env.swaps))
+        s = np.tile(env.swaps, (40, 1))
+        v1 = env.boards[b, s[:, 0], s[:, 1]]
+        v2 = env.boards[b, s[:, 2], s[:, 3]]
+        played = ((v1 == BURST) != (v2 == BURST)) | env.makesLine(b, s[:, 0], s[:, 1], s[:, 2], s[:, 3])
+        problem = None
+        for i in range(40):
+            expected = [list(m) for m in legalMoves(boards[i])]
+            if env.swaps[legal[i]].tolist() != expected:
+                problem = "legalMoves() differed on board %d" % i
+            elif s[b == i][played[b == i]].tolist() != expected:
+                problem = "step() would allow different moves on board %d" % i
+            if problem is not None:
+                break
+        if problem is None:
+            print("Success.")
+            passed += 1
+        else:
+            print("\nFAILED:", problem)
+            pprint(boards[i])
+            print()
+            failed += 1
+
+    # The same seed always gives the same game, whatever else is in the batch
+    print("  Attempting to play the same seed in two batches... ", end="")
+    env1 = BatchEnv()
+    env2 = BatchEnv()
+    env1.reset([7, 8, 9])
+    env2.reset([1, 7])
+    if env1.boards[0].tolist() == env2.boards[1].tolist():
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: seed 7 gave two different boards")
+        failed += 1
+
+    # Thousands of 8 by 8 games a step
+    print("  Attempting more than 100000 moves a second on 8 by 8 boards... ", end="")
+    env = BatchEnv(8, 8, 6, 1000)
+    env.reset(list(range(8192)))
+    elapsed = 0.0
+    moves_played = 0
+    for step in range(10):
+        legal = env.legalMoves()
+        pick = np.argmax(legal * np.random.RandomState(step).rand(*legal.shape), axis=1)
+        moves = env.swaps[pick]
+        start = time()
+        arr, rewards, turns_left, done = env.step(moves)
+        elapsed += time() - start
+        moves_played += int(legal.any(axis=1).sum())
+    if moves_played / elapsed > 100000:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: only %d moves a second" % (moves_played / elapsed))
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_clearBatch()
+    test_BatchEnv()
@@ -0,0 +1,478 @@
+###############################################################################
+#  File: crush_bitboard.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               A bitboard version of the board rules.  The board is kept as
+#               one Python integer per symbol, with one bit per cell, so lines,
+#               T/L shapes and "does this swap make a line" become a handful
+#               of shifts and ANDs over the whole board.  hint(), collapse()
+#               and canSwap() built on it give the same answers as the ones in
+#               crush_engine.py and can be used in their place.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from random import seed
+import crush_engine
+
+# Number of always-empty bits left after each row so that shifting a pattern
+# sideways by up to 4 columns never wraps onto the next row
+GUARD = 4
+
+
+class BitBoard:
+    """
+    Class Name: BitBoard
+    Description: Holds a snapshot of a game board as one bitmask per symbol.  Bit
+    r * stride + c is set in masks[v] when the piece at row r, column c is v.
+    EMPTY and BURST get masks of their own, because canSwap() treats three of
+    them in a row as a line just like any other piece.
+    """
+
+    def __init__(self, board):
+        """
+        Method Name: __init__()
+        Description: Builds the bitmasks for a game board
+        :param board: the list of lists game board
+        """
+        self.rows = len(board)
+        self.cols = len(board[0])
+        self.stride = self.cols + GUARD
+        self.masks = {}
+        for r in range(self.rows):
+            for c in range(self.cols):
+                v = board[r][c]
+                self.masks[v] = self.masks.get(v, 0) | 1 << (r * self.stride + c)
+
+        # Every bit that is a real cell on the board
+        row = (1 << self.cols) - 1
+        self.full = 0
+        for r in range(self.rows):
+            self.full |= row << (r * self.stride)
+
+        # Cells that have a neighbour to the right / below
+        self.hasRight = self.full & (self.full >> 1)
+        self.hasBelow = self.full & (self.full >> self.stride)
+
+        # The results of legalSwaps(), worked out the first time swapTest() needs them
+        self.legal = None
+
+    def bit(self, r, c):
+        """
+        Method Name: bit()
+        Description: The bit for a cell
+        :param r: the row of the cell
+        :param c: the column of the cell
+        :return: an integer with only that cell's bit set
+        """
+        return 1 << (r * self.stride + c)
+
+    def shift(self, m, dr, dc):
+        """
+        Method Name: shift()
+        Description: Moves every bit of a mask so that bit p of the result is set
+        when the cell (dr, dc) away from p is set in m
+        :param m: the mask to shift
+        :param dr: the row offset
+        :param dc: the column offset
+        :return: the shifted mask
+        """
+        d = dr * self.stride + dc
+        if d >= 0:
+            return m >> d
+        return m << -d
+
+    def patternStarts(self, m, cells):
+        """
+        Method Name: patternStarts()
+        Description: Finds every cell where a pattern of set bits starts
+        :param m: the mask for a single symbol
+        :param cells: the (row, column) offsets of the pattern from its starting cell
+        :return: a mask with a bit set at every cell where the pattern starts
+        """
+        starts = m
+        for dr, dc in cells[1:]:
+            starts &= self.shift(m, dr, dc)
+        return starts & self.full
+
+    def matchStarts(self, cells):
+        """
+        Method Name: matchStarts()
+        Description: Finds every cell where collapse() would see a pattern start.
+        EMPTY and BURST never start a pattern.
+        :param cells: the (row, column) offsets of the pattern from its starting cell
+        :return: a mask with a bit set at every cell where the pattern starts
+        """
+        starts = 0
+        for v, m in self.masks.items():
+            if v != EMPTY and v != BURST:
+                starts |= self.patternStarts(m, cells)
+        return starts
+
+    def hasMatch(self):
+        """
+        Method Name: hasMatch()
+        Description: Reports whether collapse() would find anything to clear
+        :return: True if there is a line of 3 or more anywhere on the board
+        """
+        return self.matchStarts(H3[1]) != 0 or self.matchStarts(V3[1]) != 0
+
+    def lineCells(self, m):
+        """
+        Method Name: lineCells()
+        Description: Finds every cell that is part of a horizontal or vertical line of three
+        :param m: the mask for a single symbol
+        :return: a mask of all cells covered by a line
+        """
+        s = self.stride
+        h = m & (m >> 1) & (m >> 2)
+        v = m & (m >> s) & (m >> 2 * s)
+        return (h | (h << 1) | (h << 2) | v | (v << s) | (v << 2 * s)) & self.full
+
+    def hLineAt(self, r, c):
+        """
+        Method Name: hLineAt()
+        Description: The bitboard version of hLineAt()
+        :param r: the row of the piece being examined
+        :param c: the column of the piece being examined
+        :return: True if the piece is part of a horizontal line of three
+        """
+        p = self.bit(r, c)
+        for m in self.masks.values():
+            if m & p:
+                h = m & (m >> 1) & (m >> 2)
+                return (h | (h << 1) | (h << 2)) & p != 0
+        return False
+
+    def vLineAt(self, r, c):
+        """
+        Method Name: vLineAt()
+        Description: The bitboard version of vLineAt()
+        :param r: the row of the piece being examined
+        :param c: the column of the piece being examined
+        :return: True if the piece is part of a vertical line of three
+        """
+        s = self.stride
+        p = self.bit(r, c)
+        for m in self.masks.values():
+            if m & p:
+                v = m & (m >> s) & (m >> 2 * s)
+                return (v | (v << s) | (v << 2 * s)) & p != 0
+        return False
+
+    def canSwap(self, r1, c1, r2, c2):
+        """
+        Method Name: canSwap()
+        Description: The bitboard version of canSwap().  Only the masks of the two
+        symbols being swapped change, so only those are checked.
+        :param r1: the row of the first piece
+        :param c1: the column of the first piece
+        :param r2: the row of the second piece
+        :param c2: the column of the second piece
+        :return: True if the proposed swap creates a line. False otherwise
+        """
+        p1 = self.bit(r1, c1)
+        p2 = self.bit(r2, c2)
+        a = None
+        b = None
+        for v, m in self.masks.items():
+            if m & p1:
+                a = v
+            if m & p2:
+                b = v
+
+        if a == b:
+            return self.lineCells(self.masks[a]) & (p1 | p2) != 0
+
+        # After the swap, a sits at p2 and b sits at p1
+        ma = self.masks[a] ^ p1 ^ p2
+        mb = self.masks[b] ^ p1 ^ p2
+        return self.lineCells(ma) & p2 != 0 or self.lineCells(mb) & p1 != 0
+
+    def legalSwaps(self):
+        """
+        Method Name: legalSwaps()
+        Description: Checks every possible swap on the board at once
+        :return: two masks.  A bit in the first is set when the piece there can be
+                 swapped with the piece to its right, and a bit in the second is set
+                 when it can be swapped with the piece below it.
+        """
+        s = self.stride
+        right = 0
+        left = 0
+        below = 0
+        above = 0
+        same_h = 0
+        same_v = 0
+        in_line = 0
+        for m in self.masks.values():
+            # Lines a piece arriving at a cell could join, without using the cell
+            # it came from
+            up2 = (m << s) & (m << 2 * s)
+            down2 = (m >> s) & (m >> 2 * s)
+            up_down = (m << s) & (m >> s)
+            left2 = (m << 1) & (m << 2)
+            right2 = (m >> 1) & (m >> 2)
+            left_right = (m << 1) & (m >> 1)
+
+            # A piece of this symbol arriving from the right, left, below or above
+            right |= (m >> 1) & ~m & (left2 | up2 | down2 | up_down)
+            left |= (m << 1) & ~m & (right2 | up2 | down2 | up_down)
+            below |= (m >> s) & ~m & (up2 | left2 | right2 | left_right)
+            above |= (m << s) & ~m & (down2 | left2 | right2 | left_right)
+
+            # Swapping two pieces that match changes nothing, so those swaps are
+            # only allowed if one of the pieces is already in a line
+            same_h |= m & (m >> 1)
+            same_v |= m & (m >> s)
+            in_line |= self.lineCells(m)
+
+        hmask = right | (left >> 1) | (same_h & (in_line | (in_line >> 1)))
+        vmask = below | (above >> s) | (same_v & (in_line | (in_line >> s)))
+        return hmask & self.hasRight, vmask & self.hasBelow
+
+    def swaps(self):
+        """
+        Method Name: swaps()
+        Description: Lists every swap that makes a line
+        :return: a list of (r1, c1, r2, c2) tuples
+        """
+        hmask, vmask = self.legalSwaps()
+        moves = []
+        for r, c in self.cells(hmask):
+            moves.append((r, c, r, c + 1))
+        for r, c in self.cells(vmask):
+            moves.append((r, c, r + 1, c))
+        return moves
+
+    def legalMoves(self):
+        """
+        Method Name: legalMoves()
+        Description: The bitboard version of legalMoves().  The swaps that make a
+        line come from legalSwaps(), and a BURST can be swapped with any other
+        piece.
+        :return: a list of (r1, c1, r2, c2) swaps in the order legalMoves() lists them
+        """
+        hmask, vmask = self.legalSwaps()
+        s = self.stride
+        bursts = self.masks.get(BURST, 0)
+        others = self.full & ~bursts
+        hmask |= (bursts & (others >> 1) | others & (bursts >> 1)) & self.hasRight
+        vmask |= (bursts & (others >> s) | others & (bursts >> s)) & self.hasBelow
+        moves = []
+        for r, c in self.cells(hmask | vmask):
+            p = self.bit(r, c)
+            if hmask & p:
+                moves.append((r, c, r, c + 1))
+            if vmask & p:
+                moves.append((r, c, r + 1, c))
+        return moves
+
+    def cells(self, m):
+        """
+        Method Name: cells()
+        Description: Lists the cells of a mask from top left to bottom right
+        :param m: the mask
+        :return: a list of (row, column) tuples
+        """
+        found = []
+        while m:
+            low = m & -m
+            p = low.bit_length() - 1
+            found.append((p // self.stride, p % self.stride))
+            m ^= low
+        return found
+
+    def swapTest(self, board, r1, c1, r2, c2):
+        """
+        Method Name: swapTest()
+        Description: Looks a swap up in legalSwaps() so that the bitboard can stand
+        in for canSwap() when calling hint().  The board is not used, it is only
+        there so that the arguments match canSwap().
+        :return: True if the proposed swap creates a line. False otherwise
+        """
+        if self.legal is None:
+            self.legal = self.legalSwaps()
+        if r1 > r2 or c1 > c2:
+            r1, c1, r2, c2 = r2, c2, r1, c1
+        if r1 == r2:
+            return self.legal[0] & self.bit(r1, c1) != 0
+        return self.legal[1] & self.bit(r1, c1) != 0
+
+
+def canSwap(board, r1, c1, r2, c2):
+    """
+    Method Name: canSwap()
+    Description: Drop in replacement for canSwap() that never changes the board.
+    Building the bitboard costs one pass over the board, so keep a BitBoard
+    around instead when checking many swaps on the same board.
+    :return: True if the proposed swap creates a line. False otherwise
+    """
+    return BitBoard(board).canSwap(r1, c1, r2, c2)
+
+
+def hint(board):
+    """
+    Method Name: hint()
+    Description: Drop in replacement for hint() that checks every swap on the
+    board with one call to legalSwaps() instead of one canSwap() per swap
+    :param board: The game board to be checked
+    :return: the same four values hint() returns
+    """
+    return crush_engine.hint(board, BitBoard(board).swapTest)
+
+
+def collapse(board, syncAnim, asyncAnim, sf, num_syms, rng=None, clock=None):
+    """
+    Method Name: collapse()
+    Description: Drop in replacement for collapse().  The candidates for each group
+    of patterns are found with the bitboard and then rechecked in the order that
+    collapse() uses, which gives exactly the same board, animations and score.
+    :param board: the list of lists game board
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param sf: the score factor
+    :param num_syms: the number of different pieces in play
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :param clock: the Clock the animations are timed by, GLOBAL_CLOCK if left out
+    :return: 1 if nothing was cleared, otherwise the new score factor
+    """
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    if clock is None:
+        clock = GLOBAL_CLOCK
+
+    # Use up the random numbers the same way collapse() does
+    l1 = list(range(50))
+    l2 = list(range(50))
+    l3 = list(range(50))
+    l4 = list(range(50))
+    l5 = list(range(50))
+    rng.cosmetic.shuffle(l1)
+    rng.cosmetic.shuffle(l2)
+    rng.cosmetic.shuffle(l3)
+    rng.cosmetic.shuffle(l4)
+    rng.cosmetic.shuffle(l5)
+
+    journal = Journal()
+    changed = False
+
+    bb = BitBoard(board)
+    if bb.hasMatch():
+        for direction, patterns in PATTERN_GROUPS:
+            if changed:
+                bb = BitBoard(board)
+            masks = [bb.matchStarts(cells) for name, cells, burst, at, points in patterns]
+            hits = 0
+            for m in masks:
+                hits |= m
+            hits = bb.cells(hits)
+            if direction == -1:
+                hits.sort(key=lambda rc: (-rc[0], rc[1]))
+
+            for r, c in hits:
+                for i in range(len(patterns)):
+                    if not masks[i] & bb.bit(r, c) or not patternAt(board, r, c, patterns[i][1]):
+                        continue
+                    sf = clearPattern(board, journal, r, c, patterns[i], sf, syncAnim, asyncAnim, clock)
+                    changed = True
+
+    # Destroy everything that has been changed to empty
+    num_destroyed = 0
+    if changed:
+        for c in range(len(board[0])):
+            for r in range(len(board)):
+                if board[r][c] == EMPTY:
+                    syncAnim.append(("destroy", r, c, journal.before(board, r, c), l1, clock.now(), clock.now() + 1))
+                    num_destroyed += 1
+
+    if num_destroyed > 0:
+        time_delay = 1
+    else:
+        time_delay = 0
+
+    genFalls(board, time_delay, syncAnim, num_syms, None, None, rng, clock)
+
+    if changed == False:
+        return 1
+    else:
+        return sf
+
+
+#
+# Run a series of tests comparing the bitboard rules with crush_engine
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_bitboard():
+    print("Testing the bitboard rules...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3), (12, 15, 3)]:
+        print("  Attempting to compare 50 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(50):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            if game % 5 == 0:
+                board[rows // 2][cols // 2] = BURST
+            if game % 7 == 0:
+                board[0][0] = EMPTY
+            bb = BitBoard(board)
+
+            # Every single swap and line check
+            for r in range(rows):
+                for c in range(cols):
+                    if bb.hLineAt(r, c) != hLineAt(board, r, c) or bb.vLineAt(r, c) != vLineAt(board, r, c):
+                        problem = "line check at %d, %d" % (r, c)
+                    for (r2, c2) in [(r, c + 1), (r + 1, c)]:
+                        if r2 < rows and c2 < cols and \
+                                (bb.canSwap(r, c, r2, c2) != crush_engine.canSwap(board, r, c, r2, c2) or
+                                 bb.swapTest(board, r2, c2, r, c) != crush_engine.canSwap(board, r, c, r2, c2)):
+                            problem = "swap of %d, %d with %d, %d" % (r, c, r2, c2)
+            if problem is None and hint(board) != crush_engine.hint(board):
+                problem = "hint"
+            if problem is None and bb.legalMoves() != legalMoves(board):
+                problem = "legal moves"
+
+            # A whole cascade, using the same random numbers and clock for both
+            other = [row[:] for row in board]
+            for step in range(4):
+                sync1, async1, sync2, async2 = [], [], [], []
+                clock = ManualClock(float(step))
+                seed(1000 * game + step)
+                sf1 = crush_engine.collapse(board, sync1, async1, step + 1, syms, clock=clock)
+                seed(1000 * game + step)
+                sf2 = collapse(other, sync2, async2, step + 1, syms, clock=clock)
+                if sf1 != sf2 or board != other or \
+                        sync1 != sync2 or async1 != async2:
+                    problem = "collapse step %d" % step
+                    break
+                applyAnims(board, sync1, async1)
+                applyAnims(other, sync2, async2)
+
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED: the bitboard differed on game", game, "in the", problem)
+            print("The board was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_bitboard()
@@ -0,0 +1,304 @@
+###############################################################################
+#  File: crush_board.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               A compact game board for simulations that keep many boards
+#               around.  The pieces are stored one byte each in a single flat
+#               array instead of a list of row lists, so a board takes a
+#               fraction of the memory and is copied with one buffer copy.
+#               board[r][c] still reads and writes a piece, so the functions
+#               in crush_engine.py work on it unchanged.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from array import array
+from random import seed
+import sys
+
+
+class BoardRow:
+    """
+    Class Name: BoardRow
+    Description: A view of one row of a Board.  Reading or writing board[r][c] goes
+    through one of these, straight to the Board's storage.
+    """
+    __slots__ = ("cells", "start", "cols")
+
+    def __init__(self, cells, start, cols):
+        """
+        Method Name: __init__()
+        Description: Makes a view of one row
+        :param cells: the Board's flat array of pieces
+        :param start: the position of the row's first piece in the array
+        :param cols: the number of columns in the row
+        """
+        self.cells = cells
+        self.start = start
+        self.cols = cols
+
+    def __len__(self):
+        return self.cols
+
+    def __getitem__(self, c):
+        if isinstance(c, slice):
+            return self.cells[self.start:self.start + self.cols].tolist()[c]
+        if c < 0:
+            c += self.cols
+        if c < 0 or c >= self.cols:
+            raise IndexError("board column out of range")
+        return self.cells[self.start + c]
+
+    def __setitem__(self, c, v):
+        if c < 0:
+            c += self.cols
+        if c < 0 or c >= self.cols:
+            raise IndexError("board column out of range")
+        self.cells[self.start + c] = v
+
+    def __iter__(self):
+        return iter(self.cells[self.start:self.start + self.cols])
+
+    def __eq__(self, other):
+        return self.tolist() == list(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+    def count(self, v):
+        """
+        Method Name: count()
+        Description: Counts the pieces in the row that are v
+        :param v: the piece to count
+        :return: the number of times v appears in the row
+        """
+        return self.tolist().count(v)
+
+    def tolist(self):
+        """
+        Method Name: tolist()
+        Description: Copies the row into a list
+        :return: the pieces in the row, left to right
+        """
+        return self.cells[self.start:self.start + self.cols].tolist()
+
+
+class Board:
+    """
+    Class Name: Board
+    Description: A game board stored as a flat array of signed bytes, row after row.
+    The piece at row r, column c is cells[r * cols + c].
+    """
+    __slots__ = ("rows", "cols", "cells")
+
+    def __init__(self, rows, cols, cells=None):
+        """
+        Method Name: __init__()
+        Description: Makes a board
+        :param rows: the number of rows
+        :param cols: the number of columns
+        :param cells: the array of pieces to use.  The board is filled with EMPTY
+                      if it is left out.
+        """
+        self.rows = rows
+        self.cols = cols
+        if cells is None:
+            cells = array("b", [EMPTY]) * (rows * cols)
+        self.cells = cells
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, r):
+        if r < 0:
+            r += self.rows
+        if r < 0 or r >= self.rows:
+            raise IndexError("board row out of range")
+        return BoardRow(self.cells, r * self.cols, self.cols)
+
+    def __setitem__(self, r, pieces):
+        if r < 0:
+            r += self.rows
+        if r < 0 or r >= self.rows or len(pieces) != self.cols:
+            raise IndexError("board row out of range")
+        self.cells[r * self.cols:(r + 1) * self.cols] = array("b", pieces)
+
+    def __iter__(self):
+        for r in range(self.rows):
+            yield BoardRow(self.cells, r * self.cols, self.cols)
+
+    def __eq__(self, other):
+        if isinstance(other, Board):
+            return self.rows == other.rows and self.cols == other.cols and self.cells == other.cells
+        return self.toList() == [list(row) for row in other]
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.toList())
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def copy(self):
+        """
+        Method Name: copy()
+        Description: Copies the board with a single copy of its storage
+        :return: a new Board holding the same pieces
+        """
+        return Board(self.rows, self.cols, array("b", self.cells))
+
+    def get(self, r, c):
+        """
+        Method Name: get()
+        Description: Reads a piece without making a row view first
+        :param r: the row of the piece
+        :param c: the column of the piece
+        :return: the piece
+        """
+        return self.cells[r * self.cols + c]
+
+    def set(self, r, c, v):
+        """
+        Method Name: set()
+        Description: Writes a piece without making a row view first
+        :param r: the row of the piece
+        :param c: the column of the piece
+        :param v: the new piece
+        :return: none
+        """
+        self.cells[r * self.cols + c] = v
+
+    def row(self, r):
+        """
+        Method Name: row()
+        Description: Copies one row of the board
+        :param r: the row
+        :return: a list of the pieces in the row, left to right
+        """
+        return self.cells[r * self.cols:(r + 1) * self.cols].tolist()
+
+    def column(self, c):
+        """
+        Method Name: column()
+        Description: Copies one column of the board
+        :param c: the column
+        :return: a list of the pieces in the column, top to bottom
+        """
+        return self.cells[c::self.cols].tolist()
+
+    def toList(self):
+        """
+        Method Name: toList()
+        Description: Copies the board into a list of lists
+        :return: the list of lists game board
+        """
+        return [self.row(r) for r in range(self.rows)]
+
+
+def toBoard(board):
+    """
+    Method Name: toBoard()
+    Description: Copies a list of lists game board into a Board
+    :param board: the list of lists game board
+    :return: a Board holding the same pieces
+    """
+    cells = array("b")
+    for row in board:
+        cells.extend(row)
+    return Board(len(board), len(board[0]), cells)
+
+
+#
+# Run a series of tests on the Board class
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_Board():
+    print("Testing Board...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (12, 15, 3)]:
+        print("  Attempting to play 10 games on a Board: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(10):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            compact = toBoard(board)
+            if compact != board or compact.toList() != board or compact[rows - 1][-1] != board[-1][-1] or \
+                    compact.column(1) != [row[1] for row in board]:
+                problem = ("the Board did not hold the same pieces", game)
+                break
+
+            # A copy must not share its pieces with the original
+            other = deepcopy(compact)
+            other[0][0] = BURST
+            if compact[0][0] == BURST or type(other) != Board:
+                problem = ("a copy changed the original", game)
+                break
+
+            # Play the same game on both boards
+            seed(game)
+            settle(board, syms)
+            seed(game)
+            settle(compact, syms)
+            for step in range(10):
+                if hint(board) != hint(compact):
+                    problem = ("hint() gave a different answer", game)
+                    break
+                r1, c1, r2, c2 = hint(board)
+                if r1 == -1 or c2 < 0:
+                    break
+                seed(100 * game + step)
+                points1 = playMove(board, r1, c1, r2, c2, syms)
+                seed(100 * game + step)
+                points2 = playMove(compact, r1, c1, r2, c2, syms)
+                if points1 != points2 or compact != board:
+                    problem = ("playMove() gave a different result", game)
+                    break
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on game", problem[1])
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # The compact board should take much less memory than the list of lists
+    print("  Attempting to measure the size of a 12 by 15 board... ", end="")
+    board = createBoard(12, 15, 6)
+    list_size = sys.getsizeof(board) + sum(sys.getsizeof(row) for row in board)
+    compact = toBoard(board)
+    compact_size = sys.getsizeof(compact) + sys.getsizeof(compact.cells)
+    if compact_size * 5 < list_size:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the Board took", compact_size, "bytes and the list took", list_size)
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_Board()
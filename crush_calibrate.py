@@ -0,0 +1,584 @@
+###############################################################################
+#  File: crush_calibrate.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               Measures how hard the difficulty presets of main() really are.
+#               Each preset is played without a window by a policy (random
+#               moves, hint() or the solver) for as many seeds as asked for,
+#               spread over a pool of processes.  No game is stored: every
+#               game adds its score after each turn to a histogram for that
+#               turn, and the histograms of different processes are merged.
+#               The score only goes up, so a game with a target score and a
+#               turn limit is won exactly when its score after the last turn
+#               reaches the target.  That makes the win rate, the score
+#               quantiles and the turns used for any target and turn limit
+#               readable from the same histograms, and lets the targets and
+#               turn limits that give a chosen win rate be searched for
+#               without playing any more games.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from crush_solver import solve
+from crush_zobrist import splitmix64, MASK64
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from random import Random, getstate
+from time import time
+import math
+import os
+
+
+def randomPolicy(board, num_syms, turns_left, rng):
+    """
+    Method Name: randomPolicy()
+    Description: Picks one of the legal moves at random
+    :param board: the game board
+    :param num_syms: the number of different pieces in play
+    :param turns_left: the number of turns left in the game
+    :param rng: the random.Random the policy draws from, so it does not use the
+                game's random numbers
+    :return: the (r1, c1, r2, c2) move, or None if there are no moves
+    """
+    moves = legalMoves(board)
+    if len(moves) == 0:
+        return None
+    return moves[rng.randrange(len(moves))]
+
+
+def hintPolicy(board, num_syms, turns_left, rng):
+    """
+    Method Name: hintPolicy()
+    Description: Plays the move hint() suggests, the way a player pressing H would
+    :param board: the game board
+    :param num_syms: the number of different pieces in play
+    :param turns_left: the number of turns left in the game
+    :param rng: not used
+    :return: the (r1, c1, r2, c2) move, or None if there are no moves
+    """
+    move = hint(board)
+    if move[0] == -1:
+        return None
+    return move
+
+
+def solverPolicy(board, num_syms, turns_left, rng):
+    """
+    Method Name: solverPolicy()
+    Description: Plays the move with the best expected score, counting the
+    refill that follows it.  The search is one move deep and has no time budget
+    to run out of, so the same board always gets the same move.
+    :param board: the game board
+    :param num_syms: the number of different pieces in play
+    :param turns_left: the number of turns left in the game
+    :param rng: not used
+    :return: the (r1, c1, r2, c2) move, or None if there are no moves
+    """
+    move = solve(board, num_syms, turns_left, 3600, 1, 6, 1, 1, 0, True)["move"]
+    if move[0] == -1:
+        return None
+    return move
+
+
+# The policies the presets can be played with, by name so that they can be
+# handed to other processes
+POLICIES = {
+    "random": randomPolicy,
+    "hint": hintPolicy,
+    "solver": solverPolicy,
+}
+
+
+def registerPolicy(name, policy):
+    """
+    Method Name: registerPolicy()
+    Description: Adds a policy to POLICIES so that it can be played by name.  A
+    policy that is played in a pool of processes should be registered when its
+    module is imported, so that every process has it.
+    :param name: the name to play the policy by
+    :param policy: a function called like randomPolicy() that returns a move or
+                   None
+    :return: none
+    """
+    if name in POLICIES and POLICIES[name] is not policy:
+        raise ValueError("there is already a policy called %s" % name)
+    POLICIES[name] = policy
+
+
+def playGame(rows, cols, num_syms, turns, policy, game_seed, timings=None):
+    """
+    Method Name: playGame()
+    Description: Plays one game without a window.  The board is created and
+    settled the way play() does it, and the points scored while it first settles
+    count, as they do in play().  A game with no moves left keeps its score for
+    the turns that remain.  The board and refills come from a GameRandom seeded
+    with the game's seed, so the random module is not used.
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param num_syms: the number of different pieces in play
+    :param turns: the number of turns to play
+    :param policy: the name of the policy in POLICIES that picks the moves
+    :param game_seed: the seed of the game
+    :param timings: an optional list that the number of seconds the policy took
+                    to pick each move is added to
+    :return: a list of the score after each turn, starting with the score before
+             the first move
+    """
+    pick = POLICIES[policy]
+    rng = Random(splitmix64(game_seed & MASK64))
+    game = GameRandom(game_seed, False)
+
+    board = createBoard(rows, cols, num_syms, game)
+    score = settle(board, num_syms, 1, None, None, game)
+    scores = [score]
+    stuck = False
+    for turn in range(turns):
+        if not stuck:
+            start = time()
+            move = pick(board, num_syms, turns - turn, rng)
+            if timings is not None:
+                timings.append(time() - start)
+            if move is None:
+                stuck = True
+            else:
+                score += playMove(board, move[0], move[1], move[2], move[3], num_syms, None, game)
+        scores.append(score)
+    return scores
+
+
+class CalibrationStats:
+    """
+    Class Name: CalibrationStats
+    Description: Statistics of many games, kept without storing the games.  For
+    every turn there is a histogram of the scores after that turn, in buckets of
+    a fixed width, and the mean and spread of the last score are kept exactly.
+    Two of them can be merged, so each process can count its own games.
+    """
+
+    def __init__(self, horizon, bucket=50):
+        """
+        Method Name: __init__()
+        Description: Starts with no games
+        :param horizon: the number of turns every game is played for
+        :param bucket: the width of the score buckets.  Every score the game can
+                       make is a multiple of 10, so win rates are exact for targets
+                       that are a multiple of the width.
+        """
+        self.horizon = horizon
+        self.bucket = bucket
+        self.games = 0
+        self.histograms = [{} for turn in range(horizon + 1)]
+        self.total = 0
+        self.total_sq = 0
+
+    def add(self, scores):
+        """
+        Method Name: add()
+        Description: Counts one game
+        :param scores: the score after each turn, as playGame() returns it
+        :return: none
+        """
+        for turn in range(self.horizon + 1):
+            b = scores[turn] // self.bucket
+            histogram = self.histograms[turn]
+            histogram[b] = histogram.get(b, 0) + 1
+        self.games += 1
+        self.total += scores[self.horizon]
+        self.total_sq += scores[self.horizon] * scores[self.horizon]
+
+    def merge(self, other):
+        """
+        Method Name: merge()
+        Description: Adds the games counted by another CalibrationStats to these
+        :param other: a CalibrationStats with the same horizon and bucket width
+        :return: none
+        """
+        if other.horizon != self.horizon or other.bucket != self.bucket:
+            raise ValueError("only statistics with the same horizon and bucket width can be merged")
+        for mine, theirs in zip(self.histograms, other.histograms):
+            for b, count in theirs.items():
+                mine[b] = mine.get(b, 0) + count
+        self.games += other.games
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    def winRate(self, target_score, max_turns):
+        """
+        Method Name: winRate()
+        Description: The share of games that reach a target score within a number
+        of turns
+        :param target_score: the score to reach
+        :param max_turns: the number of turns, at most the horizon
+        :return: the win rate, from 0 to 1
+        """
+        if self.games == 0:
+            return 0.0
+        first = -(-target_score // self.bucket)
+        wins = sum(count for b, count in self.histograms[max_turns].items() if b >= first)
+        return wins / self.games
+
+    def winError(self, target_score, max_turns):
+        """
+        Method Name: winError()
+        Description: The standard error of winRate(), which shrinks with the square
+        root of the number of games
+        :param target_score: the score to reach
+        :param max_turns: the number of turns, at most the horizon
+        :return: the standard error
+        """
+        if self.games == 0:
+            return 1.0
+        p = self.winRate(target_score, max_turns)
+        return math.sqrt(p * (1 - p) / self.games)
+
+    def quantile(self, q, turns=None):
+        """
+        Method Name: quantile()
+        Description: A quantile of the scores after a number of turns, to the width
+        of a bucket
+        :param q: the quantile, from 0 to 1.  0.5 is the median.
+        :param turns: the number of turns, or None for the horizon
+        :return: the bottom of the bucket the quantile falls in
+        """
+        if turns is None:
+            turns = self.horizon
+        if self.games == 0:
+            return 0
+        rank = max(1, math.ceil(q * self.games))
+        seen = 0
+        for b in sorted(self.histograms[turns]):
+            seen += self.histograms[turns][b]
+            if seen >= rank:
+                return b * self.bucket
+        return max(self.histograms[turns]) * self.bucket
+
+    def turnsUsed(self, target_score, max_turns):
+        """
+        Method Name: turnsUsed()
+        Description: How many turns the games that are won take to win.  The score
+        never goes down, so the share of games won by turn t is winRate() for t
+        turns.
+        :param target_score: the score to reach
+        :param max_turns: the number of turns, at most the horizon
+        :return: a list of the number of games won on each turn, starting with the
+                 ones won before the first move
+        """
+        won = [round(self.winRate(target_score, turn) * self.games) for turn in range(max_turns + 1)]
+        return [won[0]] + [won[turn] - won[turn - 1] for turn in range(1, max_turns + 1)]
+
+    def meanScore(self):
+        """
+        Method Name: meanScore()
+        Description: The mean score after the horizon
+        :return: a tuple of the mean and the standard deviation
+        """
+        if self.games == 0:
+            return (0.0, 0.0)
+        mean = self.total / self.games
+        return (mean, math.sqrt(max(0.0, self.total_sq / self.games - mean * mean)))
+
+    def summary(self, target_score, max_turns):
+        """
+        Method Name: summary()
+        Description: The statistics of one target score and turn limit
+        :param target_score: the score to reach
+        :param max_turns: the number of turns, at most the horizon
+        :return: a dictionary of the "games", "win_rate" and its "win_error", the
+                 score "quantiles" after max_turns at 10%, 25%, 50%, 75% and 90%,
+                 and the mean turns the won games used, "turns_used"
+        """
+        used = self.turnsUsed(target_score, max_turns)
+        wins = sum(used)
+        mean_used = None
+        if wins > 0:
+            mean_used = sum(turn * count for turn, count in enumerate(used)) / wins
+        return {"games": self.games,
+                "win_rate": self.winRate(target_score, max_turns),
+                "win_error": self.winError(target_score, max_turns),
+                "quantiles": [self.quantile(q, max_turns) for q in [0.1, 0.25, 0.5, 0.75, 0.9]],
+                "turns_used": mean_used}
+
+
+def playSeeds(args):
+    """
+    Method Name: playSeeds()
+    Description: Plays a run of seeds and counts them.  Run by the process pool,
+    so it takes a single tuple of arguments.
+    :param args: a tuple of the rows, columns, num_syms, horizon, policy name,
+                 first seed, number of games and bucket width
+    :return: a CalibrationStats of the games
+    """
+    rows, cols, num_syms, horizon, policy, first, games, bucket = args
+    stats = CalibrationStats(horizon, bucket)
+    for game_seed in range(first, first + games):
+        stats.add(playGame(rows, cols, num_syms, horizon, policy, game_seed))
+    return stats
+
+
+def calibrate(preset, policy="hint", games=1000, first_seed=0, workers=1, horizon=None, bucket=50,
+              chunk=250, report=None):
+    """
+    Method Name: calibrate()
+    Description: Plays a preset for a run of seeds.  The seeds are handed out in
+    chunks to a pool of processes, and each chunk's statistics are merged in as it
+    finishes, so only a few chunks are ever held at once.  The answer does not
+    depend on the number of processes.
+    :param preset: a dictionary like the ones in PRESETS
+    :param policy: the name of the policy in POLICIES to play with
+    :param games: the number of games to play
+    :param first_seed: the seed of the first game.  Games use the seeds after it.
+    :param workers: the number of processes to play in.  None uses every core.
+    :param horizon: the number of turns to play each game for, at least the
+                    preset's.  Leave it out for twice the preset's turns, so
+                    searchTurns() has room to look.
+    :param bucket: the width of the score buckets
+    :param chunk: the number of games each process plays at a time
+    :param report: an optional function called with the CalibrationStats so far
+                   each time a chunk is merged in
+    :return: the CalibrationStats of all the games
+    """
+    if horizon is None:
+        horizon = 2 * preset["max_turns"]
+    if horizon < preset["max_turns"]:
+        raise ValueError("the horizon must be at least the preset's %d turns" % preset["max_turns"])
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    jobs = []
+    for first in range(first_seed, first_seed + games, chunk):
+        jobs.append((preset["rows"], preset["cols"], preset["syms"], horizon, policy, first,
+                     min(chunk, first_seed + games - first), bucket))
+
+    stats = CalibrationStats(horizon, bucket)
+    if workers <= 1:
+        for job in jobs:
+            stats.merge(playSeeds(job))
+            if report is not None:
+                report(stats)
+        return stats
+
+    with ProcessPoolExecutor(workers) as pool:
+        jobs.reverse()
+        running = set()
+        while len(jobs) > 0 or len(running) > 0:
+            while len(jobs) > 0 and len(running) < 2 * workers:
+                running.add(pool.submit(playSeeds, jobs.pop()))
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stats.merge(future.result())
+                if report is not None:
+                    report(stats)
+    return stats
+
+
+def searchTarget(stats, win_rate, max_turns):
+    """
+    Method Name: searchTarget()
+    Description: The highest target score that is still won at least as often as
+    asked for within a number of turns
+    :param stats: the CalibrationStats of the games
+    :param win_rate: the win rate wanted, from 0 to 1
+    :param max_turns: the number of turns, at most the horizon
+    :return: the target score, a multiple of the bucket width
+    """
+    histogram = stats.histograms[max_turns]
+    wins = 0
+    for b in sorted(histogram, reverse=True):
+        wins += histogram[b]
+        if wins >= win_rate * stats.games:
+            return b * stats.bucket
+    return 0
+
+
+def searchTurns(stats, win_rate, target_score):
+    """
+    Method Name: searchTurns()
+    Description: The fewest turns in which a target score is won at least as often
+    as asked for
+    :param stats: the CalibrationStats of the games
+    :param win_rate: the win rate wanted, from 0 to 1
+    :param target_score: the score to reach
+    :return: the number of turns, or None if not even the horizon is enough
+    """
+    for turns in range(stats.horizon + 1):
+        if stats.winRate(target_score, turns) >= win_rate:
+            return turns
+    return None
+
+
+def presetReport(preset, stats, win_rate=None):
+    """
+    Method Name: presetReport()
+    Description: Describes how hard a preset played out in a few lines of text
+    :param preset: a dictionary like the ones in PRESETS
+    :param stats: the CalibrationStats of the preset's games
+    :param win_rate: a win rate to suggest a target score and turn limit for, or
+                     None
+    :return: the text
+    """
+    result = stats.summary(preset["target_score"], preset["max_turns"])
+    lines = ["%s: %d games, won %.1f%% (+/- %.1f%%)" % (preset["name"], result["games"], 100 * result["win_rate"],
+                                                          100 * result["win_error"]),
+             "  score after %d turns: 10%% %d, 25%% %d, median %d, 75%% %d, 90%% %d" %
+             tuple([preset["max_turns"]] + result["quantiles"])]
+    if result["turns_used"] is not None:
+        lines.append("  games won took %.1f turns on average" % result["turns_used"])
+    if win_rate is not None:
+        turns = searchTurns(stats, win_rate, preset["target_score"])
+        if turns is None:
+            turns = "more than %d" % stats.horizon
+        lines.append("  for a %d%% win rate: target %d in %d turns, or %s turns for %d" %
+                     (round(100 * win_rate), searchTarget(stats, win_rate, preset["max_turns"]), preset["max_turns"],
+                      turns, preset["target_score"]))
+    return "\n".join(lines)
+
+
+#
+# Run a series of tests on the calibration statistics
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_CalibrationStats():
+    print("Testing CalibrationStats...")
+
+    passed = 0
+    failed = 0
+    rng = Random(5)
+    games = []
+    for game in range(500):
+        scores = [0]
+        for turn in range(20):
+            scores.append(scores[-1] + 10 * rng.randrange(0, 40))
+        games.append(scores)
+
+    whole = CalibrationStats(20)
+    first = CalibrationStats(20)
+    second = CalibrationStats(20)
+    for i, scores in enumerate(games):
+        whole.add(scores)
+        if i % 2 == 0:
+            first.add(scores)
+        else:
+            second.add(scores)
+    first.merge(second)
+
+    print("  Attempting to merge the statistics of two halves... ", end="")
+    if first.histograms == whole.histograms and first.games == whole.games and first.total == whole.total:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the merged statistics are not the same as the whole")
+        failed += 1
+
+    print("  Attempting win rates, quantiles and turns used... ", end="")
+    problem = None
+    for target, turns in [(1000, 5), (2000, 10), (3500, 15), (0, 0), (100000, 20)]:
+        wins = sum(1 for scores in games if scores[turns] >= target)
+        if whole.winRate(target, turns) != wins / len(games):
+            problem = "the win rate for %d in %d turns" % (target, turns)
+        first_turns = [min(t for t in range(turns + 1) if scores[t] >= target) for scores in games
+                       if scores[turns] >= target]
+        if whole.turnsUsed(target, turns) != [first_turns.count(t) for t in range(turns + 1)]:
+            problem = "the turns used for %d in %d turns" % (target, turns)
+    for q in [0.1, 0.5, 0.9]:
+        exact = sorted(scores[12] for scores in games)[math.ceil(q * len(games)) - 1]
+        if whole.quantile(q, 12) != exact // 50 * 50:
+            problem = "the %d%% quantile" % (100 * q)
+    mean = sum(scores[20] for scores in games) / len(games)
+    if abs(whole.meanScore()[0] - mean) > 1e-9:
+        problem = "the mean score"
+    if problem is None:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED:", problem)
+        failed += 1
+
+    print("  Attempting to search for targets and turn limits... ", end="")
+    problem = None
+    for rate in [0.1, 0.5, 0.9]:
+        target = searchTarget(whole, rate, 10)
+        if whole.winRate(target, 10) < rate or whole.winRate(target + 50, 10) >= rate:
+            problem = "the target for a %d%% win rate" % (100 * rate)
+        turns = searchTurns(whole, rate, 2000)
+        if whole.winRate(2000, turns) < rate or (turns > 0 and whole.winRate(2000, turns - 1) >= rate):
+            problem = "the turns for a %d%% win rate" % (100 * rate)
+    if searchTurns(whole, 0.5, 10 ** 6) is not None:
+        problem = "an impossible target was given turns"
+    if problem is None:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED:", problem)
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on playing the presets
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_calibrate():
+    print("Testing calibrate...")
+
+    passed = 0
+    failed = 0
+    for policy in ["random", "hint", "solver"]:
+        print("  Attempting to play the presets with the %s policy... " % policy, end="")
+        problem = None
+        for preset in PRESETS:
+            state = getstate()
+            games = [playGame(preset["rows"], preset["cols"], preset["syms"], preset["max_turns"], policy, s)
+                     for s in range(3)]
+            if getstate() != state:
+                problem = ("the random numbers were changed", preset["name"])
+                break
+            if games[0] != playGame(preset["rows"], preset["cols"], preset["syms"], preset["max_turns"], policy, 0):
+                problem = ("the same seed played a different game", preset["name"])
+                break
+            if any(len(scores) != preset["max_turns"] + 1 or scores != sorted(scores) for scores in games):
+                problem = ("the scores did not go up turn by turn", preset["name"])
+                break
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on", problem[1])
+            failed += 1
+        else:
+            print("Success.")
+            passed += 1
+
+    print("  Attempting the same statistics from one and two processes... ", end="")
+    preset = PRESETS[3]
+    one = calibrate(preset, "random", 24, 100, 1, None, 50, 5)
+    two = calibrate(preset, "random", 24, 100, 2, None, 50, 5)
+    direct = CalibrationStats(2 * preset["max_turns"])
+    for game_seed in range(100, 124):
+        direct.add(playGame(preset["rows"], preset["cols"], preset["syms"], 2 * preset["max_turns"], "random",
+                            game_seed))
+    if one.histograms == direct.histograms and two.histograms == direct.histograms and two.games == 24:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the statistics depend on how the games were shared out")
+        failed += 1
+
+    print("  Attempting a preset report... ", end="")
+    reports = []
+    stats = calibrate(preset, "random", 10, 0, 1, None, 50, 4, reports.append)
+    text = presetReport(preset, stats, 0.5)
+    if len(reports) == 3 and text.startswith("Brutal: 10 games") and "50% win rate" in text:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the report was", text)
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_CalibrationStats()
+    test_calibrate()
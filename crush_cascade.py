@@ -0,0 +1,627 @@
+###############################################################################
+#  File: crush_cascade.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               Exact scoring of the part of a move's cascade that does not
+#               depend on the random refill.  The move is played, the patterns
+#               are cleared under the same score factor rules as settle(), and
+#               the pieces left on the board fall down with the cells above
+#               them left EMPTY instead of being refilled.  This repeats for as
+#               long as the fallen pieces make new patterns, so every step of
+#               the chain that is certain to happen is counted.  The pieces
+#               that fall in from the top are left out, so the real cascade
+#               can differ: a refilled pattern found earlier in the scan can
+#               take some of these cells or change the score factor they are
+#               scored with.  The outcomes for every legal move on a board are
+#               worked out in one batch, well under a millisecond on an 8 by 8
+#               board, and cached, so ranking the moves again costs one lookup.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from crush_bitboard import BitBoard
+from crush_zobrist import QUIET_RANDOM, TranspositionCache, canonicalBoard, moveOutcome
+from random import getstate, randrange, seed
+from time import time
+
+# The tables made by flatShapes(), one for each board size
+FLAT_SHAPES = {}
+
+
+def dropPieces(board, journal, columns):
+    """
+    Method Name: dropPieces()
+    Description: Lets the pieces in some columns fall into the EMPTY cells below
+    them.  Nothing new falls in from the top, so the cells left at the top of
+    each column stay EMPTY.
+    :param board: the game board
+    :param journal: the Journal that records the changes
+    :param columns: the columns that may have EMPTY cells under a piece
+    :return: the set of (row, column) cells that could make a new pattern, the
+             same cells genFalls() marks as dirty
+    """
+    dirty = set()
+    rows = len(board)
+    for c in columns:
+        # Pack the pieces of the column down, bottom up
+        lowest = -1
+        bottom = rows - 1
+        for r in range(rows - 1, -1, -1):
+            v = board[r][c]
+            if v == EMPTY:
+                if lowest == -1:
+                    lowest = r
+            else:
+                if bottom != r:
+                    journal.set(board, bottom, c, v)
+                    journal.set(board, r, c, EMPTY)
+                bottom -= 1
+
+        if lowest != -1 and bottom != lowest:
+            for r in range(lowest + 1):
+                dirty.add((r, c))
+    return dirty
+
+
+def runCascade(board, journal, sf, dirty):
+    """
+    Method Name: runCascade()
+    Description: Clears the patterns through the dirty cells and lets the pieces
+    fall, over and over until nothing more matches.  Nothing new falls in from
+    the top.
+    :param board: the game board, with no patterns on it apart from through the
+                  dirty cells
+    :param journal: the Journal that records the changes
+    :param sf: the score factor to start from
+    :param dirty: the set of (row, column) cells changed since the board last had
+                  no patterns on it
+    :return: a dictionary holding the sorted "cleared" and "bursts" cells of each
+             step, the "points" scored and the score factor "sf" left at the end
+    """
+    syncAnim = []
+    asyncAnim = []
+    cleared = []
+    bursts = []
+    points = 0
+    while True:
+        # Only the windows through a cell in a line can match, which leaves most
+        # of the dirty cells out
+        dirty = set(cell for cell in dirty if inRun(board, cell[0], cell[1]))
+        if len(dirty) == 0:
+            break
+        del asyncAnim[:]
+        start = len(journal.changes)
+        sf, changed = clearMatches(board, journal, sf, syncAnim, asyncAnim, None, dirty)
+        if not changed:
+            break
+
+        step_cleared = set()
+        step_bursts = set()
+        for (r, c, old, new) in journal.changes[start:]:
+            if new == BURST:
+                step_bursts.add((r, c))
+            else:
+                step_cleared.add((r, c))
+        step_cleared -= step_bursts
+        cleared.append(sorted(step_cleared))
+        bursts.append(sorted(step_bursts))
+        points += sum(anim[4] for anim in asyncAnim if anim[0] == "score")
+        dirty = dropPieces(board, journal, set(c for (r, c) in step_cleared))
+
+    return {"cleared": cleared, "bursts": bursts, "points": points, "sf": sf}
+
+
+def cascadeOutcome(board, r1, c1, r2, c2, journal=None, undo=True):
+    """
+    Method Name: cascadeOutcome()
+    Description: Works out the whole cascade a move sets off before anything new
+    falls onto the board.  The board is changed while this runs but is put back
+    the way it was, and the game's random numbers are not used up.
+    :param board: the game board, which should be settled
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param journal: an optional Journal to record the changes in, so one can be
+                    shared by a batch of moves
+    :param undo: put the board back afterwards.  When it is False the board is
+                 left the way the cascade left it, with EMPTY cells where the
+                 refill would go, and the journal can take the move back.
+    :return: None if the move is not allowed, otherwise a dictionary holding, for
+             each step of the chain, the sorted "cleared" cells and the sorted
+             "bursts" cells, as lists.  The cells are where the pieces were at that
+             step.  It also holds the "chain" depth (the number of steps), the
+             total "points" and the score factor "sf" the last step left.
+    """
+    if not (r1 == r2 and abs(c1 - c2) == 1 or c1 == c2 and abs(r1 - r2) == 1):
+        return None
+    burst = isBurstSwap(board, r1, c1, r2, c2)
+    if not burst and not canSwap(board, r1, c1, r2, c2):
+        return None
+
+    if journal is None:
+        journal = Journal()
+    journal.mark()
+    syncAnim = []
+    asyncAnim = []
+    cleared = []
+    bursts = []
+    points = 0
+    dirty = set([(r1, c1), (r2, c2)])
+
+    if burst:
+        burstSwap(board, r1, c1, r2, c2, syncAnim, asyncAnim, 0, dirty, None, journal, QUIET_RANDOM)
+        destroyed = set()
+        for anim in syncAnim:
+            if anim[0] == "destroy":
+                journal.set(board, anim[1], anim[2], EMPTY)
+                destroyed.add((anim[1], anim[2]))
+        cleared.append(sorted(destroyed))
+        bursts.append([])
+        points += sum(anim[4] for anim in asyncAnim if anim[0] == "score")
+        dirty = dropPieces(board, journal, set(c for (r, c) in destroyed))
+
+        # settle() starts over from a score factor of 1 once the BURST's pieces
+        # have been replaced, since nothing matched in between
+        sf = 1
+    else:
+        swap(board, r1, c1, r2, c2, journal)
+        sf = 1
+
+    steps = runCascade(board, journal, sf, dirty)
+    cleared.extend(steps["cleared"])
+    bursts.extend(steps["bursts"])
+    points += steps["points"]
+
+    if undo:
+        journal.undo(board)
+    return {"cleared": cleared, "bursts": bursts, "chain": len(cleared), "points": points, "sf": steps["sf"]}
+
+
+def flatShapes(rows, cols):
+    """
+    Method Name: flatShapes()
+    Description: compileShapes() for a board kept as one flat list, where cell
+    (r, c) is at r * cols + c and bit r * cols + c stands for it in a mask.  The
+    table is only built once for each board size.
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :return: a tuple of the list of windows, a list holding the positions in it
+             of the windows that cover each cell, and a list holding the lines of
+             3 through each cell.  Each window is a tuple of its first cell, the
+             mask of its cells, its cells, the cell that becomes a BURST or -1,
+             and the points it scores.  Each line is a tuple of its mask and the
+             positions of the windows that hold the whole line.
+    """
+    if (rows, cols) in FLAT_SHAPES:
+        return FLAT_SHAPES[(rows, cols)]
+
+    windows, covering = compileShapes(rows, cols)
+    flat_windows = []
+    for (pattern, r, c, rest) in windows:
+        cells = (r * cols + c,) + tuple(i * cols + j for i, j in rest)
+        burst = -1
+        if pattern[2] is not None:
+            burst = (r + pattern[2][0]) * cols + c + pattern[2][1]
+        flat_windows.append((cells[0], sum(1 << i for i in cells), cells, burst, pattern[4]))
+    flat_covering = [covering.get((i // cols, i % cols), []) for i in range(rows * cols)]
+
+    lines = [[] for i in range(rows * cols)]
+    for r in range(rows):
+        for c in range(cols):
+            for dr, dc in [(0, 1), (1, 0)]:
+                if r + 2 * dr < rows and c + 2 * dc < cols:
+                    line = sum(1 << ((r + k * dr) * cols + c + k * dc) for k in range(3))
+                    holding = [w for w in flat_covering[r * cols + c] if flat_windows[w][1] & line == line]
+                    for k in range(3):
+                        lines[(r + k * dr) * cols + c + k * dc].append((line, holding))
+
+    FLAT_SHAPES[(rows, cols)] = (flat_windows, flat_covering, lines)
+    return FLAT_SHAPES[(rows, cols)]
+
+
+def flatMasks(flat):
+    """
+    Method Name: flatMasks()
+    Description: Makes a mask of the cells of each piece on a flat board, keyed
+    by the piece's last digit the way windowAt() compares pieces, so EMPTY is
+    in masks[9] and BURST in masks[6].  masks[10] holds the EMPTY and BURST
+    cells on their own.
+    :param flat: the game board as one flat list
+    :return: a list of 11 masks
+    """
+    masks = [0] * 11
+    for i in range(len(flat)):
+        masks[flat[i] % 10] |= 1 << i
+        if flat[i] == EMPTY or flat[i] == BURST:
+            masks[10] |= 1 << i
+    return masks
+
+
+def swapOutcome(flat, rows, cols, i1, i2, masks=None):
+    """
+    Method Name: swapOutcome()
+    Description: cascadeOutcome() for a swap that is known to be allowed, on a
+    board kept as one flat list.  The cascade is played out on a copy of the
+    list, clearing the same windows in the same order as clearMatches() and
+    letting the pieces fall the way dropPieces() does, but without a Journal
+    or any animations.  A window matches when its cells are all in the mask of
+    its first piece.
+    :param flat: the settled game board as one flat list, which is not changed
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param i1: the cell of the first piece
+    :param i2: the cell of the second piece
+    :param masks: the flatMasks() of the board, worked out if left out
+    :return: the same dictionary cascadeOutcome() gives
+    """
+    windows, covering, lines = flatShapes(rows, cols)
+    if masks is None:
+        masks = flatMasks(flat)
+    b = flat[:]
+    masks = masks[:]
+    cleared = []
+    bursts = []
+    points = 0
+    sf = 1
+    # Without any pieces that end in 6 or 9, which match BURST and EMPTY, a cell
+    # cleared part way through a step cannot help another window match
+    plain = masks[6] | masks[9] == masks[10]
+
+    v1 = b[i1]
+    v2 = b[i2]
+    b[i1] = v2
+    b[i2] = v1
+    bits = (1 << i1) | (1 << i2)
+    masks[v1 % 10] ^= bits
+    masks[v2 % 10] ^= bits
+    if (v1 == BURST) != (v2 == BURST):
+        # The BURST and every piece of the colour it is swapped with are
+        # destroyed, 30 points each, and nothing else matches until the pieces
+        # left have fallen
+        if v2 == BURST:
+            i1, i2 = i2, i1
+            v1, v2 = v2, v1
+        destroyed = set(i for i in range(rows * cols) if b[i] == v2 or b[i] == EMPTY)
+        destroyed.add(i2)
+        for i in destroyed:
+            masks[b[i] % 10] &= ~(1 << i)
+            masks[9] |= 1 << i
+            b[i] = EMPTY
+        points = 30 * len(destroyed)
+        cleared.append([(i // cols, i % cols) for i in sorted(destroyed)])
+        bursts.append([])
+        dirty = dropFlat(b, masks, rows, cols, destroyed, not plain)
+    else:
+        dirty = (i1, i2)
+
+    while True:
+        # Only the windows through a cell in a line can match.  Each cell of a
+        # pattern is in a line of 3 within it, so on a plain board only the
+        # windows holding a line that matches now need to be checked.
+        found = set()
+        for i in dirty:
+            v = b[i]
+            if plain:
+                if v == EMPTY or v == BURST:
+                    continue
+                m = masks[v % 10]
+                for line, holding in lines[i]:
+                    if m & line == line:
+                        found.update(holding)
+            else:
+                m = masks[v % 10]
+                for line, holding in lines[i]:
+                    if m & line == line:
+                        found.update(covering[i])
+                        break
+        if len(found) == 0:
+            break
+
+        step_cleared = set()
+        step_bursts = set()
+        for w in sorted(found):
+            start, window, cells, burst, amount = windows[w]
+            v = b[start]
+            if v == EMPTY or v == BURST or masks[v % 10] & window != window:
+                continue
+            for i in cells:
+                if b[i] != EMPTY:
+                    masks[b[i] % 10] &= ~(1 << i)
+                    masks[9] |= 1 << i
+                    b[i] = EMPTY
+                    step_cleared.add(i)
+            if burst >= 0:
+                masks[9] &= ~(1 << burst)
+                masks[BURST % 10] |= 1 << burst
+                b[burst] = BURST
+                step_bursts.add(burst)
+                points += amount
+            else:
+                points += amount * sf
+            sf += 1
+        if len(step_cleared) == 0 and len(step_bursts) == 0:
+            break
+        step_cleared -= step_bursts
+        cleared.append([(i // cols, i % cols) for i in sorted(step_cleared)])
+        bursts.append([(i // cols, i % cols) for i in sorted(step_bursts)])
+        dirty = dropFlat(b, masks, rows, cols, step_cleared, not plain)
+
+    return {"cleared": cleared, "bursts": bursts, "chain": len(cleared), "points": points, "sf": sf}
+
+
+def dropFlat(b, masks, rows, cols, cells, empty=True):
+    """
+    Method Name: dropFlat()
+    Description: dropPieces() for a board kept as one flat list, keeping the
+    first 10 of its flatMasks() up to date
+    :param b: the flat board
+    :param masks: the flatMasks() of the board
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param cells: the cells that were cleared
+    :param empty: also give the EMPTY cells left at the top of the columns
+    :return: a list of the cells that could make a new pattern, the same cells
+             dropPieces() gives
+    """
+    dirty = []
+    for c in set(i % cols for i in cells):
+        # Pack the pieces of the column down, bottom up
+        lowest = -1
+        bottom = rows - 1
+        for r in range(rows - 1, -1, -1):
+            v = b[r * cols + c]
+            if v == EMPTY:
+                if lowest == -1:
+                    lowest = r
+            else:
+                if bottom != r:
+                    bits = (1 << (bottom * cols + c)) | (1 << (r * cols + c))
+                    masks[v % 10] ^= bits
+                    masks[9] ^= bits
+                    b[bottom * cols + c] = v
+                    b[r * cols + c] = EMPTY
+                bottom -= 1
+
+        if lowest != -1 and bottom != lowest:
+            dirty.extend(r * cols + c for r in range(0 if empty else bottom + 1, lowest + 1))
+    return dirty
+
+
+def scoreMoves(board, cache=None):
+    """
+    Method Name: scoreMoves()
+    Description: Works out cascadeOutcome() for every legal move on a board in one
+    batch.  With a cache, the whole batch is remembered under the board's
+    canonicalBoard() key, so boards that only differ by colour share it.
+    :param board: the game board, which should be settled.  It is not changed.
+    :param cache: an optional TranspositionCache
+    :return: a list of (move, outcome) pairs, in the order legalMoves() lists them.
+             Results from the cache are shared, so they must not be changed.
+    """
+    if cache is not None:
+        key = (canonicalBoard(board)[0], "cascade")
+        scored = cache.get(key)
+        if scored is not None:
+            return scored
+
+    # The legal moves come from the bit boards, so the swaps are not tried one
+    # at a time, and each move is played out on a flat copy of the board
+    cols = len(board[0])
+    flat = [v for row in board for v in row]
+    masks = flatMasks(flat)
+    scored = []
+    for move in BitBoard(board).legalMoves():
+        outcome = swapOutcome(flat, len(board), cols, move[0] * cols + move[1], move[2] * cols + move[3], masks)
+        scored.append((move, outcome))
+
+    if cache is not None:
+        cache.put(key, scored)
+    return scored
+
+
+def rankMoves(board, cache=None):
+    """
+    Method Name: rankMoves()
+    Description: Ranks the legal moves by the points their certain cascades score.
+    Ties go to the longer chain and then to the move listed first.
+    :param board: the game board, which should be settled.  It is not changed.
+    :param cache: an optional TranspositionCache
+    :return: a list of (points, move) pairs, best first
+    """
+    scored = scoreMoves(board, cache)
+    order = sorted(range(len(scored)), key=lambda i: (-scored[i][1]["points"], -scored[i][1]["chain"], i))
+    return [(scored[i][1]["points"], scored[i][0]) for i in order]
+
+
+#
+# Run a series of tests on the cascadeOutcome, scoreMoves and rankMoves functions
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_cascadeOutcome():
+    print("Testing cascadeOutcome...")
+
+    passed = 0
+    failed = 0
+
+    # A swap that sets off a second match once the first one has fallen
+    print("  Attempting to follow a chain of two matches... ", end="")
+    b = [[3, 0, 0, 2, 3], \
+         [3, 1, 3, 2, 0], \
+         [1, 3, 1, 0, 1], \
+         [1, 3, 0, 0, 3], \
+         [3, 0, 2, 3, 1]]
+    outcome = cascadeOutcome(b, 1, 1, 1, 2)
+    if outcome is None or outcome["chain"] != 2 or outcome["points"] != 30 + 60 or \
+            outcome["cleared"] != [[(1, 1), (2, 1), (3, 1)], [(3, 1), (3, 2), (3, 3)]] or \
+            outcome["sf"] != 3:
+        print("\nFAILED: cascadeOutcome gave", outcome)
+        print()
+        failed += 1
+    else:
+        print("Success.")
+        passed += 1
+
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 6, 3)]:
+        print("  Attempting to score every move on 20 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        cache = TranspositionCache()
+        for game in range(20):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            settle(board, syms)
+            for i in range(3):
+                board[randrange(rows)][randrange(cols)] = BURST
+            before = deepcopy(board)
+            state = getstate()
+            scored = scoreMoves(board, cache)
+            if board != before or getstate() != state:
+                problem = ("the board or the random numbers were changed", game)
+                break
+            if [move for (move, outcome) in scored] != legalMoves(board):
+                problem = ("a legal move was left out", game)
+                break
+
+            for (move, outcome) in scored:
+                # The batch plays the moves out on its own copy of the board
+                if outcome != cascadeOutcome(board, move[0], move[1], move[2], move[3]):
+                    problem = ("the batch differed from cascadeOutcome() for %s" % (move,), game)
+                    break
+
+                # The first step is what moveOutcome() works out
+                first = moveOutcome(board, move[0], move[1], move[2], move[3])
+                if outcome["cleared"][0] != first["cleared"] and not isBurstSwap(board, *move) or \
+                        outcome["bursts"][0] != first["bursts"]:
+                    problem = ("the first step differed from moveOutcome() for %s" % (move,), game)
+                    break
+
+                # Play the cascade out the slow way: clear the whole board, then
+                # let each column fall
+                slow = deepcopy(board)
+                journal = Journal()
+                asyncAnim = []
+                if isBurstSwap(slow, *move):
+                    burstSwap(slow, move[0], move[1], move[2], move[3], [], asyncAnim, 0, None, None, journal)
+                    for (r, c) in outcome["cleared"][0]:
+                        slow[r][c] = EMPTY
+                else:
+                    swap(slow, move[0], move[1], move[2], move[3])
+                sf = 1
+                chain = 1 if isBurstSwap(board, *move) else 0
+                while True:
+                    if chain > 0:
+                        for c in range(cols):
+                            pieces = [slow[r][c] for r in range(rows) if slow[r][c] != EMPTY]
+                            pieces = [EMPTY] * (rows - len(pieces)) + pieces
+                            for r in range(rows):
+                                slow[r][c] = pieces[r]
+                    sf, changed = clearMatches(slow, Journal(), sf, [], asyncAnim)
+                    if not changed:
+                        break
+                    chain += 1
+                if outcome["chain"] != chain or outcome["points"] != sum(anim[4] for anim in asyncAnim):
+                    problem = ("the cascade differed for %s" % (move,), game)
+                    break
+            if problem is not None:
+                break
+
+            # The cache gives back the same batch, for this board and a recoloured one
+            recoloured = [[v if v == BURST else (v + 1) % syms for v in row] for row in board]
+            if scoreMoves(board, cache) is not scored or \
+                    [outcome for (move, outcome) in scoreMoves(recoloured, cache)] != \
+                    [outcome for (move, outcome) in scoreMoves(recoloured)]:
+                problem = ("the cache gave a different batch", game)
+                break
+            ranked = rankMoves(board)
+            if sorted(ranked, key=lambda pm: -pm[0]) != ranked or len(ranked) != len(scored):
+                problem = ("the moves were not ranked by points", game)
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on game", problem[1])
+            print("The board was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # With more than 6 symbols some pieces match BURST or EMPTY the way windowAt()
+    # compares them, which the batch has to check the long way
+    print("  Attempting to score every move on 20 random boards with 10 symbols... ", end="")
+    problem = None
+    for game in range(20):
+        seed(game)
+        board = createBoard(8, 8, 10)
+        settle(board, 10)
+        for i in range(3):
+            board[randrange(8)][randrange(8)] = BURST
+        board[0][0] = EMPTY
+        for (move, outcome) in scoreMoves(board):
+            if outcome != cascadeOutcome(board, move[0], move[1], move[2], move[3]):
+                problem = ("the batch differed from cascadeOutcome() for %s" % (move,), game)
+                break
+        if problem is not None:
+            break
+    if problem is not None:
+        print("\nFAILED:", problem[0], "on game", problem[1])
+        print("The board was:")
+        pprint(board)
+        print()
+        failed += 1
+    else:
+        print("Success.")
+        passed += 1
+
+    # A board that has not been seen before plays out every legal move, which
+    # takes well under a millisecond on an 8 by 8 board.  The tables for the
+    # board size are built by the first board, so the best of 3 runs is timed.
+    print("  Attempting to rank the moves of 100 new 8 by 8 boards in under a millisecond each... ", end="")
+    boards = []
+    for game in range(100):
+        seed(game)
+        board = createBoard(8, 8, 6)
+        settle(board, 6)
+        boards.append(board)
+    each = None
+    for i in range(3):
+        start = time()
+        for board in boards:
+            rankMoves(board, TranspositionCache())
+        if each is None or (time() - start) / len(boards) < each:
+            each = (time() - start) / len(boards)
+    if each < 0.001:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: ranking took %.3f ms a board" % (each * 1000))
+        failed += 1
+
+    # Ranking the moves of a board that has been seen before is one lookup
+    print("  Attempting to rank the moves of 100 boards seen before in well under a millisecond each... ", end="")
+    cache = TranspositionCache()
+    for board in boards:
+        rankMoves(board, cache)
+    start = time()
+    for board in boards:
+        rankMoves(board, cache)
+    each = (time() - start) / len(boards)
+    if each < 0.0005:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: ranking took %.3f ms a board" % (each * 1000))
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_cascadeOutcome()
@@ -0,0 +1,3469 @@
+###############################################################################
+#  File: crush_engine.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               Board rules and cascade logic for Code Crushers.  Nothing in
+#               this file touches SimpleGraphics or Tk, so it can be imported
+#               by batch jobs, simulations and servers that have no display.
+#               code_crusher.py builds the graphical game on top of it.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from random import Random, randrange, seed
+from time import sleep, time
+from copy import deepcopy
+from pprint import pprint
+import inspect
+import random
+import sys
+import traceback
+
+# Special game pieces
+EMPTY = -1  # Represents an empty space on the board
+BURST = 6  # Power up bomb, clears the board of all pieces same to the one
+# Used to swap with it
+
+# Game state
+RUNNING = 0  # initiates game to running
+WIN = 1  # initiates win
+LOSE = -1  # initiates loss
+
+# The difficulties offered by main(), easiest first.  crush_calibrate.py plays
+# them without a window to measure how often each one is won.
+PRESETS = [
+    {"name": "Casual", "target_score": 5000, "max_turns": 35, "rows": 8, "cols": 8, "syms": 5},
+    {"name": "Normal", "target_score": 15000, "max_turns": 32, "rows": 8, "cols": 7, "syms": 5},
+    {"name": "Hard", "target_score": 5000, "max_turns": 30, "rows": 7, "cols": 7, "syms": 6},
+    {"name": "Brutal", "target_score": 10000, "max_turns": 35, "rows": 6, "cols": 7, "syms": 6},
+]
+
+
+class Unshuffled:
+    """
+    Class Name: Unshuffled
+    Description: A cosmetic stream for games that nobody watches.  It leaves the
+    destroy animations in order instead of shuffling them, which saves the time.
+    """
+
+    def shuffle(self, x):
+        """
+        Method Name: shuffle()
+        Description: Leaves the list as it is
+        :param x: the list
+        :return: none
+        """
+        pass
+
+
+class GameRandom:
+    """
+    Class Name: GameRandom
+    Description: The random numbers of one game, in three streams: board for the
+    pieces createBoard() lays out, refill for the pieces genFalls() drops in, and
+    cosmetic for the order the destroy animations play in.  Given a seed, each
+    stream is its own random.Random, so the board and the refills only depend on
+    the seed and the moves played, however many animations were shuffled on the
+    way.  Without a seed all three are the random module, as they always were.
+    """
+
+    def __init__(self, game_seed=None, cosmetic=True):
+        """
+        Method Name: __init__()
+        Description: Sets up the streams
+        :param game_seed: the seed of the game, an int, or None to use the random
+                          module
+        :param cosmetic: False to leave the destroy animations unshuffled, for games
+                         without a window
+        """
+        self.game_seed = game_seed
+        if game_seed is None:
+            self.board = random
+            self.refill = random
+            self.cosmetic = random
+        else:
+            self.board = Random("board %d" % game_seed)
+            self.refill = Random("refill %d" % game_seed)
+            self.cosmetic = Random("cosmetic %d" % game_seed)
+        if not cosmetic:
+            self.cosmetic = Unshuffled()
+
+
+# The random numbers used by the functions that are not given a GameRandom
+GLOBAL_RANDOM = GameRandom()
+
+
+class Clock:
+    """
+    Class Name: Clock
+    Description: The clock the animations are timed by.  tick() reads the wall
+    clock once a frame, and everything started or drawn in that frame is timed by
+    now(), so a frame never sees two different times.  The clock runs speed
+    seconds for every second on the wall, which plays every animation that many
+    times faster, and skip() jumps it ahead.  Before the first tick, now() is the
+    wall clock itself.
+    """
+
+    def __init__(self, speed=1.0):
+        """
+        Method Name: __init__()
+        Description: Makes a clock that has not ticked yet
+        :param speed: the number of seconds the clock runs for every second on the
+                      wall
+        """
+        self.current = None
+        self.wall = None
+        self.speed = speed
+
+    def now(self):
+        """
+        Method Name: now()
+        Description: The time of the current frame
+        :return: the time in seconds
+        """
+        if self.current is None:
+            return time()
+        return self.current
+
+    def tick(self, fps=30):
+        """
+        Method Name: tick()
+        Description: Starts a new frame, first waiting out whatever is left of the
+        frame the last tick started
+        :param fps: the most frames to draw a second
+        :return: the time of the new frame
+        """
+        if self.current is None:
+            self.wall = time()
+            self.current = self.wall
+            return self.current
+        left = self.wall + 1 / fps - time()
+        if left > 0:
+            sleep(left)
+        wall = time()
+        self.current += (wall - self.wall) * self.speed
+        self.wall = wall
+        return self.current
+
+    def skip(self, seconds):
+        """
+        Method Name: skip()
+        Description: Jumps the clock ahead, finishing everything that would have
+        finished in that time
+        :param seconds: how far to jump
+        :return: the time of the current frame
+        """
+        if self.current is None:
+            self.wall = time()
+            self.current = self.wall
+        self.current += max(seconds, 0)
+        return self.current
+
+    def sleep(self, seconds):
+        """
+        Method Name: sleep()
+        Description: Waits without drawing anything
+        :param seconds: how long to wait on the wall clock
+        :return: none
+        """
+        sleep(seconds)
+
+
+class ManualClock(Clock):
+    """
+    Class Name: ManualClock
+    Description: A clock that only moves when it is ticked, slept or skipped, by
+    exactly a frame or the time asked for, without waiting.  A game timed by it
+    runs as fast as it can be drawn and draws the same frames every time.
+    """
+
+    def __init__(self, start=0.0, speed=1.0):
+        """
+        Method Name: __init__()
+        Description: Makes a clock stopped at a time
+        :param start: the time the clock starts at
+        :param speed: the number of seconds the clock moves on for every second of
+                      frames
+        """
+        Clock.__init__(self, speed)
+        self.current = start
+        self.frames = 0
+
+    def tick(self, fps=30):
+        """
+        Method Name: tick()
+        Description: Moves the clock on by one frame
+        :param fps: the number of frames a second
+        :return: the time of the new frame
+        """
+        self.current += self.speed / fps
+        self.frames += 1
+        return self.current
+
+    def sleep(self, seconds):
+        """
+        Method Name: sleep()
+        Description: Moves the clock on without drawing a frame
+        :param seconds: how far to move it
+        :return: none
+        """
+        self.current += seconds * self.speed
+
+
+def animationEnd(anim):
+    """
+    Method Name: animationEnd()
+    Description: The time an animation in the syncAnim queue finishes, the way
+    play() draws it.  The Win and Lose screens stay up once they appear.
+    :param anim: the animation tuple
+    :return: the time in seconds
+    """
+    if anim[0] in ("fall", "destroy"):
+        return anim[6]
+    if anim[0] in ("swap", "swap_and_back"):
+        return anim[8]
+    if anim[0] == "crossfade":
+        return anim[4] + 1
+    return anim[-1]
+
+
+def shiftAnim(anim, st):
+    """
+    Method Name: shiftAnim()
+    Description: Moves an animation made by collapse(), burstSwap() or
+    resolveMove() with times counted from 0 to start at a given time
+    :param anim: the syncAnim or asyncAnim tuple
+    :param st: the time to add to each of its times
+    :return: the moved animation tuple
+    """
+    if anim[0] in ("fall", "destroy", "score"):
+        times = range(5, len(anim))
+    elif anim[0] in ("swap", "swap_and_back"):
+        times = (7, 8)
+    else:
+        # A crossfade only holds the time it starts, at the end
+        times = (len(anim) - 1,)
+    moved = list(anim)
+    for i in times:
+        moved[i] = anim[i] + st
+    return tuple(moved)
+
+
+def clickedThrough(getEvent):
+    """
+    Method Name: clickedThrough()
+    Description: Empties the mouse event queue while the syncAnim queue plays.
+    The release of the click that made the move, and anything else, is thrown
+    away so that a click behind it is still seen.
+    :param getEvent: takes the next mouse event off the queue, or gives None once
+                     it is empty, like getMouseEvent()
+    :return: True if any of the events was a left click, which fast-forwards the
+             animations
+    """
+    clicked = False
+    mv = getEvent()
+    while mv is not None:
+        if mv[0] == "<Button-1>":
+            clicked = True
+        mv = getEvent()
+    return clicked
+
+
+# The clock of the functions that are not given one.  It never ticks, so it is
+# the wall clock, as it always was.
+GLOBAL_CLOCK = Clock()
+
+
+class Journal:
+    """
+    Class Name: Journal
+    Description: Records every change made to the board as (row, column, old, new).
+    collapse() reads the pieces as they were before it started from the journal
+    instead of copying the whole board, and whole moves can be undone, newest
+    first, using memory in proportion to the cells each move changed.
+    """
+
+    def __init__(self, zobrist=None):
+        """
+        Method Name: __init__()
+        Description: Makes an empty journal
+        :param zobrist: an optional ZobristHash of the board, which is kept up to
+                        date with every change made through the journal
+        """
+        self.changes = []
+        self.marks = []
+        self.first = {}
+        self.zobrist = zobrist
+
+    def set(self, board, r, c, v):
+        """
+        Method Name: set()
+        Description: Changes a piece on the board and records the change
+        :param board: the game board
+        :param r: the row of the piece
+        :param c: the column of the piece
+        :param v: the new piece
+        :return: none
+        """
+        old = board[r][c]
+        if old != v:
+            self.changes.append((r, c, old, v))
+            if (r, c) not in self.first:
+                self.first[(r, c)] = old
+            if self.zobrist is not None:
+                self.zobrist.update(r, c, old, v)
+            board[r][c] = v
+
+    def begin(self):
+        """
+        Method Name: begin()
+        Description: Starts a new step, such as one call of collapse(), for before()
+        :return: none
+        """
+        self.first = {}
+
+    def before(self, board, r, c):
+        """
+        Method Name: before()
+        Description: Reads a piece as it was when the current step began
+        :param board: the game board
+        :param r: the row of the piece
+        :param c: the column of the piece
+        :return: the piece at row r, column c before the step began
+        """
+        return self.first.get((r, c), board[r][c])
+
+    def mark(self):
+        """
+        Method Name: mark()
+        Description: Starts a new move that undo() can take back
+        :return: none
+        """
+        self.marks.append(len(self.changes))
+        self.first = {}
+
+    def undo(self, board):
+        """
+        Method Name: undo()
+        Description: Takes back every change made since the last mark() and removes
+        that mark, so calling it again takes back the move before
+        :param board: the game board
+        :return: False if there was no move left to undo, otherwise True
+        """
+        if len(self.marks) == 0:
+            return False
+        start = self.marks.pop()
+        for (r, c, old, new) in reversed(self.changes[start:]):
+            if self.zobrist is not None:
+                self.zobrist.update(r, c, new, old)
+            board[r][c] = old
+        del self.changes[start:]
+        self.first = {}
+        return True
+
+    def moveCount(self):
+        """
+        Method Name: moveCount()
+        Description: Counts the moves that can be undone
+        :return: the number of marks in the journal
+        """
+        return len(self.marks)
+
+
+def createBoard(iRows, iCols, iPieces, rng=None):
+    """
+    Method Name: createBoard()
+    Description: Method called to create a board with random pieces
+    :param iRows: the number of rows to include on the list
+    :param iCols: the number of columns to include on the list
+    :param iPieces: the number of different pieces to be included on the board
+    :param rng: the GameRandom whose board stream lays out the pieces,
+                GLOBAL_RANDOM if left out
+    :return: gameboard -- the list of all pieces in play
+    """
+    if rng is None:
+        rng = GLOBAL_RANDOM
+
+    gameBoard = []
+    # gameBoard is the list that will contain the piece identification
+    # for all playable positions on the board
+
+    # Outer loop runs for every row desired for the game board
+    for row in range(iRows):
+        rowList = []
+        # rowList is a temporary list that holds the identification of
+        # the different pieces in each row
+
+        # Inner loop runs for every column in each row.
+        for col in range(iCols):
+            # for every position, generates a random integer to indicate
+            # what piece spawns on board creation. This integer is appended
+            # into the rowList list
+            rowList.append(rng.board.randrange(0, iPieces))
+
+        # After every piece has been added into a row, that row is added
+        # to the gameBoard
+        gameBoard.append(rowList)
+    return gameBoard
+
+
+def swap(board, r1, c1, r2, c2, journal=None):
+    """
+    Swap elements in our 2d list and give points if the swap is valid
+    :param board: the list we will be swapping
+    :param r1: row 1 in board list
+    :param c1: column 1 in board list
+    :param r2: row 2 in board list
+    :param c2: column 2 in board list
+    :param journal: an optional Journal that records the change
+    :return: none -- the game board passed as a parameter is modified
+    """
+    if journal is not None:
+        v1 = board[r1][c1]
+        journal.set(board, r1, c1, board[r2][c2])
+        journal.set(board, r2, c2, v1)
+        return
+    board[r1][c1], board[r2][c2] = board[r2][c2], board[r1][c1]  # Swap our array elements
+
+
+def clearAll(board, sym, pieces=None):
+    """
+    Method Name: clearAll()
+    Description: Method called to clear instances of a given piece and replace with EMPTY
+    :param board: the list to be used for swapping
+    :param sym: symbol that should be removed
+    :param pieces: an optional PieceIndex for the board.  When it is passed in only
+                   the cells it lists for sym are cleared, and it is kept up to date.
+    :return: none - modifies the game board
+    """
+    if pieces is not None:
+        cells = pieces.cellsOf(sym)
+        for (x, y) in cells:
+            board[x][y] = EMPTY
+        pieces.update(cells)
+        return
+
+    # module for the clear all powerup. add doc string
+    for x in range(len(board)):  # For y in the range of the length of the board
+        for y in range(len(board[0])):  # For x in the range of the length of first row
+            if board[x][y] == sym:  # If symbol is the same as the value of sym
+                board[x][y] = EMPTY  # Set the piece to equal empty
+
+
+def vLineAt(board, r1, c1):
+    """
+    Method Name: vLineAt()
+    Descrition: Function used to check the rows of the board to make sure that
+    the swap made by a user is valid or not outside of the boundary of the board
+    :param board: the list to be used for swapping
+    :param r1: row being used in the board
+    :param c1: column being used in the board
+    :return: True if a vertical line was made. False otherwise.
+    """
+    # Bottom boundary of the board
+    bBound = len(board)
+    # Top boundary of the board
+    tBound = 0
+
+    # Checks to see if match intended for top of pattern is valid
+    if r1 + 2 < bBound:
+        if board[r1][c1] == board[r1 + 1][c1] and board[r1][c1] == board[r1 + 2][c1]:
+            return True
+    # Checks to see if match intended for middle of pattern is valid
+    if r1 + 1 < bBound and r1 - 1 >= tBound:
+        if board[r1][c1] == board[r1 - 1][c1] and board[r1][c1] == board[r1 + 1][c1]:
+            return True
+    # Checks to see if match intended for bottom of pattern is valid
+    if r1 - 2 >= tBound:
+        if board[r1][c1] == board[r1 - 1][c1] and board[r1][c1] == board[r1 - 2][c1]:
+            return True
+
+    # Returns false of none are true
+    return False
+
+
+def hLineAt(board, row, col):
+    """
+    Method Name: hLineAt()
+    Description: Method called to determine if a horizontal line of three pieces is made
+    :param board: the list used to check piece values
+    :param row: the row of the piece being examined
+    :param col: the column of the piece being examined
+    :return: True if a horizontal line of three pieces has been created - otherwise, False
+    """
+
+    rBound = len(board[0])
+    # rBound represents the right side boundary of the board
+    lBound = 0
+    # lBound represents the left side boundary of the board
+
+    # If the match is intended at the left of the line
+    # Makes sure there are enough spaces from the right end of the board to test
+    if col + 2 < rBound:
+        if board[row][col] == board[row][col + 1] and board[row][col] == board[row][col + 2]:
+            return True
+
+    # If the match is intended in the middle of the line
+    # Makes sure there are enough spaces on both sides of piece
+    if col + 1 < rBound and col - 1 >= lBound:
+        if board[row][col] == board[row][col + 1] and board[row][col] == board[row][col - 1]:
+            return True
+
+    # If the match is intended at the right of the line
+    # Makes sure there are enough spaces from the left end of the board to test
+    if col - 2 >= lBound:
+        if board[row][col] == board[row][col - 1] and board[row][col] == board[row][col - 2]:
+            return True
+
+    # Returns false if none of the other cases hold
+    return False
+
+
+def pieceAfterSwap(board, r, c, r1, c1, r2, c2):
+    """
+    Method Name: pieceAfterSwap()
+    Description: Reads a piece as it would be if two pieces were swapped, without
+    changing the board
+    :param board: the game board
+    :param r: the row of the piece to read
+    :param c: the column of the piece to read
+    :param r1: the row of the first swapped piece
+    :param c1: the column of the first swapped piece
+    :param r2: the row of the second swapped piece
+    :param c2: the column of the second swapped piece
+    :return: the piece that would be at row r, column c
+    """
+    if r == r1 and c == c1:
+        return board[r2][c2]
+    if r == r2 and c == c2:
+        return board[r1][c1]
+    return board[r][c]
+
+
+def runAfterSwap(board, r, c, dr, dc, r1, c1, r2, c2, limit=None):
+    """
+    Method Name: runAfterSwap()
+    Description: Finds the run of matching pieces through a cell, in one direction,
+    as it would be if two pieces were swapped.  The board is only read.
+    :param board: the game board
+    :param r: the row of the cell
+    :param c: the column of the cell
+    :param dr: 1 to follow the column, otherwise 0
+    :param dc: 1 to follow the row, otherwise 0
+    :param r1: the row of the first swapped piece
+    :param c1: the column of the first swapped piece
+    :param r2: the row of the second swapped piece
+    :param c2: the column of the second swapped piece
+    :param limit: stop looking once the run is this long
+    :return: a list of the (row, column) cells in the run
+    """
+    v = pieceAfterSwap(board, r, c, r1, c1, r2, c2)
+    cells = [(r, c)]
+    for sign in (-1, 1):
+        i = r + sign * dr
+        j = c + sign * dc
+        while 0 <= i < len(board) and 0 <= j < len(board[0]) and \
+                pieceAfterSwap(board, i, j, r1, c1, r2, c2) == v:
+            if limit is not None and len(cells) >= limit:
+                return cells
+            cells.append((i, j))
+            i += sign * dr
+            j += sign * dc
+    return cells
+
+
+def canSwap(board, r1, c1, r2, c2):
+    """
+    Method Name: canSwap()
+    Description: Reports whether or not two pieces on the board can be swapped.  The
+    board is only read, never changed, so this is safe to call on a board that is
+    being drawn or checked by another thread at the same time.
+    :param board: the list to be used to check piece values
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :return: True if the proposed swap creates a line. False otherwise
+    """
+    # module to find if the tiles are able to be swapped. (i.e. only 4 swapable tiles, NSEW)
+
+    # Checks both locations that would be switched for a horizontal or vertical line
+    # of three, the same checks hLineAt() and vLineAt() make after a swap
+    for (r, c) in [(r2, c2), (r1, c1)]:
+        if len(runAfterSwap(board, r, c, 0, 1, r1, c1, r2, c2, 3)) >= 3 or \
+                len(runAfterSwap(board, r, c, 1, 0, r1, c1, r2, c2, 3)) >= 3:
+            return True
+    return False
+
+
+def swapClears(board, r1, c1, r2, c2):
+    """
+    Method Name: swapClears()
+    Description: Works out which pieces the lines made by a swap would cover, without
+    changing the board.  EMPTY and BURST never make a line here, the same as in
+    collapse().
+    :param board: the game board
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :return: a sorted list of the (row, column) cells in the lines.  The list is
+             empty if the swap makes no line.
+    """
+    cleared = set()
+    for (r, c) in [(r1, c1), (r2, c2)]:
+        v = pieceAfterSwap(board, r, c, r1, c1, r2, c2)
+        if v == EMPTY or v == BURST:
+            continue
+        for (dr, dc) in [(0, 1), (1, 0)]:
+            run = runAfterSwap(board, r, c, dr, dc, r1, c1, r2, c2)
+            if len(run) >= 3:
+                cleared.update(run)
+    return sorted(cleared)
+
+
+def evalSwaps(board, swaps):
+    """
+    Method Name: evalSwaps()
+    Description: Checks many swaps at once without changing the board
+    :param board: the game board
+    :param swaps: a list of (r1, c1, r2, c2) swaps
+    :return: a list holding True for every swap that creates a line and False for
+             the rest, in the same order as swaps
+    """
+    mask = []
+    for (r1, c1, r2, c2) in swaps:
+        mask.append(canSwap(board, r1, c1, r2, c2))
+    return mask
+
+
+def burstHint(board, x, y, pieces=None):
+    """
+    Method Name: burstHint()
+    Description: Picks the piece a BURST should be swapped with.  A bomb is, by default,
+    the best move available, and it must remove the most amount of pieces possible.
+    :param board: The game board to be checked
+    :param x: the row of the BURST
+    :param y: the column of the BURST
+    :param pieces: the piece counts from countBoard() or a PieceIndex, which are
+                   counted if left out
+    :return: The row and column of the BURST, followed by the row and column of the
+             piece to swap it with
+    """
+    # These  four variables track the bounds of the board
+    uBound = 0
+    dBound = len(board)
+    lBound = 0
+    rBound = len(board[0])
+
+    if pieces is None:
+        # countBoard returns a dictionary of all piece value counts
+        pieces = countBoard(board)
+    elif not isinstance(pieces, dict):
+        pieces = pieces.counts
+
+    # These variables hold the weight of the possible swaps in all cardinal directions
+    lPiece = 0
+    rPiece = 0
+    uPiece = 0
+    dPiece = 0
+
+    # All pieces considered must be within the bounds of the board.
+    # The respective variables will be assigned the value of how many
+    # pieces with its same value exist in the dictionary of counted pieces
+    if y - 1 >= lBound:
+        lPiece = pieces.get(board[x][y-1], 0)
+    if y + 1 < rBound:
+        rPiece = pieces.get(board[x][y+1], 0)
+    if x - 1 >= uBound:
+        uPiece = pieces.get(board[x-1][y], 0)
+    if x + 1 < dBound:
+        dPiece = pieces.get(board[x+1][y], 0)
+
+    # The piece with the highest count adjacent to the bomb is chosen.
+    # The prioritization for pieces with the same size are as follows:
+    # leftPiece <-- rightPiece <-- downwardsPiece <-- upperPiece
+    if lPiece >= rPiece and lPiece >= dPiece and lPiece >= uPiece:
+        return x, y, x, y-1
+    elif rPiece >= lPiece and rPiece >= dPiece and rPiece >= uPiece:
+        return x, y, x, y+1
+    elif dPiece >= uPiece and dPiece >= lPiece and dPiece >= rPiece:
+        return x, y, x+1, y
+    elif uPiece >= dPiece and uPiece >= lPiece and uPiece >= rPiece:
+        return x, y, x-1, y
+
+
+def hintAt(board, x, y, swapTest=canSwap):
+    """
+    Method Name: hintAt()
+    Description: Finds the best swap for a single piece the way hint() weighs them.
+    All possible pieces adjacent to the current piece are analyzed.
+    :param board: The game board to be checked
+    :param x: the row of the piece
+    :param y: the column of the piece
+    :param swapTest: The function used to check whether a swap makes a line
+    :return: a dictionary holding the position ("pos") and weight ("value") of the
+             best swap for this piece
+    """
+    # These  four variables track the bounds of the board
+    uBound = 0
+    dBound = len(board)
+    lBound = 0
+    rBound = len(board[0])
+
+    # tempValue holds the position and weight of the best swap of the piece being observed
+    tempValue = {"pos": [-1, -1, -1, -1], "value": 0}
+
+    # If a bomb is not found, then all possible pieces adjacent to the
+    # current piece are analyzed to determine the best possible move
+    # out of all pieces on the board.
+
+    # These values will hold the weight of the best swap for the current
+    # piece
+    pieceLeft = 0
+    pieceRight = 0
+    pieceUp = 0
+    pieceDown = 0
+
+    # --------------------------------------------------------
+    # Swapping Left
+    # --------------------------------------------------------
+
+    # Checks if piece immediately left is within bounds
+    if y - 1 >= lBound and swapTest(board, x, y, x, y - 1):
+
+        # Counts how many consecutive pieces in each cardinal direction of the proposed spot
+        # that have the same type as the suggested piece
+        tempUp = 0
+        tempDown = 0
+        tempLeft = 0
+
+        # Allows / Disallows a piece to be added in the for loops
+        allowPiece = True
+
+        # For all pieces above the proposed spot:
+        for i in range(x - 1, uBound - 1, -1):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempUp
+            # Otherwise, do not allow any pieces to be counted.
+            if board[x][y] == board[i][y-1] and allowPiece:
+                tempUp += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces below the proposed spot:
+        for i in range(x + 1, dBound):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempDown
+            # Otherwise, do not allow any pieces to be counted.
+            if board[x][y] == board[i][y-1] and allowPiece:
+                tempDown += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces left of the proposed spot:
+        for j in range(y - 2, lBound - 1, -1):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempLeft
+            # Otherwise, do not allow any pieces to be counted.
+            if board[x][y] == board[x][j] and allowPiece:
+                tempLeft += 1
+            else:
+                allowPiece = False
+
+        # --------------------------------------
+        # Determining weight of a swap
+        # --------------------------------------
+
+        # If the two opposing sides are at least a combined length of 2, then
+        # the weight of pieceLeft is increased by their value
+        if tempUp + tempDown >= 2:
+            pieceLeft += tempUp + tempDown
+
+        # If the standalone side has a length of 2, then the weight of
+        # pieceLeft is increased by 2.
+        if tempLeft == 2:
+            pieceLeft += tempLeft
+
+    # --------------------------------------------------------
+    # Swapping right
+    # --------------------------------------------------------
+
+    # Checks if piece immediately right is within bounds
+    if y + 1 < rBound and swapTest(board, x, y, x, y + 1):
+
+        # Counts how many consecutive pieces in each cardinal direction of the proposed spot
+        # that have the same type as the suggested piece
+        tempUp = 0
+        tempDown = 0
+        tempRight = 0
+
+        # Allows / Disallows a piece to be added in the for loops.
+        allowPiece = True
+
+        # For all pieces above the proposed spot:
+        for i in range(x - 1, uBound - 1, -1):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempUp
+            # Otherwise, do not allow any pieces to be counted.
+            if board[x][y] == board[i][y + 1] and allowPiece:
+                tempUp += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces below the proposed spot:
+        for i in range(x + 1, dBound):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempDown
+            # Otherwise, do not allow any pieces to be counted.
+            if board[x][y] == board[i][y + 1] and allowPiece:
+                tempDown += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces right of the proposed spot:
+        for i in range(y + 2, rBound):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempRight
+            # Otherwise, do not allow any pieces to be counted.
+            if board[x][y] == board[x][i] and allowPiece:
+                tempRight += 1
+            else:
+                allowPiece = False
+
+        # --------------------------------------
+        # Determining weight of a swap
+        # --------------------------------------
+
+        # If the two opposing sides are at least a combined length of 2, then
+        # the weight of pieceRight is increased by their value
+        if (tempUp + tempDown) >= 2:
+            pieceRight += (tempUp + tempDown)
+
+        # If the standalone side has a length of 2, then the weight of
+        # pieceRight is increased by 2.
+        if tempRight == 2:
+            pieceRight += tempRight
+
+    # --------------------------------------------------------
+    # Swapping up
+    # --------------------------------------------------------
+
+    #  Checks if  piece immediately up is within bounds
+    if x - 1 >= uBound and swapTest(board, x, y, x - 1, y):
+
+        # Counts how many consecutive pieces in each cardinal direction of the proposed spot
+        # that have the same type as the suggested piece
+        tempUp = 0
+        tempRight = 0
+        tempLeft = 0
+
+        # Allows / Disallows a piece to be added in the for loops.
+        allowPiece = True
+
+        # For all pieces above the proposed spot:
+        for i in range(x - 2, uBound - 1):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempUp
+            # Otherwise, do not allow any pieces to be added
+            if board[x][y] == board[i][y] and allowPiece:
+                tempUp += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces right of the proposed spot:
+        for i in range(y + 1, rBound):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempRight
+            # Otherwise, do not allow any pieces to be added.
+            if board[x][y] == board[x-1][i] and allowPiece:
+                tempRight += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces left of the proposed spot
+        for i in range(y - 1, lBound - 1, -1):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempLeft
+            # Otherwise, do not allow any pieces to be added.
+            if board[x][y] == board[x-1][i] and allowPiece:
+                tempLeft += 1
+            else:
+                allowPiece = False
+
+        # --------------------------------------
+        # Determining weight of a swap
+        # --------------------------------------
+
+        # If the two opposing sides are at least a combined length of 2, then
+        # the weight of pieceLeft is increased by their value
+        if (tempLeft + tempRight) >= 2:
+            pieceUp += (tempLeft + tempRight)
+
+        # If the standalone side has a length of 2, then the weight of
+        # pieceLeft is increased by 2.
+        if tempUp == 2:
+            pieceUp += tempUp
+
+    # --------------------------------------------------------
+    # Swapping down
+    # --------------------------------------------------------
+
+    # Checks if piece immediately down is within bounds
+    if x + 1 < dBound and swapTest(board, x, y, x + 1, y):
+
+        # Counts how many consecutive pieces in each cardinal direction of the proposed spot
+        # that have the same type as the suggested piece
+        tempRight = 0
+        tempDown = 0
+        tempLeft = 0
+
+        # Allows / Disallows a piece to be added in the for loops.
+        allowPiece = True
+
+        # For all pieces below proposed spot:
+        for i in range(x + 2, dBound):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempDown
+            # Otherwise, do not allow any pieces to be added.
+            if board[x][y] == board[i][y] and allowPiece:
+                tempDown += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces right of proposed spot:
+        for i in range(y+1, rBound):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempRight
+            # Otherwise, do not allow any pieces to be added.
+            if board[x][y] == board[x+1][i] and allowPiece:
+                tempRight += 1
+            else:
+                allowPiece = False
+
+        # Resets the test
+        allowPiece = True
+
+        # For all pieces left of proposed spot:
+        for i in range(y - 1, lBound - 1, -1):
+            # If the pieces are consecutive and share the same value as
+            # the suggested piece, add one to tempLeft
+            # Otherwise, do not allow any pieces to be added.
+            if board[x][y] == board[x+1][i] and allowPiece:
+                tempLeft += 1
+            else:
+                allowPiece = False
+
+        # --------------------------------------
+        # Determining weight of a swap
+        # --------------------------------------
+
+        # If the two opposing sides are at least a combined length of 2, then
+        # the weight of pieceLeft is increased by their value
+        if tempLeft + tempRight >= 2:
+            pieceDown += tempLeft + tempRight
+
+        # If the standalone side has a length of 2, then the weight of
+        # pieceLeft is increased by 2.
+        if tempDown == 2:
+            pieceDown += tempDown
+
+    # ---------------------------------------------------------------
+    # Determining the best swap for a piece
+    # ---------------------------------------------------------------
+
+    # If - elif tree determines which swap case will be the best for a given piece.
+    # This is determined based on how many pieces a given swap will remove. The prioritization
+    # of assigning the greatest swap is:
+    # pieceLeft <-- pieceRight <-- pieceUp <-- pieceDown
+    # When the best swap is found, update tempValue to store the positions
+    # if the two pieces to swap and the weight of the swap
+    if pieceLeft >= pieceRight and pieceLeft >= pieceUp and pieceLeft >= pieceDown:
+        tempValue["pos"] = [x, y, x, y - 1]
+        tempValue["value"] = pieceLeft
+    elif pieceRight >= pieceLeft and pieceRight >= pieceUp and pieceRight >= pieceDown:
+        tempValue["pos"] = [x, y, x, y + 1]
+        tempValue["value"] = pieceRight
+    elif pieceUp >= pieceLeft and pieceUp >= pieceRight and pieceUp >= pieceDown:
+        tempValue["pos"] = [x, y, x - 1, y]
+        tempValue["value"] = pieceUp
+    elif pieceDown >= pieceLeft and pieceDown >= pieceRight and pieceDown >= pieceUp:
+        tempValue["pos"] = [x, y, x + 1, y]
+        tempValue["value"] = pieceDown
+
+    return tempValue
+
+
+def hint(board, swapTest=canSwap, pieces=None):
+    """
+    Identify two adjacent positions on the board that can be swapped to form a line.
+
+    Provide a hint to the user if a possible move is available on the board
+    if a move is not available then allow the user to restart or quit the game.
+    :param board: The game board to be checked
+    :param swapTest: The function used to check whether a swap makes a line.  It is
+                     called like canSwap(), which it defaults to.
+    :param pieces: the piece counts from countBoard() or a PieceIndex, which are
+                   counted if left out and a BURST is found
+    :return: The row and column of the first piece, followed by the row and
+             column of the second piece involved in the swap.  If no swap
+             is possible then -1, -1, -1, -1 is returned.
+    """
+
+    # maxValue will hold the position and weight of the current best swap
+    # The best swap will remove the most amount of pieces and is the furthest down the board
+    maxValue = {"pos": [-1, -1, -1, -1], "value": 0}
+
+    # Outer for-loops to loop through all pieces on the board, starting from the bottom right,
+    # then moving left down each row, then looping to the far right of the next row,
+    # until the top left of the board is reached. The limits had to be set to -1 in order for 0
+    # to be included in the loop iterations
+    for x in range(len(board) - 1, -1, -1):
+        for y in range(len(board[0]) - 1, -1, -1):
+
+            # A bomb is, by default, the best move available.
+            if board[x][y] == 6:
+                return burstHint(board, x, y, pieces)
+
+            # If a bomb is not found, then the best swap for the current piece
+            # is weighed against the best swap found so far
+            tempValue = hintAt(board, x, y, swapTest)
+
+            # ---------------------------------------------------------------------------------
+            # Determining if a swap is the best on the board
+            # ---------------------------------------------------------------------------------
+
+            # If the weight of the current best swap for a position is greater than the weight of
+            # the best spot currently saved for the board, update maxValue to contain the value
+            # of tempValue. The game prioritizes move found towards bottom of the board.
+            if maxValue.get("value", 0) < tempValue.get("value", 0):
+                maxValue.update(tempValue)
+
+    # Returns the tuple of the position of the pieces to swap
+    return tuple(maxValue.get("pos"))
+
+
+def countBoard(board):
+    """
+    Method name: countBoard()
+    Description: Counts the value of all pieces on the board.
+    :param board: The current state of the game board
+    :return: pieceCnts - a dictionary of all pieces counted
+    """
+    # Each key value with its respective piece type:
+    # 0 - "print"; 1 - "if"; 2 - "while"; 3 - "for"; 4 - "def"; 5 - "list"
+    # Games with more symbols get a key for each extra piece found on the board.
+    # A symbol with the same value as BURST is never counted.
+    pieceCnts = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+
+    for row in board:
+        for v in row:
+            # If the value of the piece we are looking at is a regular piece,
+            # its count in the dictionary is incremented
+            if v != EMPTY and v != BURST:
+                pieceCnts[v] = pieceCnts.get(v, 0) + 1
+
+    return pieceCnts
+
+
+def allSame(a, b, c, d=None, e=None):
+    if d == None and e == None:
+        if a % 10 == b % 10 and b % 10 == c % 10:
+            return True
+        return False
+    if e == None:
+        if a % 10 == b % 10 and b % 10 == c % 10 and c % 10 == d % 10:
+            return True
+        return False
+    if a % 10 == b % 10 and b % 10 == c % 10 and c % 10 == d % 10 and d % 10 == e % 10:
+        return True
+    return False
+
+
+# Every pattern that collapse() looks for, in the order it looks for them.
+# Each entry holds the name of the pattern, the cells it covers relative to
+# the cell collapse() starts checking from, which of those cells becomes a
+# BURST (or None), where the score pops up and the points it scores.  The
+# points of a pattern that makes a BURST are scored as they are, the rest are
+# multiplied by the score factor.
+# Patterns in the same group are checked together at each cell, the way the
+# T and L shapes are checked in collapse().
+H5 = ("5 horizontal", ((0, 0), (0, 1), (0, 2), (0, 3), (0, 4)), (0, 2), (0, 2), 1000)
+V5 = ("5 vertical", ((0, 0), (1, 0), (2, 0), (3, 0), (4, 0)), (2, 0), (2, 0), 1000)
+T_DOWN = ("T", ((0, 0), (0, -1), (0, 1), (1, 0), (2, 0)), (0, 0), (0, 0), 1000)
+T_UP = ("Upside down T", ((0, 0), (0, -1), (0, 1), (-1, 0), (-2, 0)), (0, 0), (0, 0), 1000)
+T_RIGHT = ("|--", ((0, 0), (-1, 0), (1, 0), (0, 1), (0, 2)), (0, 0), (0, 0), 1000)
+T_LEFT = ("--|", ((0, 0), (-1, 0), (1, 0), (0, -1), (0, -2)), (0, 0), (0, 0), 1000)
+L_UP_RIGHT = ("|_", ((0, 0), (-1, 0), (-2, 0), (0, 1), (0, 2)), (0, 0), (0, 0), 1000)
+L_UP_LEFT = ("_|", ((0, 0), (-1, 0), (-2, 0), (0, -1), (0, -2)), (0, 0), (0, 0), 1000)
+L_DOWN_RIGHT = ('|"', ((0, 0), (1, 0), (2, 0), (0, 1), (0, 2)), (0, 0), (0, 0), 1000)
+L_DOWN_LEFT = ('"|', ((0, 0), (1, 0), (2, 0), (0, -1), (0, -2)), (0, 0), (0, 0), 1000)
+H4 = ("4 horizontal", ((0, 0), (0, 1), (0, 2), (0, 3)), None, (0, 1), 60)
+V4 = ("4 vertical", ((0, 0), (1, 0), (2, 0), (3, 0)), None, (1, 0), 60)
+H3 = ("3 horizontal", ((0, 0), (0, 1), (0, 2)), None, (0, 1), 30)
+V3 = ("3 vertical", ((0, 0), (1, 0), (2, 0)), None, (1, 0), 30)
+
+# Each group is scanned with the rows in the given direction (-1 for bottom
+# to top, 1 for top to bottom) and the columns left to right
+PATTERN_GROUPS = [
+    (-1, [H5]),
+    (-1, [V5]),
+    (1, [T_DOWN, T_UP, T_RIGHT, T_LEFT, L_UP_RIGHT, L_UP_LEFT, L_DOWN_RIGHT, L_DOWN_LEFT]),
+    (-1, [H4]),
+    (-1, [V4]),
+    (-1, [H3]),
+    (-1, [V3]),
+]
+
+# Shapes that are not part of the standard game.  Put them in a copy of
+# PATTERN_GROUPS ahead of the shapes they contain, and pass that to collapse(),
+# to have them cleared as one match.  For example:
+#   [(-1, [H6]), (-1, [V6]), (1, [PLUS])] + PATTERN_GROUPS
+H6 = ("6 horizontal", ((0, 0), (0, 1), (0, 2), (0, 3), (0, 4), (0, 5)), (0, 2), (0, 2), 1000)
+V6 = ("6 vertical", ((0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0)), (2, 0), (2, 0), 1000)
+PLUS = ("+", ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)), (0, 0), (0, 0), 1000)
+
+# The compiled tables made by compileShapes(), one for each board size and
+# set of pattern groups
+SHAPE_TABLES = {}
+
+
+def compileShapes(rows, cols, groups=None):
+    """
+    Method Name: compileShapes()
+    Description: Turns the pattern groups into a table of every place each pattern
+    fits on a board of the given size, in the order collapse() checks them.  The
+    table is only built once for each board size and set of groups.
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param groups: the pattern groups to use, PATTERN_GROUPS if left out
+    :return: a tuple of the list of windows and a dictionary from each (row, column)
+             cell to the positions in that list of the windows that cover it.  Each
+             window is a tuple of the pattern, the row and column it starts at, and
+             the other cells it covers.
+    """
+    if groups is None:
+        groups = PATTERN_GROUPS
+    key = (rows, cols, tuple((direction, tuple(patterns)) for direction, patterns in groups))
+    if key in SHAPE_TABLES:
+        return SHAPE_TABLES[key]
+
+    windows = []
+    covering = {}
+    for direction, patterns in groups:
+        if direction == -1:
+            row_order = range(rows - 1, -1, -1)
+        else:
+            row_order = range(rows)
+        for r in row_order:
+            for c in range(cols):
+                for pattern in patterns:
+                    cells = [(r + dr, c + dc) for dr, dc in pattern[1]]
+                    if min(i for i, j in cells) < 0 or max(i for i, j in cells) >= rows or \
+                            min(j for i, j in cells) < 0 or max(j for i, j in cells) >= cols:
+                        continue
+                    for cell in cells:
+                        covering.setdefault(cell, []).append(len(windows))
+                    windows.append((pattern, r, c, tuple(cells[1:])))
+
+    SHAPE_TABLES[key] = (windows, covering)
+    return SHAPE_TABLES[key]
+
+
+def windowAt(board, window):
+    """
+    Method Name: windowAt()
+    Description: Checks one window from compileShapes() against the board
+    :param board: the game board
+    :param window: the window to check
+    :return: True if the pattern matches the way collapse() would see it
+    """
+    v = board[window[1]][window[2]]
+    if v == EMPTY or v == BURST:
+        return False
+    v = v % 10
+    for i, j in window[3]:
+        if board[i][j] % 10 != v:
+            return False
+    return True
+
+
+def patternAt(board, r, c, cells):
+    """
+    Method Name: patternAt()
+    Description: Checks a single place on the board for one of the patterns above
+    :param board: the game board
+    :param r: the row the pattern starts at
+    :param c: the column the pattern starts at
+    :param cells: the (row, column) offsets of the pattern
+    :return: True if the pattern matches the way collapse() would see it
+    """
+    v = board[r][c]
+    if v == EMPTY or v == BURST:
+        return False
+    for dr, dc in cells[1:]:
+        if board[r + dr][c + dc] % 10 != v % 10:
+            return False
+    return True
+
+
+def clearPattern(board, journal, r, c, pattern, sf, syncAnim, asyncAnim, clock=None):
+    """
+    Method Name: clearPattern()
+    Description: Clears one matched pattern from the board the way collapse() does,
+    leaving a BURST behind for the patterns that make one
+    :param board: the game board
+    :param journal: the Journal that records the change, and holds the pieces as
+                    they were before collapse() started
+    :param r: the row the pattern starts at
+    :param c: the column the pattern starts at
+    :param pattern: one of the patterns above
+    :param sf: the score factor
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param clock: the Clock the animations are timed by, GLOBAL_CLOCK if left out
+    :return: the new score factor
+    """
+    if clock is None:
+        clock = GLOBAL_CLOCK
+    name, cells, burst, at, points = pattern
+    now = clock.now()
+    for dr, dc in cells:
+        journal.set(board, r + dr, c + dc, EMPTY)
+    if burst is not None:
+        journal.set(board, r + burst[0], c + burst[1], BURST)
+        syncAnim.append(("crossfade", r + burst[0], c + burst[1],
+                         int(journal.before(board, r + burst[0], c + burst[1])), now))
+        amount = points
+    else:
+        amount = points * sf
+    asyncAnim.append(("score", r + at[0], c + at[1], int(journal.before(board, r, c)), amount, now, now + 1))
+    return sf + 1
+
+
+def collapse(board, syncAnim, asyncAnim, sf, num_syms, dirty=None, groups=None, journal=None, rng=None,
+             clock=None):
+    """
+    Method Name: collapse()
+    Description: Clears every line and T/L shape on the board, leaving BURSTs behind
+    for the 5-lines and shapes, and starts the falls that refill the board.  The
+    patterns are checked one window at a time from the table made by
+    compileShapes(), in the order of PATTERN_GROUPS.
+    :param board: the game board
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param sf: the score factor
+    :param num_syms: the number of different pieces in play
+    :param dirty: an optional set of the (row, column) cells changed since the last
+                  call.  When it is passed in, only the patterns that overlap those
+                  cells are checked, and the set is updated for the next call.
+    :param groups: the pattern groups to look for, PATTERN_GROUPS if left out
+    :param journal: an optional Journal that records every change to the board
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :param clock: the Clock the animations are timed by, GLOBAL_CLOCK if left out
+    :return: 1 if nothing was cleared, otherwise the new score factor
+    """
+    if dirty is not None:
+        return collapseDirty(board, syncAnim, asyncAnim, sf, num_syms, dirty, groups, journal, rng, clock)
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    if clock is None:
+        clock = GLOBAL_CLOCK
+
+    #  print("Inside collapse...")
+
+    l1 = list(range(50))
+    l2 = list(range(50))
+    l3 = list(range(50))
+    l4 = list(range(50))
+    l5 = list(range(50))
+    rng.cosmetic.shuffle(l1)
+    rng.cosmetic.shuffle(l2)
+    rng.cosmetic.shuffle(l3)
+    rng.cosmetic.shuffle(l4)
+    rng.cosmetic.shuffle(l5)
+
+    # The journal remembers the pieces that get cleared, for the animations
+    if journal is None:
+        journal = Journal()
+    journal.begin()
+    sf, changed = clearMatches(board, journal, sf, syncAnim, asyncAnim, groups, None, clock)
+
+    # Destroy everything that has been changed to empty
+    num_destroyed = 0
+    if changed:
+        for c in range(len(board[0])):
+            for r in range(len(board)):
+                if board[r][c] == EMPTY:
+                    syncAnim.append(("destroy", r, c, journal.before(board, r, c), l1, clock.now(), clock.now() + 1))
+                    num_destroyed += 1
+
+    # print("num_destroyed is", num_destroyed)
+    if num_destroyed > 0:
+        time_delay = 1
+    else:
+        time_delay = 0
+
+    genFalls(board, time_delay, syncAnim, num_syms, None, journal, rng, clock)
+
+    if changed == False:
+        return 1
+    else:
+        return sf
+
+
+def inRun(board, r, c):
+    """
+    Method Name: inRun()
+    Description: Checks whether a cell is part of a row or column of 3 that match
+    the way windowAt() matches them.  Every pattern collapse() looks for is made
+    of such lines, so a cell that is not in one cannot be in a pattern.
+    :param board: the game board
+    :param r: the row of the cell
+    :param c: the column of the cell
+    :return: True if the cell is in a line of 3. False otherwise.
+    """
+    v = board[r][c] % 10
+    row = board[r]
+    cols = len(row)
+    run = 1
+    i = c - 1
+    while i >= 0 and row[i] % 10 == v:
+        run += 1
+        i -= 1
+    i = c + 1
+    while i < cols and row[i] % 10 == v:
+        run += 1
+        i += 1
+    if run >= 3:
+        return True
+
+    rows = len(board)
+    run = 1
+    i = r - 1
+    while i >= 0 and board[i][c] % 10 == v:
+        run += 1
+        i -= 1
+    i = r + 1
+    while i < rows and board[i][c] % 10 == v:
+        run += 1
+        i += 1
+    return run >= 3
+
+
+def clearMatches(board, journal, sf, syncAnim, asyncAnim, groups=None, dirty=None, clock=None):
+    """
+    Method Name: clearMatches()
+    Description: The part of collapse() that clears every pattern on the board,
+    without destroying or refilling anything.  Nothing random happens here, so
+    the same board always gives the same result.
+    :param board: the game board
+    :param journal: the Journal that records the changes
+    :param sf: the score factor
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param groups: the pattern groups to look for, PATTERN_GROUPS if left out
+    :param dirty: an optional set of the cells changed since the board last had no
+                  patterns on it.  Only the patterns covering them are checked.
+    :param clock: the Clock the animations are timed by, GLOBAL_CLOCK if left out
+    :return: a tuple of the new score factor and True if anything was cleared
+    """
+    changed = False
+    windows, covering = compileShapes(len(board), len(board[0]), groups)
+    if dirty is not None:
+        # The windows that cover a dirty cell, in the order collapse() checks them.
+        # Each cell of the usual patterns is in a line of 3 within the pattern, so
+        # a dirty cell that is not in one can be skipped.
+        found = set()
+        for cell in dirty:
+            if groups is None and not inRun(board, cell[0], cell[1]):
+                continue
+            found.update(covering.get(cell, ()))
+        windows = [windows[i] for i in sorted(found)]
+
+    for window in windows:
+        if windowAt(board, window):
+            sf = clearPattern(board, journal, window[1], window[2], window[0], sf, syncAnim, asyncAnim, clock)
+            changed = True
+    return (sf, changed)
+
+
+def allCells(board):
+    """
+    Method Name: allCells()
+    Description: Lists every cell on the board, for marking the whole board as dirty
+    :param board: the game board
+    :return: a set of (row, column) tuples
+    """
+    cells = set()
+    for r in range(len(board)):
+        for c in range(len(board[0])):
+            cells.add((r, c))
+    return cells
+
+
+def collapseDirty(board, syncAnim, asyncAnim, sf, num_syms, dirty, groups=None, journal=None, rng=None,
+                  clock=None):
+    """
+    Method Name: collapseDirty()
+    Description: The version of collapse() used when the dirty cells are known.  A
+    board that has been collapsed has no lines left on it, so any new line has to
+    cover a cell that changed since.  Only those places are checked, in the same
+    order collapse() checks the whole board, which gives the same result.
+    :param board: the game board
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param sf: the score factor
+    :param num_syms: the number of different pieces in play
+    :param dirty: the set of (row, column) cells changed since the last call.  Every
+                  EMPTY cell must be in it.
+    :param groups: the pattern groups to look for, PATTERN_GROUPS if left out
+    :param journal: an optional Journal that records every change to the board
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :param clock: the Clock the animations are timed by, GLOBAL_CLOCK if left out
+    :return: 1 if nothing was cleared, otherwise the new score factor
+    """
+    # Nothing has changed since the last call, so there is nothing to do
+    if len(dirty) == 0:
+        return 1
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    if clock is None:
+        clock = GLOBAL_CLOCK
+
+    l1 = list(range(50))
+    l2 = list(range(50))
+    l3 = list(range(50))
+    l4 = list(range(50))
+    l5 = list(range(50))
+    rng.cosmetic.shuffle(l1)
+    rng.cosmetic.shuffle(l2)
+    rng.cosmetic.shuffle(l3)
+    rng.cosmetic.shuffle(l4)
+    rng.cosmetic.shuffle(l5)
+
+    if journal is None:
+        journal = Journal()
+    journal.begin()
+    start = len(journal.changes)
+    sf, changed = clearMatches(board, journal, sf, syncAnim, asyncAnim, groups, dirty, clock)
+
+    # Every cell the patterns covered has changed, to EMPTY or to a new BURST
+    cleared = set()
+    bursts = set()
+    for (r, c, old, new) in journal.changes[start:]:
+        cleared.add((r, c))
+        if new == BURST:
+            bursts.add((r, c))
+
+    # Destroy everything that has been changed to empty, column by column
+    dirty.update(cleared)
+    num_destroyed = 0
+    if changed:
+        for r, c in sorted(dirty, key=lambda rc: (rc[1], rc[0])):
+            if board[r][c] == EMPTY:
+                syncAnim.append(("destroy", r, c, journal.before(board, r, c), l1, clock.now(), clock.now() + 1))
+                num_destroyed += 1
+
+    if num_destroyed > 0:
+        time_delay = 1
+    else:
+        time_delay = 0
+
+    genFalls(board, time_delay, syncAnim, num_syms, dirty, journal, rng, clock)
+
+    # A new BURST may not be in a column that falls, but it has still changed
+    dirty.update(bursts)
+
+    if changed == False:
+        return 1
+    else:
+        return sf
+
+
+def genFalls(board, time_delay, syncAnim, num_syms, dirty=None, journal=None, rng=None, clock=None):
+    # Add falling to the animation queue
+    # When a set of dirty cells is passed in, only the columns holding one of them
+    # are looked at (every EMPTY cell is always dirty), and the set is replaced
+    # with the cells that the falls are about to change.  A journal, if there is
+    # one, records the pieces lifted off the board to fall.  The new pieces come
+    # from the refill stream of rng, GLOBAL_RANDOM's if there is none, and the
+    # falls are timed by clock, GLOBAL_CLOCK if there is none.
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    if clock is None:
+        clock = GLOBAL_CLOCK
+    if dirty is None:
+        columns = range(len(board[0]))
+    else:
+        columns = sorted(set(c for (r, c) in dirty))
+        dirty.clear()
+
+    start = clock.now() + time_delay
+    falls = []
+    for c in columns:
+        # One pass up the column counts the blanks below each piece, which is
+        # how far it falls
+        b = 0
+        lowest = -1
+        moved = []
+        for r in range(len(board) - 1, -1, -1):
+            if board[r][c] == EMPTY:
+                if b == 0:
+                    lowest = r
+                b += 1
+            elif b > 0:
+                moved.append(("fall", r, c, board[r][c], b, start, start + b * 0.2))
+                if journal is not None:
+                    journal.set(board, r, c, EMPTY)
+                else:
+                    board[r][c] = EMPTY
+
+        if b > 0:
+            for i in range(b):
+                # New piece falling in from the top of the board
+                falls.append(("fall", -1 - i, c, rng.refill.randrange(num_syms), b, start, start + b * 0.2))
+
+            # Everything from the lowest blank up to the top of the column moves
+            if dirty is not None:
+                for i in range(lowest + 1):
+                    dirty.add((i, c))
+
+        # Pieces within the board fall, listed from the top down
+        moved.reverse()
+        falls.extend(moved)
+
+    # The falls go in front of everything already queued, last one first
+    falls.reverse()
+    syncAnim[:0] = falls
+
+
+def blanksBelow(board, r, c):
+    count = 0
+    for i in range(r + 1, len(board)):
+        if board[i][c] == EMPTY:
+            count = count + 1
+    return count
+
+
+def nonBlanksAbove(board, row, col, num, num_syms, rng=None):
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    r = row - 1
+    count = 0
+    while r >= 0 and count != num:
+        if board[r][col] != EMPTY:
+            count = count + 1
+        r = r - 1
+
+    if r >= 0:
+        return board[r][col], r
+    else:
+        return rng.refill.randrange(num_syms), -1
+
+
+def blanksImmediatelyAbove(board, row, col):
+    count = 0
+    r = row - 1
+    while r >= 0 and board[r][col] == EMPTY:
+        r = r - 1
+        count = count + 1
+
+    return count
+
+
+def nextAbove(board, r, c):
+    if board[r][c] != EMPTY:
+        raise "Error: nextAbove called on a non-empty location"
+
+    while r >= 0:
+        if board[r][c] != EMPTY:
+            return r
+        r = r - 1
+
+    return r
+
+
+def hasAnimType(anims, t):
+    for a in anims:
+        if a[0] == t:
+            return True
+    return False
+
+
+def applyAnims(board, syncAnim, asyncAnim, journal=None):
+    """
+    Method Name: applyAnims()
+    Description: Makes the board changes held in the animation queues right away
+    instead of waiting for the animations to play out.  This is what lets the
+    game run without a window.
+    :param board: the game board
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param journal: an optional Journal that records the changes
+    :return: points - the total of all score animations that were queued
+    """
+    if journal is None:
+        journal = Journal()
+
+    # A piece is destroyed before anything falls into its place
+    for anim in syncAnim:
+        if anim[0] == "destroy":
+            journal.set(board, anim[1], anim[2], EMPTY)
+    for anim in syncAnim:
+        if anim[0] == "fall":
+            journal.set(board, anim[1] + anim[4], anim[2], anim[3])
+
+    points = 0
+    for anim in asyncAnim:
+        if anim[0] == "score":
+            points += anim[4]
+
+    del syncAnim[:]
+    del asyncAnim[:]
+    return points
+
+
+def settle(board, num_syms, sf=1, dirty=None, journal=None, rng=None):
+    """
+    Method Name: settle()
+    Description: Runs collapse() and the falls it creates until the board stops
+    changing, the same way play() does between moves but without animations
+    :param board: the game board
+    :param num_syms: the number of different pieces in play
+    :param sf: the score factor to start from
+    :param dirty: the cells changed since the board last settled.  Leave it out
+                  to check the whole board.
+    :param journal: an optional Journal that records every change to the board
+    :param rng: the GameRandom for the new pieces, GLOBAL_RANDOM if left out
+    :return: points - the score earned while the board settled
+    """
+    if dirty is None:
+        dirty = allCells(board)
+
+    syncAnim = []
+    asyncAnim = []
+    points = 0
+    while True:
+        sf = collapse(board, syncAnim, asyncAnim, sf, num_syms, dirty, None, journal, rng)
+        if len(syncAnim) == 0:
+            return points
+        points += applyAnims(board, syncAnim, asyncAnim, journal)
+
+
+def playMove(board, r1, c1, r2, c2, num_syms, journal=None, rng=None):
+    """
+    Method Name: playMove()
+    Description: Plays one move the way a click does in play() and settles the
+    board afterwards.  The board should already be settled.
+    :param board: the game board
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param num_syms: the number of different pieces in play
+    :param journal: an optional Journal.  Every change the move makes is recorded
+                    in it as one move that journal.undo() can take back.
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :return: the score earned by the move, or -1 if the move is not allowed
+    """
+    if not (r1 == r2 and abs(c1 - c2) == 1 or c1 == c2 and abs(r1 - r2) == 1):
+        return -1
+
+    syncAnim = []
+    asyncAnim = []
+    dirty = set([(r1, c1), (r2, c2)])
+    if isBurstSwap(board, r1, c1, r2, c2):
+        if journal is not None:
+            journal.mark()
+        burstSwap(board, r1, c1, r2, c2, syncAnim, asyncAnim, time(), dirty, None, journal, rng)
+        points = applyAnims(board, syncAnim, asyncAnim, journal)
+    elif canSwap(board, r1, c1, r2, c2):
+        if journal is not None:
+            journal.mark()
+        swap(board, r1, c1, r2, c2, journal)
+        points = 0
+    else:
+        return -1
+
+    return points + settle(board, num_syms, 1, dirty, journal, rng)
+
+
+def isBurstSwap(board, r1, c1, r2, c2):
+    """
+    Method Name: isBurstSwap()
+    Description: Reports whether a swap pairs a BURST with a regular piece
+    :param board: the game board
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :return: True if exactly one of the two pieces is a BURST. False otherwise
+    """
+    return (board[r1][c1] == BURST) != (board[r2][c2] == BURST)
+
+
+def burstSwap(board, r1, c1, r2, c2, syncAnim, asyncAnim, st, dirty=None, pieces=None, journal=None, rng=None,
+              clock=None):
+    """
+    Method Name: burstSwap()
+    Description: Swaps a BURST with a neighbouring piece and destroys every piece
+    on the board that shares the neighbour's symbol
+    :param board: the game board
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param st: the time the swap animation starts
+    :param dirty: an optional set of dirty cells for collapse(), which gets every
+                  cell that is destroyed
+    :param pieces: an optional PieceIndex that is up to date with the board.  The
+                   pieces to destroy are looked up in it instead of searching the
+                   board for them.  Only the swap is recorded in it, the cells
+                   destroyed are left for the caller to update.
+    :param journal: an optional Journal that records the changes
+    :param rng: the GameRandom whose cosmetic stream orders the destroy
+                animations, GLOBAL_RANDOM if left out
+    :param clock: the Clock the destroy animations are timed by, GLOBAL_CLOCK if
+                  left out
+    :return: none - modifies the game board and the animation queues
+    """
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    if clock is None:
+        clock = GLOBAL_CLOCK
+
+    # Make sure that (r1, c1) is the BURST and (r2, c2) is the piece it is swapped with
+    if board[r2][c2] == BURST and board[r1][c1] != BURST:
+        r1, r2 = r2, r1
+        c1, c2 = c2, c1
+
+    target_color = board[r2][c2]
+    syncAnim.append(("swap", r1, c1, board[r1][c1], r2, c2, board[r2][c2], st, st + 0.5))
+    swap(board, r1, c1, r2, c2, journal)
+
+    # Every piece of the target colour is destroyed, along with any empty cells
+    if pieces is not None:
+        pieces.update([(r1, c1), (r2, c2)])
+        destroyed = pieces.cells.get(target_color, set()) | pieces.cells.get(EMPTY, set())
+    else:
+        destroyed = set()
+        for r in range(len(board)):
+            for c in range(len(board[0])):
+                if board[r][c] == target_color or board[r][c] == EMPTY:
+                    destroyed.add((r, c))
+
+    l1 = list(range(50))
+    st = clock.now()
+    for (r, c) in sorted(destroyed):
+        l1 = list(range(50))
+        rng.cosmetic.shuffle(l1)
+        syncAnim.append(("destroy", r, c, target_color, l1, st + 0.5, st + 1.5))
+        asyncAnim.append(("score", r, c, target_color, 30, st + 0.5))
+        if dirty is not None:
+            dirty.add((r, c))
+    syncAnim.append(("destroy", r2, c2, BURST, l1, st + 0.5, st + 1.5))
+    asyncAnim.append(("score", r2, c2, target_color, 30, st + 0.5))
+    if dirty is not None:
+        dirty.add((r2, c2))
+
+    if journal is None:
+        journal = Journal()
+    journal.set(board, r2, c2, EMPTY)
+    journal.set(board, r1, c1, EMPTY)
+
+
+def resolveSteps(board, num_syms, sf, dirty, journal, rng, steps):
+    """
+    Method Name: resolveSteps()
+    Description: Runs collapse() and the falls it creates until the board stops
+    changing, the way settle() does, keeping each pass as a step of a timeline.
+    Each step is timed from 0 by a ManualClock, and starts when the animations of
+    the one before it have finished.
+    :param board: the game board, which is settled
+    :param num_syms: the number of different pieces in play
+    :param sf: the score factor to start from
+    :param dirty: the cells changed since the board last settled
+    :param journal: the Journal that records every change to the board
+    :param rng: the GameRandom for the animations and the new pieces
+    :param steps: the list of steps to add to
+    :return: points - the score earned while the board settled
+    """
+    points = 0
+    while True:
+        if len(steps) == 0:
+            offset = 0.0
+        else:
+            offset = steps[-1]["offset"] + max(animationEnd(anim) for anim in steps[-1]["sync"])
+        syncAnim = []
+        asyncAnim = []
+        start = len(journal.changes)
+        sf = collapse(board, syncAnim, asyncAnim, sf, num_syms, dirty, None, journal, rng, ManualClock())
+        if len(syncAnim) == 0:
+            return points
+        steps.append({"offset": offset, "changes": [(r, c, new) for (r, c, old, new) in journal.changes[start:]],
+                      "sync": syncAnim[:], "async": asyncAnim[:]})
+        points += applyAnims(board, syncAnim, asyncAnim, journal)
+
+
+def resolveCascade(board, num_syms, sf=1, dirty=None, rng=None):
+    """
+    Method Name: resolveCascade()
+    Description: Works out how a board settles as a timeline that play() can play
+    back without running any rules.  Each step of the timeline is a dictionary
+    holding its "offset", the seconds after the timeline starts that it would
+    start if every frame were on time, the "changes" it makes to the board as it
+    starts, as (row, column, piece) in order, and the "sync" and "async"
+    animations it adds to the queues, timed from 0: the pieces cleared
+    ("destroy"), the BURSTs made ("crossfade"), the pieces that fall and the new
+    ones that fall in from above the board ("fall", from a negative row) and the
+    points scored ("score").  The animations finish the changes when they end.
+    :param board: the game board, which is not changed
+    :param num_syms: the number of different pieces in play
+    :param sf: the score factor to start from
+    :param dirty: the cells changed since the board last settled.  Leave it out
+                  to check the whole board.
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :return: a dictionary holding the "steps", the "points" they score, the
+             settled "board" and every cell they change, as a set of (row, column)
+             in "changed"
+    """
+    after = [row[:] for row in board]
+    if dirty is None:
+        dirty = allCells(after)
+    journal = Journal()
+    steps = []
+    points = resolveSteps(after, num_syms, sf, set(dirty), journal, rng, steps)
+    return {"steps": steps, "points": points, "board": after,
+            "changed": set((r, c) for (r, c, old, new) in journal.changes)}
+
+
+def resolveMove(board, r1, c1, r2, c2, num_syms, rng=None, pieces=None):
+    """
+    Method Name: resolveMove()
+    Description: Works out a move the way playMove() plays it, as a timeline
+    that play() can play back.  The first step is the swap itself, or the swap
+    and back of a move that is not allowed.  See resolveCascade() for the steps.
+    :param board: the game board, which should be settled.  It is not changed.
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param num_syms: the number of different pieces in play
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :param pieces: an optional PieceIndex that is up to date with the board.  It
+                   is not changed.  A BURST swap looks its pieces up in a copy of
+                   it, which is brought up to date with the board the timeline
+                   ends with.
+    :return: the timeline dictionary of resolveCascade(), also holding "legal",
+             False if the move is not allowed, and "pieces", the copy of the
+             PieceIndex, or None if the move is not a BURST swap.  A move that is
+             not allowed scores nothing and leaves the board as it was.
+    """
+    after = [row[:] for row in board]
+    journal = Journal()
+    syncAnim = []
+    asyncAnim = []
+    dirty = set([(r1, c1), (r2, c2)])
+    legal = True
+    copied = None
+    if isBurstSwap(after, r1, c1, r2, c2):
+        # Only a BURST swap needs the index, so only it pays for the copy
+        if pieces is not None:
+            copied = pieces.copy(after)
+        burstSwap(after, r1, c1, r2, c2, syncAnim, asyncAnim, 0.0, dirty, copied, journal, rng, ManualClock())
+    elif canSwap(after, r1, c1, r2, c2):
+        syncAnim.append(("swap", r1, c1, after[r1][c1], r2, c2, after[r2][c2], 0.0, 0.5))
+        swap(after, r1, c1, r2, c2, journal)
+    else:
+        syncAnim.append(("swap_and_back", r1, c1, after[r1][c1], r2, c2, after[r2][c2], 0.0, 0.75))
+        legal = False
+
+    steps = [{"offset": 0.0, "changes": [(r, c, new) for (r, c, old, new) in journal.changes],
+              "sync": syncAnim[:], "async": asyncAnim[:]}]
+    points = 0
+    if legal:
+        points = applyAnims(after, syncAnim, asyncAnim, journal)
+        points += resolveSteps(after, num_syms, 1, dirty, journal, rng, steps)
+    changed = set((r, c) for (r, c, old, new) in journal.changes)
+    if copied is not None:
+        copied.update(changed)
+    return {"legal": legal, "steps": steps, "points": points, "board": after, "changed": changed,
+            "pieces": copied}
+
+
+def startStep(board, step, syncAnim, asyncAnim, st):
+    """
+    Method Name: startStep()
+    Description: Starts one step of a timeline from resolveCascade() or
+    resolveMove(), making its changes to the board and queueing its animations
+    :param board: the game board being drawn
+    :param step: the step
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param st: the time the step starts
+    :return: none
+    """
+    for (r, c, v) in step["changes"]:
+        board[r][c] = v
+    for anim in step["sync"]:
+        syncAnim.append(shiftAnim(anim, st))
+    for anim in step["async"]:
+        asyncAnim.append(shiftAnim(anim, st))
+
+
+def legalMoves(board):
+    """
+    Method Name: legalMoves()
+    Description: Lists every swap that play() would accept
+    :param board: the game board
+    :return: a list of (r1, c1, r2, c2) swaps, the second piece to the right of or
+             below the first
+    """
+    moves = []
+    for r in range(len(board)):
+        for c in range(len(board[0])):
+            for (r2, c2) in [(r, c + 1), (r + 1, c)]:
+                if r2 < len(board) and c2 < len(board[0]) and \
+                        (isBurstSwap(board, r, c, r2, c2) or canSwap(board, r, c, r2, c2)):
+                    moves.append((r, c, r2, c2))
+    return moves
+
+
+# Determine whether or not a function exists in the namespace at the time
+# this function is called
+# Parameters:
+#   name: The name of the function to check the existence of
+# Returns: True if the function exists, False otherwise
+def functionExists(name):
+    members = inspect.getmembers(sys.modules[__name__])
+    for (n, m) in members:
+        if n == name and inspect.isfunction(m):
+            return True
+    return False
+
+
+# Run a series of tests on the createBoard function
+# Parameters: (None)
+# Returns: True if all tests passed.  False if any test fails.
+def test_createBoard():
+    print("Testing createBoard...")
+    # Does the createBoard function exist?
+
+    if functionExists("createBoard"):
+        print("  The function seems to exist...")
+    else:
+        print("  The createBoard function doesn't seem to exist...")
+        return False
+
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3)]:
+        # Try and call the function
+        try:
+            print("  Attempting to create a board: %d rows, %d columns and %d symbols... " % (rows, cols, syms), end="")
+            b = createBoard(rows, cols, syms)
+        except Exception as e:
+            print("\n  An exception occurred during the attempt.")
+            traceback.print_exc(file=sys.stdout)
+            return False
+
+        # Does it have the correct return type?
+        if type(b) is not list:
+            print("\n  The value returned was a", str(type(b)) + ", not a list.")
+            return False
+
+        # Does the list have the corret number of elements?
+        if len(b) != rows:
+            print("\n  The board had", len(b), "rows when", rows, "were expected.")
+            return False
+
+        # Is each row a list?  Does each row have the correct length?
+        for i in range(len(b)):
+            if type(b[i]) is not list:
+                print("\n  The row at index", i, "is a", str(type(b[i])) + ", not a list.")
+                return False
+            if len(b[i]) != cols:
+                print("\n  The row at index", i, "had", len(b[i]), "elements when", cols, "were expected.")
+                return False
+
+        # Is every space on the board populated with an integer value between
+        # 0 and syms (not including syms)?
+        for r in range(0, len(b)):
+            for c in range(0, len(b[r])):
+                if type(b[r][c]) is not int:
+                    print("\n  The value in row", r, "column", c, "is a", str(type(b[r][c])) + ", not an integer")
+                    return False
+                if b[r][c] < 0 or b[r][c] >= syms:
+                    print("\n  The integer in row", r, "column", c, "is a", b[r][c],
+                          "which is less than 0 or greater than", syms - 1)
+                    return False
+        print("Success.")
+
+    print()
+    return True
+
+
+#
+# Run a series of tests on the hLineAt function
+# Parameters: (None)
+# Returns: True if all tests passed.  False otherwise.
+def test_hLineAt():
+    print("Testing hLineAt...")
+
+    # Does the hLineAt function exist?
+    if functionExists("hLineAt"):
+        print("  The function seems to exist...")
+    else:
+        print("  The hLineAt function doesn't seem to exist...\n")
+        return
+
+    passed = 0
+    failed = 0
+    for (b, r, c, a) in [ \
+            ([[0, 0, 0, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 0, True), \
+            ([[0, 0, 0, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 1, True), \
+            ([[0, 0, 0, 3, 4], \
+              [1, 2, 3, 1, 2], \
+              [3, 4, 5, 2, 3], \
+              [4, 5, 1, 4, 5], \
+              [1, 2, 3, 0, 1], \
+              [0, 1, 2, 5, 0]], 0, 2, True), \
+            ([[0, 0, 0, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 3, False), \
+            ([[0, 0, 0, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 1, 0, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 6, True), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 5, True), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 4, True), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 3, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 5, True), \
+            ([[2, 3, 4, 2, 3, 4], \
+              [1, 2, 3, 5, 1, 2], \
+              [3, 4, 5, 1, 2, 3], \
+              [4, 5, 1, 3, 4, 5], \
+              [1, 2, 3, 5, 0, 1], \
+              [0, 1, 2, 0, 0, 0]], 0, 5, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 0, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [0, 0, 5, 0, 1, 2, 0], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 2, 0, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [0, 0, 5, 0, 1, 2, 0], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 2, 6, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [0, 0, 5, 0, 1, 2, 0], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 2, 6, False)]:
+
+        # Attempt the function call
+        try:
+            print("  Attempting to use hLineAt with row", r, "and column", c, "... ", end="")
+            result = hLineAt(b, r, c)
+        except Exception as e:
+            print("\nFAILED: An exception occurred during the attempt.")
+            print("The board was:")
+            pprint(b)
+            print()
+            traceback.print_exc(file=sys.stdout)
+            failed += 1
+            continue
+
+        # Does it have the correct return type?
+        if type(result) is not bool:
+            print("\nFAILED: The value returned was a", str(type(result)) + ", not a Boolean.")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        # Did it return the correct value
+        if result != a:
+            print("\nFAILED: The value returned was", str(result), "when", str(a), "was expected.")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the hLineAt function
+# Parameters: (None)
+# Returns: True if all tests passed.  False otherwise.
+def test_vLineAt():
+    print("Testing vLineAt...")
+
+    # Does the vLineAt function exist?
+    if functionExists("vLineAt"):
+        print("  The function seems to exist...")
+    else:
+        print("  The vLineAt function doesn't seem to exist...\n")
+        return
+
+    passed = 0
+    failed = 0
+    for (b, r, c, a) in [ \
+            ([[0, 1, 0, 1, 2, 3, 4], \
+              [0, 2, 3, 4, 5, 1, 2], \
+              [0, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 0, True), \
+            ([[0, 2, 1, 1, 2, 3, 4], \
+              [0, 2, 3, 4, 5, 1, 2], \
+              [0, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 1, 0, True), \
+            ([[0, 2, 1, 3, 4], \
+              [0, 2, 3, 1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, 1, 4, 5], \
+              [1, 2, 3, 0, 1], \
+              [0, 1, 2, 5, 0]], 2, 0, True), \
+            ([[0, 5, 2, 1, 2, 3, 4], \
+              [0, 2, 3, 4, 5, 1, 2], \
+              [0, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 3, 0, False), \
+            ([[0, 5, 3, 1, 2, 3, 4], \
+              [0, 2, 3, 4, 5, 1, 2], \
+              [0, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 1, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 2], \
+              [1, 2, 3, 4, 5, 0, 2], \
+              [0, 1, 2, 3, 5, 4, 2]], 5, 6, True), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 4], \
+              [1, 2, 3, 4, 5, 0, 4], \
+              [0, 1, 2, 3, 0, 2, 4]], 4, 6, True), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 5], \
+              [0, 1, 2, 3, 0, 0, 5]], 4, 6, True), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 3, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 0, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 5, True), \
+            ([[2, 3, 4, 2, 3, 0], \
+              [1, 2, 3, 5, 1, 0], \
+              [3, 4, 5, 1, 2, 3], \
+              [4, 5, 1, 3, 4, 5], \
+              [1, 2, 3, 5, 0, 1], \
+              [0, 1, 2, 0, 0, 0]], 0, 5, False), \
+            ([[0, 3, 4, 1, 2, 3, 4], \
+              [0, 2, 3, 4, 5, 1, 2], \
+              [3, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 0, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 4, 4, 5, 1, 2], \
+              [0, 0, 5, 0, 1, 2, 0], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 4, 3, 0, 0, 0]], 0, 2, False), \
+            ([[2, 3, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [0, 0, 5, 0, 1, 2, 0], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 2, 6, False), \
+            ([[2, 3, 4, 3, 2, 3, 4], \
+              [1, 2, 3, 3, 5, 1, 2], \
+              [0, 0, 5, 0, 1, 2, 0], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 3, 5, 0, 1], \
+              [0, 1, 2, 3, 0, 0, 0]], 5, 3, False)]:
+
+        # Attempt the function call
+        try:
+            print("  Attempting to use vLineAt with row", r, "and column", c, "... ", end="")
+            result = vLineAt(b, r, c)
+        except Exception as e:
+            print("\nFAILED: An exception occurred during the attempt.")
+            print("The board was:")
+            pprint(b)
+            print()
+            traceback.print_exc(file=sys.stdout)
+            failed += 1
+            continue
+
+        # Does it have the correct return type?
+        if type(result) is not bool:
+            print("\nFAILED: The value returned was a", str(type(result)) + ", not a Boolean.")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        # Did it return the correct value
+        if result != a:
+            print("\nFAILED: The value returned was", str(result), "when", str(a), "was expected.")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+# Run a series of tests on the swap function
+# Parameters: (None)
+# Returns: True if all tests passed.  False if any test fails.
+def test_swap():
+    print("Testing swap...")
+    # Does the swap function exist?
+
+    if functionExists("swap"):
+        print("  The function seems to exist...")
+    else:
+        print("  The swap function doesn't seem to exist...")
+        return False
+
+    for (board, r1, c1, r2, c2, ans) in [ \
+            ([[0, 1, 2, 3], \
+              [4, 5, 0, 1], \
+              [2, 3, 4, 5], \
+              [0, 1, 2, 3]],
+             0, 0, 1, 0, \
+             [[4, 1, 2, 3], \
+              [0, 5, 0, 1], \
+              [2, 3, 4, 5], \
+              [0, 1, 2, 3]]), \
+            ([[0, 1, 2, 3, 4], \
+              [4, 5, 0, 1, 3], \
+              [2, 3, 4, 5, 2], \
+              [0, 1, 2, 3, 1]],
+             3, 4, 3, 3, \
+             [[0, 1, 2, 3, 4], \
+              [4, 5, 0, 1, 3], \
+              [2, 3, 4, 5, 2], \
+              [0, 1, 2, 1, 3]]), \
+            ([[0, 1, 2, 3, 4], \
+              [4, 5, 0, 1, 3], \
+              [2, 3, 4, 5, 2], \
+              [4, 5, 0, 1, 3], \
+              [2, 3, 4, 5, 2], \
+              [0, 1, 2, 3, 1]],
+             4, 2, 5, 2, \
+             [[0, 1, 2, 3, 4], \
+              [4, 5, 0, 1, 3], \
+              [2, 3, 4, 5, 2], \
+              [4, 5, 0, 1, 3], \
+              [2, 3, 2, 5, 2], \
+              [0, 1, 4, 3, 1]]) \
+            ]:
+        # Try and call the function
+        try:
+            print("  Attempting to swap row %d col %d with row %d col %d... " % (r1, c1, r2, c2), end="")
+            old_board = deepcopy(board)
+            swap(board, r1, c1, r2, c2)
+        except Exception as e:
+            print("\n  An exception occurred during the attempt.")
+            traceback.print_exc(file=sys.stdout)
+            return False
+
+        # Does board still have the correct type?
+        if type(board) is not list:
+            print("\n  The value returned was a", str(type(board)) + ", not a list.")
+            return False
+
+        # Does the list have the corret number of elements?
+        if len(board) != len(old_board):
+            print("\n  The board had", len(board), "rows when", len(old_board), "were expected.")
+            return False
+
+        # Is each row a list?  Does each row have the correct length?
+        for i in range(len(board)):
+            if type(board[i]) is not list:
+                print("\n  The row at index", i, "is a", str(type(board[i])) + ", not a list.")
+                return False
+            if len(board[i]) != len(old_board[i]):
+                print("\n  The row at index", i, "had", len(board[i]), "elements when", len(old_board[i]),
+                      "were expected.")
+                return False
+
+        if board == ans:
+            print("Success.")
+        else:
+            print("\nThe swap function returned:")
+            pprint(board)
+            print("The expected result was:")
+            pprint(ans)
+            print()
+            return False
+
+    print()
+    return True
+
+
+#
+# Run a series of tests on the canSwap function
+# Parameters: (None)
+# Returns: True if all tests passed.  False otherwise.
+def test_canSwap():
+    print("Testing canSwap...")
+
+    # Does the canSwap function exist?
+    if functionExists("canSwap"):
+        print("  The function seems to exist...")
+    else:
+        print("  The canSwap function doesn't seem to exist...")
+        quit()
+
+    passed = 0
+    failed = 0
+    for (b, r1, c1, r2, c2, a) in [ \
+            ([[0, 1, 0, 1, 2, 3, 4], \
+              [2, 0, 3, 4, 5, 1, 2], \
+              [0, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 1, 1, 1, True), \
+            ([[0, 1, 0, 1, 2, 3, 4], \
+              [2, 2, 3, 4, 5, 1, 2], \
+              [0, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 1, 1, 1, False), \
+            ([[2, 1, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [1, 5, 1, 2, 3, 4, 5], \
+              [3, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 0, 0, 1, True), \
+            ([[2, 1, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [1, 5, 1, 2, 3, 4, 5], \
+              [3, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 1, 0, 0, True), \
+            ([[2, 1, 4, 1, 2, 3, 4], \
+              [1, 2, 3, 4, 5, 1, 2], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [3, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, 1, 0, 0, False), \
+            ([[3, 2, 1, 3, 4], \
+              [0, 2, 3, 1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, 1, 3, 1], \
+              [1, 2, 3, 0, 1], \
+              [0, 1, 2, 1, 0]], 5, 4, 5, 3, True), \
+            ([[3, 2, 1, 3, 4], \
+              [0, 2, 3, 1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, 1, 3, 1], \
+              [1, 2, 3, 0, 1], \
+              [0, 1, 2, 1, 0]], 5, 3, 5, 4, True), \
+            ([[3, 2, 1, 3, 4], \
+              [0, 2, 3, 1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, 1, 3, 1], \
+              [1, 2, 3, 0, 2], \
+              [0, 1, 2, 1, 0]], 5, 3, 5, 4, False), \
+            ]:
+
+        # Attempt the function call
+        try:
+            print("  Attempting to use canSwap with (%d, %d) and (%d, %d) ... " % (r1, c1, r2, c2), end="")
+            result = canSwap(b, r1, c1, r2, c2)
+        except Exception as e:
+            print("\nFAILED: An exception occurred during the attempt.")
+            print("The board was:")
+            pprint(b)
+            print()
+            traceback.print_exc(file=sys.stdout)
+            failed += 1
+            continue
+
+        # Does it have the correct return type?
+        if type(result) is not bool:
+            print("\nFAILED: The value returned was a", str(type(result)) + ", not a Boolean.")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        # Did it return the correct value
+        if result != a:
+            print("\nFAILED: The value returned was", str(result), "when", str(a), "was expected.")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the hint function
+# Parameters: (None)
+# Returns: True if all tests passed.  False otherwise.
+def test_hint():
+    print("Testing hint...")
+
+    # Does the hint function exist?
+    if functionExists("hint"):
+        print("  The function seems to exist...")
+    else:
+        print("  The hint function doesn't seem to exist...")
+        quit()
+
+    passed = 0
+    failed = 0
+    for (b, a1, a2, a3, a4) in [ \
+            ([[0, 1, 0, 2, 2, 3, 3], \
+              [4, 0, 4, 5, 5, 4, 4], \
+              [3, 3, 2, 2, 1, 1, 0], \
+              [4, 4, 5, 5, 4, 4, 2], \
+              [3, 3, 2, 2, 1, 1, 0], \
+              [4, 4, 5, 5, 4, 4, 2]], 0, 1, 1, 1), \
+            ([[0, 0, 1, 1, 2, 2, 3], \
+              [5, 5, 4, 4, 5, 5, 4], \
+              [0, 0, 1, 1, 2, 2, 3], \
+              [5, 5, 4, 4, 5, 5, 4], \
+              [0, 0, 1, 1, 2, 2, 3], \
+              [5, 5, 4, 4, 5, 5, 4]], -1, -1, -1, -1), \
+            ([[3, 5, 1, 3, 4], \
+              [0, 2, 3, 1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, 1, 3, 1], \
+              [1, 2, 3, 0, 2], \
+              [0, 1, 2, 1, 0]], -1, -1, -1, -1), \
+            ([[3, 0, 1, 3, 4], \
+              [0, 2, 3, 1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, 1, 3, 1], \
+              [1, 2, 3, 0, 2], \
+              [0, 1, 2, 1, 0]], 0, 0, 0, 1), \
+            ]:
+
+        # Attempt the function call
+        try:
+            print("  Attempting to use hint ... ", end="")
+            result = hint(b)
+        except Exception as e:
+            print("\nFAILED: An exception occurred during the attempt.")
+            print("The board was:")
+            pprint(b)
+            print()
+            traceback.print_exc(file=sys.stdout)
+            failed += 1
+            continue
+
+        # Does it have the correct return type?
+        if type(result) is not tuple:
+            print("\nFAILED: The value returned was a", str(type(result)) + ", not a tuple")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        if len(result) != 4:
+            print("\nFAILED: The length of the returned tuple was", len(result), "when it should have been 4")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        # Did it return the correct value
+        h1, h2, h3, h4 = result
+        if result != (a1, a2, a3, a4) and result != (a3, a4, a1, a2):
+            print("\nFAILED: The value returned was", h1, h2, h3, h4, "when", a1, a2, a3, a4, "or", a3, a4, a1, a2,
+                  "was expected.")
+            print("The board was:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the clearAll function
+# Parameters: (None)
+# Returns: True if all tests passed.  False otherwise.
+def test_clearAll():
+    print("Testing clearAll...")
+
+    # Does the clearAll function exist?
+    if functionExists("clearAll"):
+        print("  The function seems to exist...")
+    else:
+        print("  The clearAll function doesn't seem to exist...")
+        quit()
+
+    passed = 0
+    failed = 0
+    for (board, sym, ans) in [ \
+            ([[0, 1, 0, 1, 2, 3, 4], \
+              [2, 0, 3, 4, 5, 1, 2], \
+              [0, 4, 5, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, 0, 1], \
+              [0, 1, 2, 3, 4, 5, 0]], 0, \
+             [[-1, 1, -1, 1, 2, 3, 4], \
+              [2, -1, 3, 4, 5, 1, 2], \
+              [-1, 4, 5, -1, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4, 5], \
+              [1, 2, 3, 4, 5, -1, 1], \
+              [-1, 1, 2, 3, 4, 5, -1]]), \
+            ([[3, 5, 1, 3, 4], \
+              [0, 2, 3, 1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, 1, 3, 1], \
+              [1, 2, 3, 0, 2], \
+              [0, 1, 2, 1, 0]], 1, \
+             [[3, 5, -1, 3, 4], \
+              [0, 2, 3, -1, 2], \
+              [0, 4, 5, 2, 3], \
+              [4, 5, -1, 3, -1], \
+              [-1, 2, 3, 0, 2], \
+              [0, -1, 2, -1, 0]]) \
+            ]:
+
+        # Attempt the function call
+        try:
+            print("  Attempting to use clearAll with symbol %d ... " % sym, end="")
+            result = deepcopy(board)
+            clearAll(result, sym)
+        except Exception as e:
+            print("\nFAILED: An exception occurred during the attempt.")
+            print("The board was:")
+            pprint(board)
+            print()
+            traceback.print_exc(file=sys.stdout)
+            failed += 1
+            continue
+
+        # Does it have the correct return type?
+        if type(result) is not list:
+            print("\n  The value returned was a", str(type(result)) + ", not a list.")
+            return False
+
+        # Does the list have the corret number of elements?
+        if len(result) != len(board):
+            print("\n  The board had", len(result), "rows when", len(board), "were expected.")
+            return False
+
+        # Is each row a list?  Does each row have the correct length?
+        for i in range(len(result)):
+            if type(result[i]) is not list:
+                print("\n  The row at index", i, "is a", str(type(result[i])) + ", not a list.")
+                return False
+            if len(result[i]) != len(ans[i]):
+                print("\n  The row at index", i, "had", len(result[i]), "elements when", cols, "were expected.")
+                return False
+
+        # Did it return the correct value
+        if str(result) != str(ans):
+            print("\nFAILED: The value returned was:")
+            pprint(result)
+            print("when")
+            pprint(ans)
+            print("was expected.")
+            print("The board was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the playMove function
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_playMove():
+    print("Testing playMove...")
+
+    # Does the playMove function exist?
+    if functionExists("playMove"):
+        print("  The function seems to exist...")
+    else:
+        print("  The playMove function doesn't seem to exist...")
+        quit()
+
+    passed = 0
+    failed = 0
+    for (b, r1, c1, r2, c2, a) in [ \
+            ([[0, 1, 0, 1, 2], \
+              [2, 0, 3, 4, 5], \
+              [0, 4, 5, 0, 1], \
+              [4, 5, 1, 2, 3], \
+              [1, 2, 3, 4, 5]], 0, 1, 1, 1, True), \
+            ([[0, 1, 0, 1, 2], \
+              [2, 2, 3, 4, 5], \
+              [0, 4, 5, 0, 1], \
+              [4, 5, 1, 2, 3], \
+              [1, 2, 3, 4, 5]], 0, 1, 1, 1, False), \
+            ([[0, 1, 0, 1, 2], \
+              [2, 0, 3, 4, 5], \
+              [0, 4, 5, 0, 1], \
+              [4, 5, 1, 2, 3], \
+              [1, 2, 3, 4, 5]], 0, 1, 2, 1, False), \
+            ([[6, 1, 0, 1, 2], \
+              [1, 0, 3, 4, 5], \
+              [0, 4, 5, 0, 1], \
+              [4, 5, 1, 2, 3], \
+              [1, 2, 3, 4, 5]], 0, 0, 0, 1, True), \
+            ]:
+
+        # Attempt the function call
+        try:
+            print("  Attempting to use playMove with (%d, %d) and (%d, %d) ... " % (r1, c1, r2, c2), end="")
+            before = deepcopy(b)
+            result = playMove(b, r1, c1, r2, c2, 6)
+        except Exception as e:
+            print("\nFAILED: An exception occurred during the attempt.")
+            print("The board was:")
+            pprint(b)
+            print()
+            traceback.print_exc(file=sys.stdout)
+            failed += 1
+            continue
+
+        # A legal move scores at least one line of three and leaves a full board.
+        # An illegal move scores -1 and leaves the board alone.
+        if a and (result < 30 or EMPTY in [v for row in b for v in row]):
+            print("\nFAILED: The move scored", result, "and left the board:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+        if not a and (result != -1 or b != before):
+            print("\nFAILED: The illegal move scored", result, "and left the board:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests comparing collapse() with and without dirty cells
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_collapseDirty():
+    print("Testing collapse with dirty cells...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3), (12, 9, 3)]:
+        print("  Attempting to play 30 games: %d rows, %d columns and %d symbols... " % (rows, cols, syms), end="")
+        problem = None
+        for game in range(30):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            other = deepcopy(board)
+            dirty = allCells(other)
+            sf1 = 1
+            sf2 = 1
+
+            # Play the hinted move whenever the board settles, using the same
+            # random numbers for both boards
+            for step in range(60):
+                sync1, async1, sync2, async2 = [], [], [], []
+                seed(1000 * game + step)
+                sf1 = collapse(board, sync1, async1, sf1, syms)
+                seed(1000 * game + step)
+                sf2 = collapse(other, sync2, async2, sf2, syms, dirty)
+                if sf1 != sf2 or board != other or \
+                        [a[:4] for a in sync1] != [a[:4] for a in sync2] or \
+                        [a[:5] for a in async1] != [a[:5] for a in async2]:
+                    problem = step
+                    break
+
+                if len(sync1) == 0:
+                    r1, c1, r2, c2 = hint(board)
+                    if r1 == -1 or c2 < 0:
+                        break
+                    if isBurstSwap(board, r1, c1, r2, c2):
+                        burstSwap(board, r1, c1, r2, c2, sync1, async1, 0)
+                        burstSwap(other, r1, c1, r2, c2, sync2, async2, 0, dirty)
+                    else:
+                        swap(board, r1, c1, r2, c2)
+                        swap(other, r1, c1, r2, c2)
+                        dirty.add((r1, c1))
+                        dirty.add((r2, c2))
+                applyAnims(board, sync1, async1)
+                applyAnims(other, sync2, async2)
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED: collapse with dirty cells differed on game", game, "step", problem)
+            print("The board was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+
+#
+# Run a series of tests comparing evalSwaps() and swapClears() with swapping for real
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_evalSwaps():
+    print("Testing evalSwaps and swapClears...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3), (3, 3, 2)]:
+        print("  Attempting every swap on 30 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(30):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            # Scatter some empty cells and BURST pieces over the board too
+            for i in range(randrange(4)):
+                board[randrange(rows)][randrange(cols)] = EMPTY
+            for i in range(randrange(3)):
+                board[randrange(rows)][randrange(cols)] = BURST
+            before = deepcopy(board)
+
+            swaps = []
+            for r in range(rows):
+                for c in range(cols):
+                    if c + 1 < cols:
+                        swaps.append((r, c, r, c + 1))
+                    if r + 1 < rows:
+                        swaps.append((r, c, r + 1, c))
+            mask = evalSwaps(board, swaps)
+            if board != before:
+                problem = ("the board was changed", swaps[0])
+                break
+
+            for i in range(len(swaps)):
+                r1, c1, r2, c2 = swaps[i]
+                cleared = swapClears(board, r1, c1, r2, c2)
+                if board != before:
+                    problem = ("the board was changed", swaps[i])
+                    break
+
+                # Do the swap for real and look at the lines it makes
+                copy = deepcopy(board)
+                swap(copy, r1, c1, r2, c2)
+                expected = hLineAt(copy, r2, c2) or vLineAt(copy, r2, c2) or \
+                    hLineAt(copy, r1, c1) or vLineAt(copy, r1, c1)
+                if mask[i] != expected:
+                    problem = ("evalSwaps gave the wrong answer", swaps[i])
+                    break
+                for (r, c) in cleared:
+                    if copy[r][c] in (EMPTY, BURST) or \
+                            not (hLineAt(copy, r, c) or vLineAt(copy, r, c)):
+                        problem = ("swapClears gave a cell that is not in a line", swaps[i])
+                        break
+                normal = copy[r1][c1] not in (EMPTY, BURST) and copy[r2][c2] not in (EMPTY, BURST)
+                if problem is None and normal and (len(cleared) > 0) != expected:
+                    problem = ("swapClears and evalSwaps disagree", swaps[i])
+                if problem is not None:
+                    break
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "for the swap", problem[1], "on game", game)
+            print("The board was:")
+            pprint(before)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+
+#
+# Run a series of tests on the extra shapes that collapse() can be given
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_compileShapes():
+    print("Testing compileShapes...")
+
+    passed = 0
+    failed = 0
+    groups = [(-1, [H6]), (-1, [V6]), (1, [PLUS])] + PATTERN_GROUPS
+    for (b, g, a) in [ \
+            ([[0, 1, 2, 3, 4, 5], \
+              [1, 2, 0, 4, 5, 0], \
+              [2, 0, 0, 0, 1, 2], \
+              [3, 4, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4]], groups, [(2, 2, 1000)]), \
+            ([[0, 1, 2, 3, 4, 5], \
+              [1, 2, 0, 4, 5, 0], \
+              [2, 0, 0, 0, 1, 2], \
+              [3, 4, 0, 1, 2, 3], \
+              [4, 5, 1, 2, 3, 4]], None, [(2, 2, 30)]), \
+            ([[0, 1, 2, 3, 4, 5, 0], \
+              [3, 3, 3, 3, 3, 3, 1], \
+              [2, 0, 1, 0, 1, 2, 4]], groups, [(1, 2, 1000)]), \
+            ([[0, 1, 2, 3, 4, 5, 0], \
+              [3, 3, 3, 3, 3, 3, 1], \
+              [2, 0, 1, 0, 1, 2, 4]], None, [(1, 2, 1000)]), \
+            ]:
+
+        # Attempt the function call
+        print("  Attempting to collapse a board with %s shapes... " %
+              ("the extra" if g is not None else "the standard"), end="")
+        board = deepcopy(b)
+        syncAnim = []
+        asyncAnim = []
+        seed(0)
+        collapse(board, syncAnim, asyncAnim, 1, 6, None, g)
+        result = [(anim[1], anim[2], anim[4]) for anim in asyncAnim]
+
+        # Did we get the correct result?
+        if result != a:
+            print("\nFAILED: collapse gave the scores", result, "when", a, "was expected on the board:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # The table for a board is only built once
+    print("  Attempting to compile the shapes for the same board twice... ", end="")
+    if compileShapes(8, 8) is compileShapes(8, 8) and compileShapes(8, 8) is not compileShapes(8, 7):
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the shapes were compiled again")
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+
+#
+# Run a series of tests on the genFalls function
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_genFalls():
+    print("Testing genFalls...")
+
+    passed = 0
+    failed = 0
+    for (b, a) in [ \
+            ([[0, 1], \
+              [EMPTY, 2], \
+              [3, EMPTY], \
+              [EMPTY, 4]], [("fall", 0, 0, 0, 2), ("fall", 2, 0, 3, 1), ("fall", 1, 1, 2, 1), ("fall", 0, 1, 1, 1)]), \
+            ([[EMPTY, 1], \
+              [EMPTY, 2], \
+              [EMPTY, 3]], []), \
+            ([[0, 1], \
+              [2, 3]], []), \
+            ]:
+
+        # Attempt the function call, leaving out the new pieces which are random
+        print("  Attempting to drop the pieces on a %d by %d board... " % (len(b), len(b[0])), end="")
+        board = deepcopy(b)
+        syncAnim = [("crossfade", 0, 0, b[0][0], 0)]
+        genFalls(board, 0, syncAnim, 5)
+        result = [anim[:5] for anim in syncAnim if anim[0] == "fall" and anim[1] >= 0]
+        new = [anim for anim in syncAnim if anim[0] == "fall" and anim[1] < 0]
+        blanks = sum(row.count(EMPTY) for row in b)
+        last = syncAnim[-1]
+        applyAnims(board, syncAnim, [])
+
+        # Did we get the correct result?
+        if sorted(result) != sorted(a) or len(new) != blanks or last[0] != "crossfade" or \
+                sum(row.count(EMPTY) for row in board) != 0:
+            print("\nFAILED: genFalls gave the falls", result, "when", a, "was expected on the board:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # An empty tall board is refilled in one go
+    print("  Attempting to refill an empty 200 by 30 board... ", end="")
+    board = [[EMPTY] * 30 for r in range(200)]
+    syncAnim = []
+    genFalls(board, 0, syncAnim, 5)
+    applyAnims(board, syncAnim, [])
+    if sum(row.count(EMPTY) for row in board) == 0:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the board was not refilled")
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+
+#
+# Run a series of tests on undoing moves with a Journal
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_Journal():
+    print("Testing Journal...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3)]:
+        print("  Attempting to play and undo 15 moves in 10 games: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(10):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            settle(board, syms)
+            journal = Journal()
+            other = deepcopy(board)
+
+            # Play the hinted moves, keeping a copy of the board before each one
+            history = []
+            for step in range(15):
+                r1, c1, r2, c2 = hint(board)
+                if r1 == -1 or c2 < 0:
+                    break
+                history.append(deepcopy(board))
+                seed(100 * game + step)
+                points1 = playMove(board, r1, c1, r2, c2, syms, journal)
+                seed(100 * game + step)
+                points2 = playMove(other, r1, c1, r2, c2, syms)
+                if points1 != points2 or board != other:
+                    problem = ("the journal changed how the move played", step)
+                    break
+                if points1 == -1:
+                    history.pop()
+                    break
+            if problem is not None:
+                break
+
+            # Take the moves back one at a time
+            if journal.moveCount() != len(history):
+                problem = ("the journal did not hold every move", len(history))
+                break
+            while len(history) > 0:
+                journal.undo(board)
+                if board != history.pop():
+                    problem = ("undo did not restore the board", len(history))
+                    break
+            if problem is not None:
+                break
+            if journal.undo(board) or len(journal.changes) != 0:
+                problem = ("the journal was not empty after undoing every move", 0)
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on game", game, "move", problem[1])
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the separate random number streams
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_GameRandom():
+    print("Testing GameRandom...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (7, 7, 5), (6, 7, 4)]:
+        print("  Attempting to replay 5 seeded games: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(5):
+            # The same seed gives the same game whether or not the animations are
+            # shuffled, and without touching the random module
+            state = random.getstate()
+            games = []
+            for rng in [GameRandom(game), GameRandom(game, False)]:
+                board = createBoard(rows, cols, syms, rng)
+                scores = [settle(board, syms, 1, None, None, rng)]
+                boards = [deepcopy(board)]
+                for step in range(12):
+                    r1, c1, r2, c2 = hint(board)
+                    if r1 == -1:
+                        break
+                    scores.append(playMove(board, r1, c1, r2, c2, syms, None, rng))
+                    boards.append(deepcopy(board))
+                games.append((scores, boards))
+            if random.getstate() != state:
+                problem = "the random module was used"
+                break
+            if games[0] != games[1]:
+                problem = "shuffling the animations changed the game"
+                break
+            if createBoard(rows, cols, syms, GameRandom(game + 1)) == games[0][1][0]:
+                problem = "two seeds gave the same board"
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem, "on game", game)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # Without a GameRandom the random module is used, as it always was
+    print("  Attempting to use the random module when no streams are given... ", end="")
+    seed(3)
+    first = createBoard(8, 8, 6)
+    seed(3)
+    second = createBoard(8, 8, 6, GLOBAL_RANDOM)
+    if first == second:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: GLOBAL_RANDOM did not use the random module")
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the clocks the animations are timed by
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_Clock():
+    print("Testing Clock...")
+
+    passed = 0
+    failed = 0
+
+    # Plays out the cascades on a seeded board the way play() does, finishing
+    # the animations that have ended in the order they end.  With fast set,
+    # every frame jumps the clock to the end of the syncAnim queue, the way a
+    # click does.
+    def playOut(clock, fast, frames=90):
+        rng = GameRandom(4)
+        board = createBoard(8, 8, 6, rng)
+        dirty = allCells(board)
+        syncAnim = []
+        asyncAnim = []
+        sf = collapse(board, syncAnim, asyncAnim, 1, 6, dirty, None, None, rng, clock)
+        for step in range(frames):
+            clock.tick()
+            for anim in sorted(syncAnim, key=animationEnd):
+                if animationEnd(anim) < clock.now():
+                    if anim[0] == "fall":
+                        board[anim[1] + anim[4]][anim[2]] = anim[3]
+                    if anim[0] == "destroy":
+                        board[anim[1]][anim[2]] = EMPTY
+                    syncAnim.remove(anim)
+            if len(syncAnim) == 0:
+                stamp = len(asyncAnim)
+                sf = collapse(board, syncAnim, asyncAnim, sf, 6, dirty, None, None, rng, clock)
+                if any(anim[5] != clock.now() for anim in asyncAnim[stamp:]):
+                    return None
+                if len(syncAnim) == 0:
+                    break
+            if fast:
+                clock.skip(max(animationEnd(anim) for anim in syncAnim) - clock.now())
+        return (board, [anim[:5] for anim in asyncAnim], [anim[5] for anim in asyncAnim], step + 1)
+
+    print("  Attempting to read the wall clock once a frame... ", end="")
+    clock = Clock()
+    frames = []
+    for i in range(5):
+        frames.append(clock.tick(50))
+        first = clock.now()
+        sleep(0.002)
+        if clock.now() != first:
+            frames = None
+            break
+    if frames is not None and all(b - a >= 0.019 for a, b in zip(frames, frames[1:])):
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the frames were", frames)
+        failed += 1
+
+    print("  Attempting to run the wall clock 4 times faster... ", end="")
+    clock = Clock(4)
+    first = clock.tick(50)
+    wall = clock.wall
+    for i in range(5):
+        clock.tick(50)
+    ran = clock.now() - first
+    elapsed = clock.wall - wall
+    before = clock.now()
+    clock.skip(10)
+    if elapsed >= 0.095 and abs(ran - 4 * elapsed) < 1e-6 and clock.now() - before == 10:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the clock ran %f seconds in %f" % (ran, elapsed))
+        failed += 1
+
+    print("  Attempting to time a game's animations with a ManualClock... ", end="")
+    problem = None
+    games = []
+    for start in [100.0, 100.0, 250.0]:
+        clock = ManualClock(start)
+        game = playOut(clock, False, 90)
+        if game is None:
+            problem = "a score was not timed by the clock"
+            break
+        if clock.frames != 90 or abs(clock.now() - start - 3) > 1e-9:
+            problem = "the clock did not move on a frame a tick"
+            break
+        games.append(game[:2] + ([t - start for t in game[2]],))
+    if problem is None and games[0] != games[1]:
+        problem = "the same clock gave different animations"
+    if problem is None and (games[0][:2] != games[2][:2] or
+                            any(abs(a - b) > 1e-9 for a, b in zip(games[0][2], games[2][2]))):
+        problem = "starting the clock later changed the game"
+    if problem is None and len(games[0][1]) < 2:
+        problem = "nothing was cleared"
+    if problem is None:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED:", problem)
+        failed += 1
+
+    print("  Attempting to fast-forward on a click behind a button release... ", end="")
+    events = [("<ButtonRelease-1>", (10, 10))]
+    getEvent = lambda: events.pop(0) if len(events) > 0 else None
+    frames = []
+    for arrived in [[], [("<Button-3>", (5, 5))], [("<Button-1>", (20, 20)), ("<ButtonRelease-1>", (20, 20))], []]:
+        events.extend(arrived)
+        frames.append(clickedThrough(getEvent))
+        if len(events) > 0:
+            frames = None
+            break
+    if frames == [False, False, True, False]:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the frames fast-forwarded were", frames)
+        failed += 1
+
+    print("  Attempting to play the cascades faster and fast-forwarded... ", end="")
+    normal = playOut(ManualClock(0.0), False, 100000)
+    quick = playOut(ManualClock(0.0, 8), False, 100000)
+    skipped = playOut(ManualClock(0.0), True, 100000)
+    rng = GameRandom(4)
+    settled = createBoard(8, 8, 6, rng)
+    points = settle(settled, 6, 1, None, None, rng)
+    if normal[:2] == quick[:2] == skipped[:2] and quick[3] * 4 < normal[3] and skipped[3] * 4 < normal[3] and \
+            normal[0] == settled and sum(anim[4] for anim in normal[1]) == points:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the frames taken were", normal[3], quick[3], skipped[3])
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+#
+# Run a series of tests on working out moves as timelines
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_resolveMove():
+    print("Testing resolveMove...")
+
+    passed = 0
+    failed = 0
+
+    # A move to try on a board: a BURST swap if there is one, then a swap that is
+    # not allowed every so often, then the hint
+    def pickMove(board, turn):
+        for r in range(len(board)):
+            for c in range(len(board[0]) - 1):
+                if isBurstSwap(board, r, c, r, c + 1):
+                    return (r, c, r, c + 1)
+        if turn % 4 == 1:
+            for r in range(len(board)):
+                for c in range(len(board[0]) - 1):
+                    if not canSwap(board, r, c, r, c + 1):
+                        return (r, c, r, c + 1)
+        return hint(board)
+
+    # The frames of a game played the way play() plays it, with times rounded so
+    # that adding them up in a different order does not matter.  With polling,
+    # collapse() runs each time the syncAnim queue empties, as play() used to.
+    def frames(rows, cols, syms, game_seed, moves, polling):
+        clock = ManualClock()
+        rng = GameRandom(game_seed)
+        board = createBoard(rows, cols, syms, rng)
+        syncAnim = []
+        asyncAnim = []
+        dirty = allCells(board)
+        sf = 1
+        pending = []
+        if not polling:
+            pending = resolveCascade(board, syms, 1, None, rng)["steps"]
+        moves = list(moves)
+        shown = []
+        while True:
+            now = clock.tick(29.3)
+            settled = False
+            if len(syncAnim) == 0:
+                if polling:
+                    sf = collapse(board, syncAnim, asyncAnim, sf, syms, dirty, None, None, rng, clock)
+                elif len(pending) > 0:
+                    startStep(board, pending.pop(0), syncAnim, asyncAnim, now)
+                settled = len(syncAnim) == 0
+                if settled and len(moves) == 0:
+                    return shown
+            if len(syncAnim) > 0:
+                syncAnim.sort(key=animationEnd)
+                for anim in list(syncAnim):
+                    if animationEnd(anim) < now:
+                        if anim[0] == "fall":
+                            board[anim[1] + anim[4]][anim[2]] = anim[3]
+                        if anim[0] == "destroy":
+                            board[anim[1]][anim[2]] = EMPTY
+                        syncAnim.remove(anim)
+            elif settled and len(moves) > 0:
+                r1, c1, r2, c2 = moves.pop(0)
+                if not polling:
+                    pending = resolveMove(board, r1, c1, r2, c2, syms, rng)["steps"]
+                    startStep(board, pending.pop(0), syncAnim, asyncAnim, now)
+                elif isBurstSwap(board, r1, c1, r2, c2):
+                    burstSwap(board, r1, c1, r2, c2, syncAnim, asyncAnim, now, dirty, None, None, rng, clock)
+                elif canSwap(board, r1, c1, r2, c2):
+                    syncAnim.append(("swap", r1, c1, board[r1][c1], r2, c2, board[r2][c2], now, now + 0.5))
+                    swap(board, r1, c1, r2, c2)
+                    dirty.update([(r1, c1), (r2, c2)])
+                else:
+                    syncAnim.append(("swap_and_back", r1, c1, board[r1][c1], r2, c2, board[r2][c2], now, now + 0.75))
+            shown.append((deepcopy(board),
+                          [tuple(round(v, 9) if isinstance(v, float) else v for v in anim) for anim in syncAnim],
+                          [tuple(round(v, 9) if isinstance(v, float) else v for v in anim) for anim in asyncAnim]))
+
+    for (rows, cols, syms) in [(8, 8, 6), (7, 7, 5), (6, 7, 4)]:
+        print("  Attempting to work out 3 games of 12 moves: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(3):
+            # The timelines end on the boards and scores settle() and playMove() give
+            fast = GameRandom(game)
+            slow = GameRandom(game)
+            board = createBoard(rows, cols, syms, fast)
+            other = createBoard(rows, cols, syms, slow)
+            before = deepcopy(board)
+            timeline = resolveCascade(board, syms, 1, None, fast)
+            points = settle(other, syms, 1, None, None, slow)
+            if board != before or timeline["board"] != other or timeline["points"] != points:
+                problem = "the first board did not settle the same"
+                break
+            board = timeline["board"]
+            moves = []
+            for turn in range(12):
+                move = pickMove(board, turn)
+                if move[0] == -1:
+                    break
+                moves.append(move)
+                before = deepcopy(board)
+                timeline = resolveMove(board, move[0], move[1], move[2], move[3], syms, fast)
+                points = playMove(other, move[0], move[1], move[2], move[3], syms, None, slow)
+                if board != before or timeline["board"] != other or \
+                        timeline["points"] != max(points, 0) or timeline["legal"] != (points != -1):
+                    problem = "move %d did not play the same" % turn
+                    break
+                if len(set((r, c) for r in range(rows) for c in range(cols) if board[r][c] != other[r][c]) -
+                       timeline["changed"]) > 0:
+                    problem = "move %d changed cells it did not list" % turn
+                    break
+                board = timeline["board"]
+            if problem is not None:
+                break
+
+            # Playing the timelines back draws the same frames collapse() did
+            if frames(rows, cols, syms, game, moves, True) != frames(rows, cols, syms, game, moves, False):
+                problem = "the timelines were not drawn the same"
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem, "on game", game)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+if __name__ == "__main__":
+    if test_createBoard() == False:
+        quit()
+
+    test_hLineAt()
+    test_vLineAt()
+    test_swap()
+    test_canSwap()
+    test_hint()
+    test_clearAll()
+    test_playMove()
+    test_collapseDirty()
+    test_evalSwaps()
+    test_compileShapes()
+    test_genFalls()
+    test_Journal()
+    test_GameRandom()
+    test_Clock()
+    test_resolveMove()
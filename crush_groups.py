@@ -0,0 +1,340 @@
+###############################################################################
+#  File: crush_groups.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               Finds matches as connected groups instead of scanning for
+#               each shape in turn.  Every horizontal and vertical run of 3 or
+#               more matching pieces is found in one pass over the board, runs
+#               that share a piece are joined with union-find, and each group
+#               is then named from its shape (a line of 3, 4 or 5, a T, an L
+#               or a +).  collapseGroups() clears the groups and can be used
+#               in place of collapse() in crush_engine.py.  Unlike collapse(),
+#               the result does not depend on the order the shapes are checked
+#               in, so a board can score differently with the two of them.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from random import seed
+
+
+def findRoot(parent, i):
+    """
+    Method Name: findRoot()
+    Description: Finds the cell that stands for the group a cell is in, shortening
+    the path to it on the way
+    :param parent: the union-find parent of every cell
+    :param i: the cell, as row * columns + column
+    :return: the cell that stands for the group
+    """
+    root = i
+    while parent[root] != root:
+        root = parent[root]
+    while parent[i] != root:
+        parent[i], i = root, parent[i]
+    return root
+
+
+def findRuns(board):
+    """
+    Method Name: findRuns()
+    Description: Finds every horizontal and vertical run of 3 or more matching
+    pieces.  Pieces are matched the way collapse() matches them, and EMPTY and
+    BURST never make a run.
+    :param board: the game board
+    :return: a list of runs.  Each run is a tuple of "h" or "v" and the list of
+             (row, column) cells in it, from left to right or top to bottom.
+    """
+    rows = len(board)
+    cols = len(board[0])
+    runs = []
+    for (direction, outer, inner) in [("h", rows, cols), ("v", cols, rows)]:
+        for i in range(outer):
+            start = 0
+            while start < inner:
+                if direction == "h":
+                    v = board[i][start]
+                else:
+                    v = board[start][i]
+                end = start + 1
+                if v != EMPTY and v != BURST:
+                    while end < inner:
+                        if direction == "h":
+                            w = board[i][end]
+                        else:
+                            w = board[end][i]
+                        if w == EMPTY or w == BURST or w % 10 != v % 10:
+                            break
+                        end += 1
+                if end - start >= 3:
+                    if direction == "h":
+                        runs.append(("h", [(i, j) for j in range(start, end)]))
+                    else:
+                        runs.append(("v", [(j, i) for j in range(start, end)]))
+                start = end
+    return runs
+
+
+def classifyGroup(runs):
+    """
+    Method Name: classifyGroup()
+    Description: Names a group of joined runs from its shape and works out which
+    cell becomes a BURST
+    :param runs: the runs in the group
+    :return: a tuple of the name of the shape ("line-3", "line-4", "line-5", "T",
+             "L" or "+"), the (row, column) cell that becomes a BURST or None, and
+             the cell the score pops up at
+    """
+    longest = max(runs, key=lambda run: len(run[1]))[1]
+    if len(longest) >= 5:
+        middle = longest[len(longest) // 2]
+        return ("line-5", middle, middle)
+
+    # Runs that cross make a T, an L or a +, depending on whether the crossing
+    # is at the end or in the middle of each run
+    for (d1, cells1) in runs:
+        if d1 != "h":
+            continue
+        for (d2, cells2) in runs:
+            if d2 != "v":
+                continue
+            crossing = set(cells1) & set(cells2)
+            if len(crossing) == 0:
+                continue
+            cell = crossing.pop()
+            ends = (cell in (cells1[0], cells1[-1])) + (cell in (cells2[0], cells2[-1]))
+            return (["+", "T", "L"][ends], cell, cell)
+
+    if len(longest) == 4:
+        return ("line-4", None, longest[1])
+    return ("line-3", None, longest[1])
+
+
+def findMatchGroups(board):
+    """
+    Method Name: findMatchGroups()
+    Description: Finds every match on the board as a connected group of runs.  The
+    work done is in proportion to the number of cells on the board.
+    :param board: the game board
+    :return: a list of groups, from the bottom of the board to the top.  Each group
+             is a dictionary holding its "shape", its sorted "cells", the "burst"
+             cell (or None), the cell the score pops up "at" and the piece "value".
+    """
+    cols = len(board[0])
+    runs = findRuns(board)
+
+    # Join the cells of each run, which also joins runs that share a cell
+    parent = {}
+    for direction, cells in runs:
+        for (r, c) in cells:
+            parent.setdefault(r * cols + c, r * cols + c)
+        first = findRoot(parent, cells[0][0] * cols + cells[0][1])
+        for (r, c) in cells[1:]:
+            root = findRoot(parent, r * cols + c)
+            if root != first:
+                parent[root] = first
+
+    members = {}
+    for i in parent:
+        members.setdefault(findRoot(parent, i), []).append(i)
+    group_runs = {}
+    for run in runs:
+        root = findRoot(parent, run[1][0][0] * cols + run[1][0][1])
+        group_runs.setdefault(root, []).append(run)
+
+    groups = []
+    for root in members:
+        cells = sorted((i // cols, i % cols) for i in members[root])
+        shape, burst, at = classifyGroup(group_runs[root])
+        groups.append({"shape": shape, "cells": cells, "burst": burst, "at": at,
+                       "value": board[cells[0][0]][cells[0][1]]})
+
+    # Score the lowest groups first, the way most of collapse()'s scans go
+    groups.sort(key=lambda group: (-group["cells"][-1][0], group["cells"][0][1]))
+    return groups
+
+
+def collapseGroups(board, syncAnim, asyncAnim, sf, num_syms, rng=None, clock=None):
+    """
+    Method Name: collapseGroups()
+    Description: The version of collapse() that clears connected match groups.
+    Every group scores once: 1000 for the shapes that leave a BURST behind,
+    otherwise 60 or 30 times the score factor for a line of 4 or 3.
+    :param board: the game board
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param sf: the score factor
+    :param num_syms: the number of different pieces in play
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :param clock: the Clock the animations are timed by, GLOBAL_CLOCK if left out
+    :return: 1 if nothing was cleared, otherwise the new score factor
+    """
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    if clock is None:
+        clock = GLOBAL_CLOCK
+
+    # Use up the random numbers the same way collapse() does
+    l1 = list(range(50))
+    l2 = list(range(50))
+    l3 = list(range(50))
+    l4 = list(range(50))
+    l5 = list(range(50))
+    rng.cosmetic.shuffle(l1)
+    rng.cosmetic.shuffle(l2)
+    rng.cosmetic.shuffle(l3)
+    rng.cosmetic.shuffle(l4)
+    rng.cosmetic.shuffle(l5)
+
+    journal = Journal()
+    groups = findMatchGroups(board)
+
+    for group in groups:
+        for (r, c) in group["cells"]:
+            journal.set(board, r, c, EMPTY)
+        if group["burst"] is not None:
+            r, c = group["burst"]
+            journal.set(board, r, c, BURST)
+            syncAnim.append(("crossfade", r, c, journal.before(board, r, c), clock.now()))
+            amount = 1000
+        elif group["shape"] == "line-4":
+            amount = 60 * sf
+        else:
+            amount = 30 * sf
+        asyncAnim.append(("score", group["at"][0], group["at"][1], group["value"], amount, clock.now(), clock.now() + 1))
+        sf += 1
+
+    # Destroy everything that has been changed to empty
+    num_destroyed = 0
+    if len(groups) > 0:
+        for c in range(len(board[0])):
+            for r in range(len(board)):
+                if board[r][c] == EMPTY:
+                    syncAnim.append(("destroy", r, c, journal.before(board, r, c), l1, clock.now(), clock.now() + 1))
+                    num_destroyed += 1
+
+    if num_destroyed > 0:
+        time_delay = 1
+    else:
+        time_delay = 0
+
+    genFalls(board, time_delay, syncAnim, num_syms, None, None, rng, clock)
+
+    if len(groups) == 0:
+        return 1
+    else:
+        return sf
+
+
+#
+# Run a series of tests on the findMatchGroups and collapseGroups functions
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_findMatchGroups():
+    print("Testing findMatchGroups...")
+
+    passed = 0
+    failed = 0
+    for (b, a) in [ \
+            ([[0, 1, 0, 1, 2], \
+              [2, 2, 2, 4, 5], \
+              [0, 4, 5, 0, 1]], [("line-3", None)]), \
+            ([[0, 1, 0, 1, 2], \
+              [2, 2, 2, 2, 5], \
+              [0, 4, 5, 0, 1]], [("line-4", None)]), \
+            ([[0, 1, 0, 1, 2, 1], \
+              [3, 3, 3, 3, 3, 3], \
+              [0, 4, 5, 0, 1, 2]], [("line-5", (1, 3))]), \
+            ([[0, 3, 3, 3, 2], \
+              [2, 0, 3, 4, 5], \
+              [0, 4, 3, 0, 1]], [("T", (0, 2))]), \
+            ([[3, 1, 0, 1, 2], \
+              [3, 0, 2, 4, 5], \
+              [3, 3, 3, 0, 1]], [("L", (2, 0))]), \
+            ([[0, 1, 3, 1, 2], \
+              [2, 3, 3, 3, 5], \
+              [0, 4, 3, 0, 1]], [("+", (1, 2))]), \
+            ([[1, 1, 1, 0, 2], \
+              [0, 2, 4, 0, 5], \
+              [2, 2, 2, 0, 4]], [("line-3", None), ("line-3", None), ("line-3", None)]), \
+            ([[1, 1, 1, 0, 2], \
+              [1, 1, 1, 2, 5], \
+              [0, 4, 2, 0, 4]], [("line-3", None), ("line-3", None)]), \
+            ([[1, 1, BURST, 1, 2], \
+              [EMPTY, EMPTY, EMPTY, 2, 5], \
+              [0, 4, 2, 0, 4]], []), \
+            ]:
+
+        # Attempt the function call
+        print("  Attempting to find the groups on a board with %d of them... " % len(a), end="")
+        result = [(group["shape"], group["burst"]) for group in findMatchGroups(b)]
+
+        # Did we get the correct result?
+        if sorted(result, key=str) != sorted(a, key=str):
+            print("\nFAILED: findMatchGroups found", result, "when", a, "was expected on the board:")
+            pprint(b)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # On random boards, every cell in a line has to be in exactly one group and
+    # nothing can be left to match once the groups are cleared
+    for (rows, cols, syms) in [(8, 8, 6), (7, 7, 4), (6, 7, 3), (12, 15, 3)]:
+        print("  Attempting to clear the groups on 50 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(50):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            in_lines = set()
+            for r in range(rows):
+                for c in range(cols):
+                    if hLineAt(board, r, c) or vLineAt(board, r, c):
+                        in_lines.add((r, c))
+            groups = findMatchGroups(board)
+            cells = [cell for group in groups for cell in group["cells"]]
+            if len(cells) != len(set(cells)) or set(cells) != in_lines:
+                problem = game
+                break
+
+            # Clear them without any falls and check that no line is left
+            for group in groups:
+                for (r, c) in group["cells"]:
+                    board[r][c] = EMPTY
+                if group["burst"] is not None:
+                    board[group["burst"][0]][group["burst"][1]] = BURST
+            if len(findRuns(board)) > 0:
+                problem = game
+                break
+
+            # collapseGroups() should score each group once
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            asyncAnim = []
+            if collapseGroups(board, [], asyncAnim, 1, syms) != max(1, 1 + len(groups)) or \
+                    len(asyncAnim) != len(groups):
+                problem = game
+                break
+
+        if problem is not None:
+            print("\nFAILED: the groups did not match the lines on game", problem)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_findMatchGroups()
@@ -0,0 +1,235 @@
+###############################################################################
+#  File: crush_moves.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               An index of every legal move on the board that is kept up to
+#               date as the board changes, instead of being worked out again
+#               from scratch.  Asking for the best hint, whether any move is
+#               left, or how many moves there are does not scan the board.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from crush_pieces import PieceIndex
+from random import randrange, seed
+
+
+class MoveIndex:
+    """
+    Class Name: MoveIndex
+    Description: Keeps the result of hintAt() for every piece, the set of swaps
+    that are allowed, and a PieceIndex for the BURST hints.  After the
+    board changes, update() is given the cells that changed and only the parts
+    of the index that can see those cells are worked out again.
+    """
+
+    def __init__(self, board):
+        """
+        Method Name: __init__()
+        Description: Builds the index for a board
+        :param board: the game board, which the index keeps a reference to
+        """
+        self.board = board
+        self.rows = len(board)
+        self.cols = len(board[0])
+
+        # Where every piece is, as the index last saw them
+        self.pieces = PieceIndex(board)
+
+        # Every allowed swap, as (r1, c1, r2, c2) with the second piece to the
+        # right of or below the first
+        self.legal = set()
+
+        # hintAt() for every cell, and the cells grouped by the weight of their swap
+        self.hints = {}
+        self.weights = {}
+
+        self.best = (-1, -1, -1, -1)
+        self.update(allCells(board))
+
+    def pairAllowed(self, r1, c1, r2, c2):
+        """
+        Method Name: pairAllowed()
+        Description: Reports whether play() would accept a swap
+        :return: True if the swap is allowed
+        """
+        return isBurstSwap(self.board, r1, c1, r2, c2) or canSwap(self.board, r1, c1, r2, c2)
+
+    def update(self, cells):
+        """
+        Method Name: update()
+        Description: Brings the index up to date after some cells have changed
+        :param cells: the (row, column) cells that may have changed
+        :return: none
+        """
+        board = self.board
+        rows = self.rows
+        cols = self.cols
+
+        self.pieces.update(cells)
+
+        pairs = set()
+        hint_rows = set()
+        hint_cols = set()
+        for (r, c) in cells:
+            # canSwap() looks up to two cells along the row and column of both
+            # pieces, so every swap with a piece that close needs checking again
+            for (er, ec) in [(r, c), (r - 1, c), (r - 2, c), (r + 1, c), (r + 2, c),
+                             (r, c - 1), (r, c - 2), (r, c + 1), (r, c + 2)]:
+                if 0 <= er < rows and 0 <= ec < cols:
+                    pairs.add((er, ec, er, ec + 1))
+                    pairs.add((er, ec - 1, er, ec))
+                    pairs.add((er, ec, er + 1, ec))
+                    pairs.add((er - 1, ec, er, ec))
+
+            # hintAt() counts runs of pieces along the rows and columns next to
+            # the piece, so every piece within one row or column needs checking
+            for i in range(r - 1, r + 2):
+                if 0 <= i < rows:
+                    hint_rows.add(i)
+            for i in range(c - 1, c + 2):
+                if 0 <= i < cols:
+                    hint_cols.add(i)
+
+        for (r1, c1, r2, c2) in pairs:
+            if 0 <= r1 and 0 <= c1 and r2 < rows and c2 < cols:
+                if self.pairAllowed(r1, c1, r2, c2):
+                    self.legal.add((r1, c1, r2, c2))
+                else:
+                    self.legal.discard((r1, c1, r2, c2))
+
+        recheck = set()
+        for r in hint_rows:
+            for c in range(cols):
+                recheck.add((r, c))
+        for c in hint_cols:
+            for r in range(rows):
+                recheck.add((r, c))
+        for cell in recheck:
+            if cell in self.hints:
+                self.weights[self.hints[cell]["value"]].discard(cell)
+            self.hints[cell] = hintAt(board, cell[0], cell[1])
+            self.weights.setdefault(self.hints[cell]["value"], set()).add(cell)
+
+        # hint() keeps the first swap it finds with the highest weight, scanning
+        # from the bottom right, so that is the largest cell in the top group
+        self.best = (-1, -1, -1, -1)
+        top = 0
+        for weight in self.weights:
+            if weight > top and len(self.weights[weight]) > 0:
+                top = weight
+        if top > 0:
+            self.best = tuple(self.hints[max(self.weights[top])]["pos"])
+
+    def sync(self):
+        """
+        Method Name: sync()
+        Description: Brings the index up to date when the changed cells are not known,
+        by comparing each row of the board with the index's copy of it
+        :return: none
+        """
+        changed = self.pieces.sync()
+        if len(changed) > 0:
+            self.update(changed)
+
+    def hint(self):
+        """
+        Method Name: hint()
+        Description: The same answer hint() gives for the board, without scanning it
+        :return: The row and column of the first piece, followed by the row and
+                 column of the second piece.  -1, -1, -1, -1 if there is no hint.
+        """
+        bursts = self.pieces.cells.get(BURST)
+        if bursts:
+            x, y = max(bursts)
+            return burstHint(self.board, x, y, self.pieces)
+        return self.best
+
+    def hasMoves(self):
+        """
+        Method Name: hasMoves()
+        Description: Reports whether there is any move left on the board
+        :return: True if at least one swap is allowed
+        """
+        return len(self.legal) > 0
+
+    def moveCount(self):
+        """
+        Method Name: moveCount()
+        Description: Counts the swaps that are allowed on the board
+        :return: the number of allowed swaps
+        """
+        return len(self.legal)
+
+
+#
+# Run a series of tests on the MoveIndex class
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_MoveIndex():
+    print("Testing MoveIndex...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3)]:
+        print("  Attempting to change 10 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(10):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            settle(board, syms)
+            index = MoveIndex(board)
+
+            for step in range(20):
+                # Either play the hinted move, or scribble over a few cells
+                if step % 3 == 0:
+                    changed = []
+                    for i in range(randrange(1, 4)):
+                        r = randrange(rows)
+                        c = randrange(cols)
+                        board[r][c] = randrange(-1, syms + 1) if randrange(4) == 0 else randrange(syms)
+                        changed.append((r, c))
+                    index.update(changed)
+                else:
+                    r1, c1, r2, c2 = index.hint()
+                    if r1 == -1 or c2 < 0 or playMove(board, r1, c1, r2, c2, syms) == -1:
+                        settle(board, syms)
+                    index.sync()
+
+                # Count the allowed swaps the slow way
+                count = 0
+                for r in range(rows):
+                    for c in range(cols):
+                        if c + 1 < cols and (isBurstSwap(board, r, c, r, c + 1) or canSwap(board, r, c, r, c + 1)):
+                            count += 1
+                        if r + 1 < rows and (isBurstSwap(board, r, c, r + 1, c) or canSwap(board, r, c, r + 1, c)):
+                            count += 1
+
+                if index.hint() != hint(board) or index.moveCount() != count or \
+                        index.hasMoves() != (count > 0) or index.pieces.counts != countBoard(board):
+                    problem = step
+                    break
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED: the index differed from the board on game", game, "step", problem)
+            print("The board was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_MoveIndex()
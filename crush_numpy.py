@@ -0,0 +1,330 @@
+###############################################################################
+#  File: crush_numpy.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               An optional game board stored in a 2-D numpy.int8 array.
+#               Every line and T/L shape on the board is found with a few
+#               shifted-array comparisons instead of checking one cell at a
+#               time, which is much faster on the large boards used by our
+#               simulations.  collapseArray() gives exactly the same result
+#               as collapse() in crush_engine.py.
+#
+#  External Libraries:
+#               numpy - only this file needs it, the rest of the game does not
+###############################################################################
+
+from crush_engine import *
+from random import seed
+import numpy as np
+
+
+def toArray(board):
+    """
+    Method Name: toArray()
+    Description: Copies a list of lists game board into a numpy array
+    :param board: the list of lists game board
+    :return: a 2-D numpy.int8 array holding the same pieces
+    """
+    return np.array(board, dtype=np.int8)
+
+
+def toList(arr):
+    """
+    Method Name: toList()
+    Description: Copies a numpy game board back into a list of lists
+    :param arr: the numpy game board
+    :return: the list of lists game board
+    """
+    return arr.tolist()
+
+
+def patternMask(arr, cells):
+    """
+    Method Name: patternMask()
+    Description: Finds every place on the board where a pattern of matching pieces
+    starts, using one shifted comparison per cell in the pattern
+    :param arr: the numpy game board
+    :param cells: the (row, column) offsets of the pattern from its starting cell
+    :return: a boolean array the size of the board that is True at every cell
+             where the pattern starts
+    """
+    rows, cols = arr.shape
+    mask = np.zeros((rows, cols), dtype=bool)
+
+    # The range of starting cells that keep the whole pattern on the board
+    r0 = -min(dr for dr, dc in cells)
+    r1 = rows - max(dr for dr, dc in cells)
+    c0 = -min(dc for dr, dc in cells)
+    c1 = cols - max(dc for dr, dc in cells)
+    if r0 >= r1 or c0 >= c1:
+        return mask
+
+    # collapse() compares pieces with allSame(), which ignores the tens digit
+    key = arr % 10
+    start = arr[r0:r1, c0:c1]
+    hit = (start != EMPTY) & (start != BURST)
+    first = key[r0:r1, c0:c1]
+    for dr, dc in cells[1:]:
+        hit &= key[r0 + dr:r1 + dr, c0 + dc:c1 + dc] == first
+    mask[r0:r1, c0:c1] = hit
+    return mask
+
+
+def hasMatch(arr):
+    """
+    Method Name: hasMatch()
+    Description: Reports whether collapse() would find anything to clear. Every
+    pattern contains a line of three, so only those need to be checked.
+    :param arr: the numpy game board
+    :return: True if there is a line of 3 or more anywhere on the board
+    """
+    return bool(patternMask(arr, H3[1]).any() or patternMask(arr, V3[1]).any())
+
+
+def stillMatches(arr, r, c, cells):
+    """
+    Method Name: stillMatches()
+    Description: Checks a single place on the board for a pattern.  Used after the
+    board has been changed by an earlier match in the same scan.
+    :param arr: the numpy game board
+    :param r: the row the pattern starts at
+    :param c: the column the pattern starts at
+    :param cells: the (row, column) offsets of the pattern
+    :return: True if the pattern still matches
+    """
+    v = arr.item(r, c)
+    if v == EMPTY or v == BURST:
+        return False
+    for dr, dc in cells[1:]:
+        if arr.item(r + dr, c + dc) % 10 != v % 10:
+            return False
+    return True
+
+
+def collapseArray(arr, syncAnim, asyncAnim, sf, num_syms, rng=None, clock=None):
+    """
+    Method Name: collapseArray()
+    Description: The numpy version of collapse().  The candidate matches for each
+    group of patterns are found for the whole board at once.  Clearing a match
+    can only break later matches, never make new ones, so the candidates are then
+    rechecked one at a time in the same order collapse() uses.  The board, the
+    animations, the BURST placement and the score factor all come out the same.
+    :param arr: the numpy game board, modified in place
+    :param syncAnim: the animation queue that must finish before play continues
+    :param asyncAnim: the animation queue for score pop ups
+    :param sf: the score factor
+    :param num_syms: the number of different pieces in play
+    :param rng: the GameRandom for the animations and the new pieces,
+                GLOBAL_RANDOM if left out
+    :param clock: the Clock the animations are timed by, GLOBAL_CLOCK if left out
+    :return: 1 if nothing was cleared, otherwise the new score factor
+    """
+    if rng is None:
+        rng = GLOBAL_RANDOM
+    if clock is None:
+        clock = GLOBAL_CLOCK
+
+    # Use up the random numbers the same way collapse() does so that the rest
+    # of the game plays out the same with either board
+    l1 = list(range(50))
+    l2 = list(range(50))
+    l3 = list(range(50))
+    l4 = list(range(50))
+    l5 = list(range(50))
+    rng.cosmetic.shuffle(l1)
+    rng.cosmetic.shuffle(l2)
+    rng.cosmetic.shuffle(l3)
+    rng.cosmetic.shuffle(l4)
+    rng.cosmetic.shuffle(l5)
+
+    journal = Journal()
+    changed = False
+
+    if hasMatch(arr):
+        for direction, patterns in PATTERN_GROUPS:
+            masks = [patternMask(arr, cells) for name, cells, burst, at, points in patterns]
+            hits = np.argwhere(np.any(masks, axis=0))
+            if len(hits) == 0:
+                continue
+
+            # argwhere gives the rows top to bottom.  Flip them if this group
+            # is scanned bottom to top.
+            if direction == -1:
+                hits = hits[np.lexsort((hits[:, 1], -hits[:, 0]))]
+
+            for r, c in hits.tolist():
+                for i in range(len(patterns)):
+                    if not masks[i][r, c] or not stillMatches(arr, r, c, patterns[i][1]):
+                        continue
+                    sf = clearPattern(arr, journal, r, c, patterns[i], sf, syncAnim, asyncAnim, clock)
+                    changed = True
+
+    board = arr.tolist()
+
+    # Destroy everything that has been changed to empty
+    num_destroyed = 0
+    if changed:
+        # Column by column, the same order collapse() uses
+        for c, r in np.argwhere(arr.T == EMPTY).tolist():
+            syncAnim.append(("destroy", r, c, int(journal.before(board, r, c)), l1, clock.now(), clock.now() + 1))
+            num_destroyed += 1
+
+    if num_destroyed > 0:
+        time_delay = 1
+    else:
+        time_delay = 0
+
+    genFalls(board, time_delay, syncAnim, num_syms, None, None, rng, clock)
+    arr[:, :] = board
+
+    if changed == False:
+        return 1
+    else:
+        return sf
+
+
+# A value that no piece can have, used for the cells around the edge of the board
+OFF_BOARD = -128
+
+# The pairs of neighbours that make a line of three with a piece, along its row
+# and along its column
+SWAP_LINES = [((0, -2), (0, -1)), ((0, -1), (0, 1)), ((0, 1), (0, 2)),
+              ((-2, 0), (-1, 0)), ((-1, 0), (1, 0)), ((1, 0), (2, 0))]
+
+
+def evalSwapsArray(arr, swaps):
+    """
+    Method Name: evalSwapsArray()
+    Description: The numpy version of evalSwaps().  Every swap is checked at once
+    with a few gathers from a copy of the board that has a border of OFF_BOARD
+    cells around it, and the board is never changed.
+    :param arr: the numpy game board
+    :param swaps: a list or N x 4 array of (r1, c1, r2, c2) swaps
+    :return: a numpy boolean array holding True for every swap that creates a line,
+             in the same order as swaps
+    """
+    swaps = np.asarray(swaps, dtype=np.intp).reshape(-1, 4)
+    pad = np.pad(arr, 2, constant_values=OFF_BOARD)
+    r1 = swaps[:, 0] + 2
+    c1 = swaps[:, 1] + 2
+    r2 = swaps[:, 2] + 2
+    c2 = swaps[:, 3] + 2
+    v1 = pad[r1, c1]
+    v2 = pad[r2, c2]
+
+    mask = np.zeros(len(swaps), dtype=bool)
+    # Each swapped cell takes the other's piece, the same checks canSwap() makes
+    for (r, c, v, other_r, other_c, other_v) in [(r2, c2, v1, r1, c1, v2), (r1, c1, v2, r2, c2, v1)]:
+        for line in SWAP_LINES:
+            hit = np.ones(len(swaps), dtype=bool)
+            for (dr, dc) in line:
+                near = pad[r + dr, c + dc]
+                near = np.where((r + dr == other_r) & (c + dc == other_c), other_v, near)
+                hit &= near == v
+            mask |= hit
+    return mask
+
+
+#
+# Run a series of tests on the collapseArray function
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_collapseArray():
+    print("Testing collapseArray...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3), (12, 15, 3)]:
+        print("  Attempting to collapse 50 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(50):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            arr = toArray(board)
+
+            # Compare every step of the cascade, using the same random numbers and clock for both
+            for step in range(5):
+                sync1, async1, sync2, async2 = [], [], [], []
+                clock = ManualClock(float(step))
+                seed(1000 * game + step)
+                sf1 = collapse(board, sync1, async1, step + 1, syms, clock=clock)
+                seed(1000 * game + step)
+                sf2 = collapseArray(arr, sync2, async2, step + 1, syms, clock=clock)
+
+                if sf1 != sf2 or board != toList(arr) or \
+                        sync1 != sync2 or async1 != async2:
+                    problem = (game, step)
+                    break
+                applyAnims(board, sync1, async1)
+                applyAnims(arr, sync2, async2)
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED: collapseArray differed from collapse on game", problem[0], "step", problem[1])
+            print("The board from collapse was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests comparing evalSwapsArray() with evalSwaps()
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_evalSwapsArray():
+    print("Testing evalSwapsArray...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (6, 7, 3), (12, 15, 3)]:
+        print("  Attempting every swap on 50 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(50):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            board[game % rows][game % cols] = EMPTY
+            board[(3 * game) % rows][(5 * game) % cols] = BURST
+            arr = toArray(board)
+            before = arr.copy()
+
+            swaps = []
+            for r in range(rows):
+                for c in range(cols):
+                    if c + 1 < cols:
+                        swaps.append((r, c, r, c + 1))
+                    if r + 1 < rows:
+                        swaps.append((r, c, r + 1, c))
+            if evalSwapsArray(arr, swaps).tolist() != evalSwaps(board, swaps) or \
+                    not np.array_equal(arr, before):
+                problem = game
+                break
+
+        if problem is not None:
+            print("\nFAILED: evalSwapsArray differed from evalSwaps on game", problem)
+            print("The board was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_collapseArray()
+    test_evalSwapsArray()
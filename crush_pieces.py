@@ -0,0 +1,284 @@
+###############################################################################
+#  File: crush_pieces.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               An index of where every kind of piece is on the board.  It
+#               holds the count of each regular piece, the same counts that
+#               countBoard() makes, and the set of cells each piece is in.  It
+#               is kept up to date from the cells that change, so BURST hints,
+#               clearing one colour and piece statistics only look at the
+#               pieces involved instead of the whole board.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from random import randrange, seed
+
+
+class PieceIndex:
+    """
+    Class Name: PieceIndex
+    Description: Keeps counts[v], the number of regular pieces v on the board, and
+    cells[v], the set of (row, column) cells holding v, for every v including
+    EMPTY and BURST.  Any number of symbols can be used, though a symbol with the
+    value of BURST is counted as a BURST.
+    """
+
+    def __init__(self, board):
+        """
+        Method Name: __init__()
+        Description: Builds the index for a board
+        :param board: the game board, which the index keeps a reference to
+        """
+        self.board = board
+        self.rows = len(board)
+        self.cols = len(board[0])
+
+        # The pieces as the index last saw them
+        self.values = [row[:] for row in board]
+        self.counts = {0: 0, 1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        self.cells = {}
+        for r in range(self.rows):
+            for c in range(self.cols):
+                self.add(self.values[r][c], r, c)
+
+    def add(self, v, r, c):
+        """
+        Method Name: add()
+        Description: Records a piece in the index
+        :param v: the piece
+        :param r: the row of the piece
+        :param c: the column of the piece
+        :return: none
+        """
+        self.cells.setdefault(v, set()).add((r, c))
+        if v != EMPTY and v != BURST:
+            self.counts[v] = self.counts.get(v, 0) + 1
+
+    def remove(self, v, r, c):
+        """
+        Method Name: remove()
+        Description: Takes a piece out of the index
+        :param v: the piece
+        :param r: the row of the piece
+        :param c: the column of the piece
+        :return: none
+        """
+        self.cells[v].discard((r, c))
+        if v != EMPTY and v != BURST:
+            self.counts[v] -= 1
+            # countBoard() only lists pieces past the first six when there are some
+            if self.counts[v] == 0 and not 0 <= v <= 5:
+                del self.counts[v]
+
+    def update(self, cells):
+        """
+        Method Name: update()
+        Description: Brings the index up to date after some cells have changed
+        :param cells: the (row, column) cells that may have changed
+        :return: none
+        """
+        for (r, c) in cells:
+            old = self.values[r][c]
+            new = self.board[r][c]
+            if old != new:
+                self.remove(old, r, c)
+                self.add(new, r, c)
+                self.values[r][c] = new
+
+    def sync(self):
+        """
+        Method Name: sync()
+        Description: Brings the index up to date when the changed cells are not known,
+        by comparing each row of the board with the index's copy of it
+        :return: a list of the (row, column) cells that had changed
+        """
+        changed = []
+        for r in range(self.rows):
+            if self.board[r] != self.values[r]:
+                for c in range(self.cols):
+                    if self.board[r][c] != self.values[r][c]:
+                        changed.append((r, c))
+        self.update(changed)
+        return changed
+
+    def copy(self, board):
+        """
+        Method Name: copy()
+        Description: Makes an index of another board that holds the same pieces
+        as this index last saw, without searching the board.  Changing either
+        index afterwards does not change the other.
+        :param board: the board the new index keeps a reference to
+        :return: the new PieceIndex
+        """
+        # Skip __init__(), which would search the board
+        index = PieceIndex.__new__(PieceIndex)
+        index.board = board
+        index.rows = self.rows
+        index.cols = self.cols
+        index.values = [row[:] for row in self.values]
+        index.counts = dict(self.counts)
+        index.cells = {v: set(cells) for v, cells in self.cells.items()}
+        return index
+
+    def moveTo(self, board):
+        """
+        Method Name: moveTo()
+        Description: Points the index at another board that holds the pieces it
+        last saw, such as the game board once the timeline of a move worked out on
+        a copy of it has played
+        :param board: the board the index keeps a reference to from now on
+        :return: none
+        """
+        self.board = board
+
+    def count(self, v):
+        """
+        Method Name: count()
+        Description: Counts the pieces of one kind
+        :param v: the piece
+        :return: the number of cells holding v
+        """
+        return len(self.cells.get(v, ()))
+
+    def cellsOf(self, v):
+        """
+        Method Name: cellsOf()
+        Description: Lists the cells holding one kind of piece
+        :param v: the piece
+        :return: a sorted list of the (row, column) cells holding v, top to bottom
+        """
+        return sorted(self.cells.get(v, ()))
+
+
+#
+# Run a series of tests on the PieceIndex class
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_PieceIndex():
+    print("Testing PieceIndex...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (12, 15, 10)]:
+        print("  Attempting to change 10 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(10):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            index = PieceIndex(board)
+
+            for step in range(20):
+                # Scribble over a few cells, clear a colour, or play a BURST
+                if step % 3 == 0:
+                    changed = []
+                    for i in range(randrange(1, 6)):
+                        r = randrange(rows)
+                        c = randrange(cols)
+                        board[r][c] = randrange(-1, syms + 1)
+                        changed.append((r, c))
+                    index.update(changed)
+                elif step % 3 == 1:
+                    before = deepcopy(board)
+                    sym = randrange(syms)
+                    clearAll(board, sym, index)
+                    clearAll(before, sym)
+                    if board != before:
+                        problem = step
+                        break
+                else:
+                    r = randrange(rows)
+                    c = randrange(cols - 1)
+                    board[r][c] = BURST
+                    board[r][c + 1] = randrange(syms)
+                    index.update([(r, c), (r, c + 1)])
+                    other = deepcopy(board)
+                    sync1, async1, sync2, async2 = [], [], [], []
+                    burstSwap(board, r, c, r, c + 1, sync1, async1, 0, None, index)
+                    burstSwap(other, r, c, r, c + 1, sync2, async2, 0)
+                    if board != other or [a[:4] for a in sync1] != [a[:4] for a in sync2] or \
+                            [a[:4] for a in async1] != [a[:4] for a in async2]:
+                        problem = step
+                        break
+                    index.sync()
+
+                # Count the pieces the slow way
+                cells = {}
+                for r in range(rows):
+                    for c in range(cols):
+                        cells.setdefault(board[r][c], set()).add((r, c))
+                if index.counts != countBoard(board) or \
+                        any(index.cellsOf(v) != sorted(cells[v]) for v in cells) or \
+                        sum(index.count(v) for v in index.cells) != rows * cols:
+                    problem = step
+                    break
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED: the index differed from the board on game", game, "step", problem)
+            print("The board was:")
+            pprint(board)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print("  Attempting to resolve BURST moves with a copy of the index... ", end="")
+    problem = None
+    for game in range(20):
+        rng = GameRandom(game)
+        board = createBoard(8, 8, 6, rng)
+        r = randrange(8)
+        c = randrange(7)
+        board[r][c] = BURST
+        index = PieceIndex(board)
+        original = deepcopy(board)
+        with_index = resolveMove(board, r, c, r, c + 1, 6, GameRandom(game), index)
+        without = resolveMove(board, r, c, r, c + 1, 6, GameRandom(game))
+        pieces = with_index["pieces"]
+        if with_index["steps"] != without["steps"] or with_index["board"] != without["board"]:
+            problem = "the timeline changed"
+        elif board != original or index.values != board or index.counts != countBoard(board):
+            problem = "the game's index changed"
+        elif pieces.board is not with_index["board"] or pieces.values != with_index["board"] or \
+                pieces.counts != countBoard(with_index["board"]):
+            problem = "the copy did not end up with the timeline's board"
+        elif without["pieces"] is not None:
+            problem = "a timeline without an index had one"
+        elif any(pieces.cells[v] is index.cells.get(v) for v in pieces.cells):
+            problem = "the copy shared its cells with the game's index"
+        else:
+            # Once the timeline has played the copy moves to the game board, and
+            # a move that is not a BURST swap leaves the index alone
+            played = deepcopy(with_index["board"])
+            pieces.moveTo(played)
+            pieces.update(with_index["changed"])
+            plain = [move for move in legalMoves(played) if not isBurstSwap(played, *move)]
+            if pieces.board is not played or pieces.sync() != []:
+                problem = "the copy was not handed over to the game board"
+            elif len(plain) > 0 and resolveMove(played, plain[0][0], plain[0][1], plain[0][2], plain[0][3], 6,
+                                                GameRandom(game), pieces)["pieces"] is not None:
+                problem = "a move that is not a BURST swap copied the index"
+        if problem is not None:
+            break
+
+    if problem is None:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED:", problem, "on game", game)
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_PieceIndex()
@@ -0,0 +1,471 @@
+###############################################################################
+#  File: crush_refill.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               The expected score from the pieces that fall in after a move,
+#               worked out instead of sampled.  genFalls() picks each new piece
+#               with randrange(num_syms), so the chance that the new pieces
+#               finish a pattern is the chance that each EMPTY cell in it gets
+#               the colour the pieces already there share.  Adding up those
+#               chances over every place a pattern fits, less the chance that
+#               an overlapping pattern is cleared before it, gives the expected
+#               points of the first refill.  A second level follows each
+#               pattern the refill can make through its cascade and adds the
+#               expected points of the refill after that.  The Monte Carlo
+#               version is kept alongside to check the two against each other.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from crush_cascade import cascadeOutcome, rankMoves, runCascade
+from crush_zobrist import TranspositionCache, boardHash
+from random import Random, getstate, seed
+
+# The tables made by overlapTable(), one for each board size
+OVERLAP_TABLES = {}
+
+# Patterns the refill makes less often than this are only counted for their own
+# points by refillValue(), without following their cascades
+FOLLOW_CHANCE = 0.01
+
+
+def overlapTable(rows, cols):
+    """
+    Method Name: overlapTable()
+    Description: Finds, for every window from compileShapes(), the earlier windows
+    that share a cell with it.  When one of them matches as well it is cleared
+    first, and the later pattern loses a piece and never scores.  Only the
+    windows that need the fewest extra cells to match are kept, since the others
+    are ruled out along with them.  The table is only built once for each board
+    size.
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :return: a list holding, for each window, a list of (cells, start) pairs: the
+             cells each earlier window adds and the cell its pattern starts at
+    """
+    if (rows, cols) in OVERLAP_TABLES:
+        return OVERLAP_TABLES[(rows, cols)]
+
+    windows, covering = compileShapes(rows, cols)
+    cells = [frozenset(((r, c),) + rest) for (pattern, r, c, rest) in windows]
+    table = []
+    for i in range(len(windows)):
+        earlier = set()
+        for cell in cells[i]:
+            earlier.update(j for j in covering[cell] if j < i)
+
+        # The smallest sets of extra cells first, each kept only if none of the
+        # kept ones is inside it
+        extras = {}
+        for j in earlier:
+            extras.setdefault(cells[j] - cells[i], (windows[j][1], windows[j][2]))
+        kept = []
+        for extra in sorted(extras, key=len):
+            if not any(other <= extra for (other, start) in kept):
+                kept.append((extra, extras[extra]))
+        table.append([(tuple(extra), start) for (extra, start) in kept])
+
+    OVERLAP_TABLES[(rows, cols)] = table
+    return table
+
+
+def colourChances(num_syms):
+    """
+    Method Name: colourChances()
+    Description: The chance that a new piece matches each colour the way windowAt()
+    matches pieces, by their value mod 10
+    :param num_syms: the number of different pieces in play
+    :return: a tuple of two lists of 10 chances, the second for the cell a pattern
+             starts at, which can never be a BURST
+    """
+    chances = [0.0] * 10
+    starts = [0.0] * 10
+    for x in range(num_syms):
+        chances[x % 10] += 1.0 / num_syms
+        if x != BURST:
+            starts[x % 10] += 1.0 / num_syms
+    return (chances, starts)
+
+
+def cellChance(v, colour, start, chances):
+    """
+    Method Name: cellChance()
+    Description: The chance that a cell ends up matching a colour once the board is
+    refilled
+    :param v: the piece in the cell, or EMPTY if it is refilled
+    :param colour: the colour, from 0 to 9
+    :param start: True if a pattern starts at the cell
+    :param chances: the chances from colourChances()
+    :return: the chance, which is 0 or 1 for a cell that is not refilled
+    """
+    if v == EMPTY:
+        return chances[1][colour] if start else chances[0][colour]
+    if v % 10 != colour or start and v == BURST:
+        return 0.0
+    return 1.0
+
+
+def refillChances(board, num_syms, columns=None):
+    """
+    Method Name: refillChances()
+    Description: Lists the patterns the refill can make on a board and the chance
+    of each, in the order collapse() would clear them.  Every EMPTY cell gets a
+    new piece chosen with randrange(num_syms).  A pattern counts only when none
+    of the earlier patterns that share a cell with it matches as well, taking
+    those to happen independently of each other.
+    :param board: the game board, with EMPTY cells where the new pieces go and no
+                  patterns among the other pieces
+    :param num_syms: the number of different pieces in play
+    :param columns: only list the patterns through the EMPTY cells in these
+                    columns, or None for every column
+    :return: a list of (window, colour, chance) tuples, where window is the
+             position of the pattern in the compileShapes() table
+    """
+    rows = len(board)
+    cols = len(board[0])
+    windows, covering = compileShapes(rows, cols)
+    earlier = overlapTable(rows, cols)
+    chances = colourChances(num_syms)
+
+    if columns is None:
+        columns = range(cols)
+    found = set()
+    for c in columns:
+        for r in range(rows):
+            if board[r][c] == EMPTY:
+                found.update(covering[(r, c)])
+
+    # A window that is all new pieces can only be a colour a new piece can be
+    possible = [colour for colour in range(10) if chances[1][colour] > 0]
+
+    result = []
+    for i in sorted(found):
+        pattern, r, c, rest = windows[i]
+        # The pieces already in the window decide its colour
+        colours = possible
+        for (a, b) in ((r, c),) + rest:
+            if board[a][b] != EMPTY:
+                colours = [board[a][b] % 10]
+                break
+
+        for colour in colours:
+            # cellChance(), written out for the cells that are not a start
+            new = chances[0][colour]
+            p = cellChance(board[r][c], colour, True, chances)
+            for (a, b) in rest:
+                v = board[a][b]
+                if v == EMPTY:
+                    p *= new
+                elif v % 10 != colour:
+                    p = 0.0
+                    break
+            if p == 0:
+                continue
+            for (extra, start) in earlier[i]:
+                q = 1.0
+                for (a, b) in extra:
+                    v = board[a][b]
+                    if (a, b) == start:
+                        q *= cellChance(v, colour, True, chances)
+                    elif v == EMPTY:
+                        q *= new
+                    elif v % 10 != colour:
+                        q = 0.0
+                    if q == 0:
+                        break
+                p *= 1 - q
+            if p > 0:
+                result.append((i, colour, p))
+    return result
+
+
+def refillValue(board, num_syms, sf=1, levels=1, columns=None):
+    """
+    Method Name: refillValue()
+    Description: The expected points scored by the pieces that fill the EMPTY cells
+    on a board.  The first level counts the patterns the new pieces make straight
+    away, with the score factor going up by the chance of each pattern cleared
+    before it.  Each further level plays the likely ones of those patterns out
+    through their cascades and adds the expected points of the next refill.
+    :param board: the game board, with EMPTY cells where the new pieces go and no
+                  patterns among the other pieces.  It is not changed.
+    :param num_syms: the number of different pieces in play
+    :param sf: the score factor the refill starts with
+    :param levels: the number of refills to look ahead
+    :param columns: only count the patterns through the EMPTY cells in these
+                    columns, or None for every column
+    :return: the expected points
+    """
+    if levels <= 0:
+        return 0.0
+
+    windows = compileShapes(len(board), len(board[0]))[0]
+    value = 0.0
+    expected_sf = sf
+    for (i, colour, p) in refillChances(board, num_syms, columns):
+        pattern, r, c, rest = windows[i]
+        if levels == 1 or p < FOLLOW_CHANCE:
+            if pattern[2] is not None:
+                amount = pattern[4]
+            else:
+                amount = pattern[4] * expected_sf
+        else:
+            amount = forcedValue(board, windows[i], colour, num_syms, expected_sf, levels - 1)
+        value += p * amount
+        expected_sf += p
+    return value
+
+
+def forcedValue(board, window, colour, num_syms, sf, levels):
+    """
+    Method Name: forcedValue()
+    Description: The expected points once the refill has made one pattern: its
+    cascade, played out, and the refills after it.  The rest of the EMPTY cells
+    are refilled at the same time as the pattern, and their own patterns are
+    counted apart from this one, so the next refill only counts the patterns
+    through the columns the cascade changed.
+    :param board: the game board, which is put back the way it was
+    :param window: the window from compileShapes() the refill makes
+    :param colour: the colour it is made in
+    :param num_syms: the number of different pieces in play
+    :param sf: the score factor when it is cleared
+    :param levels: the number of refills to look ahead after it
+    :return: the expected points
+    """
+    pattern, r, c, rest = window
+    journal = Journal()
+    journal.mark()
+    cells = ((r, c),) + rest
+    for (a, b) in cells:
+        if board[a][b] == EMPTY:
+            journal.set(board, a, b, colour)
+    start = len(journal.changes)
+    steps = runCascade(board, journal, sf, set(cells))
+    columns = set(change[1] for change in journal.changes[start:])
+    value = steps["points"] + refillValue(board, num_syms, steps["sf"], levels, columns)
+    journal.undo(board)
+    return value
+
+
+def sampleRefillValue(board, num_syms, sf=1, levels=1, samples=1000, sample_seed=0):
+    """
+    Method Name: sampleRefillValue()
+    Description: The Monte Carlo version of refillValue(), which fills the EMPTY
+    cells with random pieces over and over and averages the points scored.  Each
+    level but the last plays its cascade out.  The game's own random numbers are
+    not used.
+    :param board: the game board, which is not changed
+    :param num_syms: the number of different pieces in play
+    :param sf: the score factor the refill starts with
+    :param levels: the number of refills to look ahead
+    :param samples: the number of refills to average over
+    :param sample_seed: the seed for the random pieces
+    :return: the average points
+    """
+    rng = Random(sample_seed)
+    total = 0
+    for i in range(samples):
+        after = [row[:] for row in board]
+        journal = Journal()
+        points = 0
+        level_sf = sf
+        for level in range(levels):
+            filled = set()
+            for r in range(len(after)):
+                for c in range(len(after[0])):
+                    if after[r][c] == EMPTY:
+                        after[r][c] = rng.randrange(num_syms)
+                        filled.add((r, c))
+            if len(filled) == 0:
+                break
+            if level == levels - 1:
+                asyncAnim = []
+                clearMatches(after, journal, level_sf, [], asyncAnim, None, filled)
+                points += sum(anim[4] for anim in asyncAnim)
+            else:
+                steps = runCascade(after, journal, level_sf, filled)
+                points += steps["points"]
+                level_sf = steps["sf"]
+        total += points
+    return total / samples
+
+
+def expectedMoveValue(board, r1, c1, r2, c2, num_syms, levels=1):
+    """
+    Method Name: expectedMoveValue()
+    Description: The expected points of a move: its certain cascade, from
+    cascadeOutcome(), and the refills after it, from refillValue()
+    :param board: the game board, which should be settled.  It is not changed.
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param num_syms: the number of different pieces in play
+    :param levels: the number of refills to look ahead
+    :return: the expected points, or None if the move is not allowed
+    """
+    journal = Journal()
+    outcome = cascadeOutcome(board, r1, c1, r2, c2, journal, False)
+    if outcome is None:
+        return None
+    value = outcome["points"] + refillValue(board, num_syms, outcome["sf"], levels)
+    journal.undo(board)
+    return value
+
+
+def expectedMoves(board, num_syms, levels=1, cache=None):
+    """
+    Method Name: expectedMoves()
+    Description: Ranks the legal moves by their expected points.  The cache is
+    keyed by the board's hash rather than its canonical key, since renaming the
+    colours can change which of them the refill can make.
+    :param board: the game board, which should be settled.  It is not changed.
+    :param num_syms: the number of different pieces in play
+    :param levels: the number of refills to look ahead
+    :param cache: an optional TranspositionCache
+    :return: a list of (expected points, move) pairs, best first.  Results from
+             the cache are shared, so they must not be changed.
+    """
+    if cache is not None:
+        key = (boardHash(board), num_syms, levels, "refill")
+        ranked = cache.get(key)
+        if ranked is not None:
+            return ranked
+
+    scored = []
+    for move in legalMoves(board):
+        value = expectedMoveValue(board, move[0], move[1], move[2], move[3], num_syms, levels)
+        if value is not None:
+            scored.append((value, move))
+    ranked = sorted(scored, key=lambda pm: -pm[0])
+
+    if cache is not None:
+        cache.put(key, ranked)
+    return ranked
+
+
+def expectedHint(board, num_syms, levels=1):
+    """
+    Method Name: expectedHint()
+    Description: A hint for the move with the most expected points, given the same
+    way hint() gives one
+    :param board: the game board
+    :param num_syms: the number of different pieces in play
+    :param levels: the number of refills to look ahead
+    :return: The row and column of the first piece, followed by the row and
+             column of the second piece.  -1, -1, -1, -1 if there is no move.
+    """
+    ranked = expectedMoves(board, num_syms, levels)
+    if len(ranked) == 0:
+        return (-1, -1, -1, -1)
+    return ranked[0][1]
+
+
+#
+# Run a series of tests on the refillValue function
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_refillValue():
+    print("Testing refillValue...")
+
+    passed = 0
+    failed = 0
+
+    # One EMPTY cell that finishes a line of 3 one time in num_syms
+    for (sf, syms, a) in [(1, 6, 5.0), (2, 6, 10.0), (1, 3, 10.0)]:
+        print("  Attempting to score one refill that can finish a line, sf %d and %d symbols... " %
+              (sf, syms), end="")
+        b = [[EMPTY, 1, 1, 2], \
+             [2, 0, 4, 5], \
+             [0, 2, 0, 4]]
+        result = refillValue(b, syms, sf)
+        if abs(result - a) > 1e-9:
+            print("\nFAILED: refillValue gave", result, "when", a, "was expected")
+            print()
+            failed += 1
+            continue
+        print("Success.")
+        passed += 1
+
+    # Against sampling, after the best move on a corpus of boards
+    for (rows, cols, syms) in [(8, 8, 6), (7, 7, 5)]:
+        print("  Attempting to match sampled refills on 12 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        totals = {1: [0.0, 0.0], 2: [0.0, 0.0]}
+        chances = 0
+        followed = 0
+        problem = None
+        overlapTable(rows, cols)
+        for game in range(12):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            settle(board, syms)
+            move = rankMoves(board)[0][1]
+            outcome = cascadeOutcome(board, move[0], move[1], move[2], move[3], Journal(), False)
+            before = deepcopy(board)
+            state = getstate()
+            for levels in [1, 2]:
+                totals[levels][0] += refillValue(board, syms, outcome["sf"], levels)
+                totals[levels][1] += sampleRefillValue(board, syms, outcome["sf"], levels, 300, game)
+            if board != before or getstate() != state:
+                problem = "the board or the random numbers were changed"
+                break
+
+            # The first level only looks each pattern up, and the second plays a
+            # cascade out for the patterns likely enough to be followed
+            for (i, colour, p) in refillChances(board, syms):
+                chances += 1
+                if p >= FOLLOW_CHANCE:
+                    followed += 1
+
+        # The second level is further from the sampled average
+        for (levels, error) in [(1, 0.1), (2, 0.15)]:
+            value, sampled = totals[levels]
+            if abs(value - sampled) > error * sampled:
+                problem = "level %d expected %.1f points but sampling found %.1f" % (levels, value, sampled)
+
+        # Working the refills out takes less work than sampling them, which plays
+        # a refill out for each of the 300 samples on every board
+        if problem is None and (chances > 300 * 12 or followed * 10 > 300 * 12):
+            problem = "%d patterns were looked up and %d followed for 3600 sampled refills" % (chances, followed)
+        if problem is not None:
+            print("\nFAILED:", problem)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # The expected hint is a legal move, and is the same from the cache
+    print("  Attempting to rank the moves by expected points... ", end="")
+    cache = TranspositionCache()
+    problem = None
+    for game in range(10):
+        seed(game)
+        board = createBoard(8, 8, 6)
+        settle(board, 6)
+        ranked = expectedMoves(board, 6, 1, cache)
+        if expectedMoves(board, 6, 1, cache) is not ranked or \
+                len(ranked) != len(legalMoves(board)) or expectedHint(board, 6) != ranked[0][1] or \
+                any(value < points for (value, move), (points, other) in
+                    zip(sorted(ranked, key=lambda pm: pm[1]), sorted(rankMoves(board), key=lambda pm: pm[1]))):
+            problem = game
+            break
+    if problem is not None:
+        print("\nFAILED: the moves were not ranked on game", problem)
+        print()
+        failed += 1
+    else:
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_refillValue()
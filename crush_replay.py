@@ -0,0 +1,351 @@
+###############################################################################
+#  File: crush_replay.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               Compact replays of seeded games.  A game played with a
+#               GameRandom only depends on its seed and its moves, so that is
+#               all a replay holds, along with a checksum of the board after
+#               every turn.  Numbers are written as varints (7 bits a byte, the
+#               top bit set on every byte but the last) and a move is one
+#               number: the cell of its top or left piece and which way the
+#               swap goes, which fits in one byte on an 8 by 8 board.  A replay
+#               is played back without a window and without shuffling any
+#               animations, and every checksum on the way is checked, so a
+#               replay from a different version of the rules is caught at the
+#               first turn that plays out differently.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+import zlib
+
+# The first bytes of every replay, the last one being the version of the format
+REPLAY_MAGIC = b"CCR\x01"
+
+
+def boardChecksum(board):
+    """
+    Method Name: boardChecksum()
+    Description: A 32-bit CRC of every cell on the board
+    :param board: the game board
+    :return: the checksum
+    """
+    return zlib.crc32(bytes((v + 1) & 0xFF for row in board for v in row))
+
+
+def writeVarint(out, n):
+    """
+    Method Name: writeVarint()
+    Description: Adds a number that is not negative to the end of a bytearray,
+    7 bits at a time, lowest first
+    :param out: the bytearray
+    :param n: the number
+    :return: none
+    """
+    if n < 0:
+        raise ValueError("varints cannot hold %d" % n)
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def readVarint(data, pos):
+    """
+    Method Name: readVarint()
+    Description: Reads a number written by writeVarint()
+    :param data: the bytes
+    :param pos: where the number starts
+    :return: a tuple of the number and where the next thing starts
+    """
+    n = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("the replay ends part way through a number")
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return (n, pos)
+        shift += 7
+
+
+def moveCode(r1, c1, r2, c2, cols):
+    """
+    Method Name: moveCode()
+    Description: The number a move is written as.  Swapping two pieces is the same
+    move whichever is picked first, so the top or left one is used.
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param cols: the number of columns on the board
+    :return: the number
+    """
+    if (r2, c2) < (r1, c1):
+        r1, c1, r2, c2 = r2, c2, r1, c1
+    return (r1 * cols + c1) * 2 + (r2 - r1)
+
+
+def codeMove(code, cols):
+    """
+    Method Name: codeMove()
+    Description: The move a number from moveCode() stands for
+    :param code: the number
+    :param cols: the number of columns on the board
+    :return: the (r1, c1, r2, c2) move
+    """
+    cell, down = divmod(code, 2)
+    r, c = divmod(cell, cols)
+    if down:
+        return (r, c, r + 1, c)
+    return (r, c, r, c + 1)
+
+
+class Replay:
+    """
+    Class Name: Replay
+    Description: The seed and moves of one game, with the checksum of the board
+    before the first move and after every move.  Start the game with start(), play
+    each move with playMove() and the Replay's rng, and record() it.
+    """
+
+    def __init__(self, rows, cols, num_syms, game_seed, moves=None, checksums=None):
+        """
+        Method Name: __init__()
+        Description: Sets up a replay of a game
+        :param rows: the number of rows on the board
+        :param cols: the number of columns on the board
+        :param num_syms: the number of different pieces in play
+        :param game_seed: the seed of the game's GameRandom, an int that is not
+                          negative
+        :param moves: the (r1, c1, r2, c2) moves played so far
+        :param checksums: the boardChecksum() before the first move and after
+                          every move
+        """
+        if game_seed < 0:
+            raise ValueError("a replay's seed cannot be negative")
+        self.rows = rows
+        self.cols = cols
+        self.num_syms = num_syms
+        self.game_seed = game_seed
+        self.moves = list(moves) if moves is not None else []
+        self.checksums = list(checksums) if checksums is not None else []
+
+    def start(self, cosmetic=True):
+        """
+        Method Name: start()
+        Description: Creates and settles the game's first board
+        :param cosmetic: False to leave the destroy animations unshuffled
+        :return: a tuple of the board, the GameRandom to play the game with and
+                 the points scored while the board settled
+        """
+        rng = GameRandom(self.game_seed, cosmetic)
+        board = createBoard(self.rows, self.cols, self.num_syms, rng)
+        score = settle(board, self.num_syms, 1, None, None, rng)
+        if len(self.checksums) == 0:
+            self.checksums.append(boardChecksum(board))
+        return (board, rng, score)
+
+    def record(self, board, move):
+        """
+        Method Name: record()
+        Description: Adds a move that has just been played
+        :param board: the game board after the move settled
+        :param move: the (r1, c1, r2, c2) move.  It is kept with the top or left
+                     piece first, the way it is read back.
+        :return: none
+        """
+        self.moves.append(codeMove(moveCode(move[0], move[1], move[2], move[3], self.cols), self.cols))
+        self.checksums.append(boardChecksum(board))
+
+    def toBytes(self):
+        """
+        Method Name: toBytes()
+        Description: Writes the replay out
+        :return: the bytes
+        """
+        out = bytearray(REPLAY_MAGIC)
+        for n in [self.game_seed, self.rows, self.cols, self.num_syms, len(self.moves)]:
+            writeVarint(out, n)
+        out += self.checksums[0].to_bytes(4, "little")
+        for move, checksum in zip(self.moves, self.checksums[1:]):
+            writeVarint(out, moveCode(move[0], move[1], move[2], move[3], self.cols))
+            out += checksum.to_bytes(4, "little")
+        return bytes(out)
+
+    @staticmethod
+    def fromBytes(data):
+        """
+        Method Name: fromBytes()
+        Description: Reads a replay written by toBytes()
+        :param data: the bytes
+        :return: the Replay
+        """
+        if data[:len(REPLAY_MAGIC)] != REPLAY_MAGIC:
+            raise ValueError("this is not a version %d replay" % REPLAY_MAGIC[-1])
+        pos = len(REPLAY_MAGIC)
+        header = []
+        for i in range(5):
+            n, pos = readVarint(data, pos)
+            header.append(n)
+        game_seed, rows, cols, num_syms, count = header
+        checksums = [int.from_bytes(data[pos:pos + 4], "little")]
+        pos += 4
+        moves = []
+        for i in range(count):
+            code, pos = readVarint(data, pos)
+            moves.append(codeMove(code, cols))
+            checksums.append(int.from_bytes(data[pos:pos + 4], "little"))
+            pos += 4
+        if pos != len(data):
+            raise ValueError("the replay does not end after its last move")
+        return Replay(rows, cols, num_syms, game_seed, moves, checksums)
+
+    def seek(self, turn=None, verify=True):
+        """
+        Method Name: seek()
+        Description: Plays the game without a window up to a turn
+        :param turn: the number of moves to play, or None for all of them
+        :param verify: True to check the board against its checksum after every
+                       turn, raising ValueError at the first one that differs
+        :return: a tuple of the board and the score after the turn
+        """
+        if turn is None:
+            turn = len(self.moves)
+        if turn < 0 or turn > len(self.moves):
+            raise ValueError("the replay has no turn %d" % turn)
+
+        board, rng, score = self.start(False)
+        if verify and boardChecksum(board) != self.checksums[0]:
+            raise ValueError("the replay does not match its first board")
+        for i in range(turn):
+            r1, c1, r2, c2 = self.moves[i]
+            points = playMove(board, r1, c1, r2, c2, self.num_syms, None, rng)
+            if points == -1:
+                raise ValueError("move %d of the replay is not allowed" % (i + 1))
+            score += points
+            if verify and boardChecksum(board) != self.checksums[i + 1]:
+                raise ValueError("the replay does not match after turn %d" % (i + 1))
+        return (board, score)
+
+
+def recordGame(rows, cols, num_syms, game_seed, turns, pick=hint):
+    """
+    Method Name: recordGame()
+    Description: Plays a game without a window and records it
+    :param rows: the number of rows on the board
+    :param cols: the number of columns on the board
+    :param num_syms: the number of different pieces in play
+    :param game_seed: the seed of the game
+    :param turns: the most moves to play.  The game stops early if there are no
+                  moves left.
+    :param pick: a function that picks the move to play on a board the way hint()
+                 does, returning -1, -1, -1, -1 when there is none
+    :return: a tuple of the Replay, the final board and the final score
+    """
+    replay = Replay(rows, cols, num_syms, game_seed)
+    board, rng, score = replay.start(False)
+    for turn in range(turns):
+        r1, c1, r2, c2 = pick(board)
+        if r1 == -1:
+            break
+        score += playMove(board, r1, c1, r2, c2, num_syms, None, rng)
+        replay.record(board, (r1, c1, r2, c2))
+    return (replay, board, score)
+
+
+#
+# Run a series of tests on recording and playing back games
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_Replay():
+    print("Testing Replay...")
+
+    passed = 0
+    failed = 0
+
+    print("  Attempting to write and read varints... ", end="")
+    out = bytearray()
+    numbers = [0, 1, 127, 128, 300, 2 ** 32, 2 ** 64 - 1]
+    for n in numbers:
+        writeVarint(out, n)
+    pos = 0
+    back = []
+    for n in numbers:
+        value, pos = readVarint(out, pos)
+        back.append(value)
+    if back == numbers and pos == len(out) and len(out) == 1 + 1 + 1 + 2 + 2 + 5 + 10:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: read back", back)
+        failed += 1
+
+    for (rows, cols, syms) in [(8, 8, 6), (7, 7, 5), (6, 7, 4)]:
+        print("  Attempting to replay 5 games of 40 moves: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(5):
+            replay, board, score = recordGame(rows, cols, syms, 1000 * game + 7, 40)
+            data = replay.toBytes()
+            back = Replay.fromBytes(data)
+            if back.moves != replay.moves or back.checksums != replay.checksums:
+                problem = "the replay did not read back the same"
+                break
+            if len(data) > 4 + 12 + 4 + 6 * len(replay.moves):
+                problem = "the replay took %d bytes" % len(data)
+                break
+            if back.seek() != (board, score):
+                problem = "the replay did not end on the same board and score"
+                break
+
+            # Part way through, the board is the one that was played then
+            turn = len(replay.moves) // 2
+            middle, middle_score = back.seek(turn)
+            if boardChecksum(middle) != replay.checksums[turn]:
+                problem = "turn %d did not match" % turn
+                break
+
+            # A move that was changed is caught by the checksums
+            if len(back.moves) > 3:
+                others = [move for move in legalMoves(back.seek(3)[0]) if move != back.moves[3]]
+                if len(others) > 0:
+                    back.moves[3] = others[0]
+                    try:
+                        back.seek()
+                        problem = "a changed move was not caught"
+                    except ValueError:
+                        pass
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem, "on game", game)
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print("  Attempting to reject a replay that is cut short... ", end="")
+    replay, board, score = recordGame(8, 8, 6, 1, 10)
+    try:
+        Replay.fromBytes(replay.toBytes()[:-3])
+        print("\nFAILED: the short replay was read")
+        failed += 1
+    except ValueError:
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_Replay()
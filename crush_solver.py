@@ -0,0 +1,387 @@
+###############################################################################
+#  File: crush_solver.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               A lookahead solver that picks moves by searching several moves
+#               ahead.  Each move is scored with the whole cascade it sets off,
+#               and the pieces that fall in afterwards are handled by averaging
+#               over a few sampled refills (expectimax).  The search deepens one
+#               move at a time until the time budget runs out, remembers the
+#               positions it has already scored, and can spread the moves at
+#               the top of the search over a pool of processes.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from crush_refill import expectedMoveValue
+from crush_zobrist import TranspositionCache, boardHash, moveOutcome, splitmix64, MASK64
+from concurrent.futures import ProcessPoolExecutor
+from random import getstate, seed
+from time import time
+import os
+
+
+class SearchTimeout(Exception):
+    """
+    Class Name: SearchTimeout
+    Description: Raised inside the search when the time budget runs out, so the
+    depth being searched can be abandoned
+    """
+    pass
+
+
+def orderedMoves(board, cache=None):
+    """
+    Method Name: orderedMoves()
+    Description: Lists the legal moves, the ones that score the most before the
+    board refills first
+    :param board: the game board
+    :param cache: an optional TranspositionCache for moveOutcome()
+    :return: a list of (points, move) pairs, best first
+    """
+    scored = []
+    for move in legalMoves(board):
+        outcome = moveOutcome(board, move[0], move[1], move[2], move[3], cache, None, True)
+        if outcome is not None:
+            scored.append((outcome["points"], move))
+    scored.sort(key=lambda pm: -pm[0])
+    return scored
+
+
+def sampleSeed(search_seed, h, move, sample):
+    """
+    Method Name: sampleSeed()
+    Description: The seed for one sampled refill.  It only depends on the board and
+    the move, so a position scores the same wherever the search meets it and
+    the table of scored boards never mixes up different samples.
+    :param search_seed: the seed of the whole search
+    :param h: the boardHash() of the board the move is played on
+    :param move: the (r1, c1, r2, c2) swap
+    :param sample: which sample this is
+    :return: a 64-bit seed
+    """
+    x = splitmix64((search_seed ^ h) & MASK64)
+    for v in move:
+        x = splitmix64(x ^ v)
+    return splitmix64(x ^ sample)
+
+
+def playSample(board, move, num_syms, sample_seed):
+    """
+    Method Name: playSample()
+    Description: Plays a move on a copy of the board with one sampled refill.  The
+    game's own random numbers are not used.
+    :param board: the game board, which is not changed
+    :param move: the (r1, c1, r2, c2) swap
+    :param num_syms: the number of different pieces in play
+    :param sample_seed: the seed for the refill
+    :return: a tuple of the points scored and the board after the move
+    """
+    after = [row[:] for row in board]
+    points = playMove(after, move[0], move[1], move[2], move[3], num_syms, None, GameRandom(sample_seed, False))
+    return (points, after)
+
+
+def expectimax(board, depth, num_syms, samples, width, search_seed, deadline, table, analytic=False):
+    """
+    Method Name: expectimax()
+    Description: The best average score that can be made from a board over the
+    next few moves
+    :param board: the game board, which is not changed
+    :param depth: the number of moves to look ahead
+    :param num_syms: the number of different pieces in play
+    :param samples: the number of refills to average over after each move
+    :param width: the number of most promising moves to search from each board
+    :param search_seed: the seed of the whole search
+    :param deadline: the time() at which to give up, raising SearchTimeout
+    :param table: the TranspositionCache of boards already scored
+    :param analytic: score the last move with expectedMoveValue() instead of
+                     sampling its refills
+    :return: the expected score
+    """
+    if depth == 0:
+        return 0.0
+    if time() > deadline:
+        raise SearchTimeout()
+
+    key = (boardHash(board), depth)
+    value = table.get(key)
+    if value is not None:
+        return value
+
+    value = 0.0
+    for points, move in orderedMoves(board, table)[:width]:
+        value = max(value, chance(board, move, depth, num_syms, samples, width, search_seed, deadline, table,
+                                  analytic))
+    table.put(key, value)
+    return value
+
+
+def chance(board, move, depth, num_syms, samples, width, search_seed, deadline, table, analytic=False):
+    """
+    Method Name: chance()
+    Description: The average score of a move, followed by the best play after it,
+    over the sampled refills
+    :param board: the game board, which is not changed
+    :param move: the (r1, c1, r2, c2) swap
+    :param depth: the number of moves to look ahead, counting this one
+    :param num_syms: the number of different pieces in play
+    :param samples: the number of refills to average over
+    :param width: the number of most promising moves to search from each board
+    :param search_seed: the seed of the whole search
+    :param deadline: the time() at which to give up, raising SearchTimeout
+    :param table: the TranspositionCache of boards already scored
+    :param analytic: score the last move with expectedMoveValue() instead of
+                     sampling its refills
+    :return: the expected score
+    """
+    if analytic and depth == 1:
+        return expectedMoveValue(board, move[0], move[1], move[2], move[3], num_syms)
+
+    h = boardHash(board)
+    total = 0.0
+    for i in range(samples):
+        points, after = playSample(board, move, num_syms, sampleSeed(search_seed, h, move, i))
+        total += points + expectimax(after, depth - 1, num_syms, samples, width, search_seed, deadline, table,
+                                     analytic)
+    return total / samples
+
+
+def scoredBoards(table):
+    """
+    Method Name: scoredBoards()
+    Description: The scores of the boards in a table, without the move outcomes,
+    which are quick to work out again and large to send to another process
+    :param table: the TranspositionCache of the search
+    :return: a dictionary from (hash, depth) to the expected score
+    """
+    return dict((key, value) for key, value in table.entries.items() if type(key[1]) is int)
+
+
+def rootValue(args):
+    """
+    Method Name: rootValue()
+    Description: Scores one move at the top of the search.  Run by the process pool,
+    so it takes a single tuple of arguments.  The table starts with the boards
+    the move's search has already scored.
+    :param args: a tuple of the board, move, depth, num_syms, samples, width,
+                 search_seed, deadline, analytic and the scoredBoards() the
+                 move's search has found at the depths before
+    :return: a tuple of the expected score, or None if the time budget ran out,
+             and the scoredBoards() that were not known before
+    """
+    board, move, depth, num_syms, samples, width, search_seed, deadline, analytic, known = args
+    table = TranspositionCache()
+    for key, value in known.items():
+        table.put(key, value)
+    try:
+        value = chance(board, move, depth, num_syms, samples, width, search_seed, deadline, table, analytic)
+    except SearchTimeout:
+        return (None, {})
+    scored = scoredBoards(table)
+    return (value, dict((key, scored[key]) for key in scored if key not in known))
+
+
+# The process pools solve() uses when it is not given one, for each number of
+# workers.  They are kept so that the processes only start once.
+SOLVER_POOLS = {}
+
+
+def solverPool(workers):
+    """
+    Method Name: solverPool()
+    Description: The process pool for a number of workers, started the first time
+    it is asked for
+    :param workers: the number of processes
+    :return: the ProcessPoolExecutor
+    """
+    if workers not in SOLVER_POOLS:
+        SOLVER_POOLS[workers] = ProcessPoolExecutor(workers)
+    return SOLVER_POOLS[workers]
+
+
+def solve(board, num_syms, turns_left=None, budget=1.0, samples=3, width=6, max_depth=None,
+          workers=1, search_seed=0, analytic=False, executor=None):
+    """
+    Method Name: solve()
+    Description: Searches for the best move.  The search looks one move ahead, then
+    two, and so on, until the time budget runs out, the turns run out or
+    max_depth is reached.  The answer from the deepest search that finished is
+    returned.
+    :param board: the game board, which should be settled.  It is not changed.
+    :param num_syms: the number of different pieces in play
+    :param turns_left: the number of turns left in the game, or None for no limit
+    :param budget: the number of seconds to search for
+    :param samples: the number of refills to average over after each move
+    :param width: the number of most promising moves to search below the top
+    :param max_depth: the deepest search to try, or None for no limit
+    :param workers: the number of processes to score the top moves with.  None
+                    uses every core.
+    :param search_seed: the seed for the sampled refills
+    :param analytic: score the last move of each line of play with
+                     expectedMoveValue(), which works out the refill it is followed
+                     by instead of sampling it
+    :param executor: an optional executor to score the top moves with, such as a
+                     ProcessPoolExecutor, in place of the solverPool() of workers.
+                     It is left running for the caller to reuse.
+    :return: a dictionary holding the best "move" as (r1, c1, r2, c2), its expected
+             "score" and the "depth" searched.  The move is (-1, -1, -1, -1) if
+             there are no moves.
+    """
+    deadline = time() + budget
+    table = TranspositionCache()
+    moves = orderedMoves(board, table)
+    if len(moves) == 0:
+        return {"move": (-1, -1, -1, -1), "score": 0.0, "depth": 0}
+
+    # Until a search finishes, the move that scores the most right away is best
+    best = {"move": moves[0][1], "score": float(moves[0][0]), "depth": 0}
+
+    limit = max_depth
+    if turns_left is not None and (limit is None or turns_left < limit):
+        limit = turns_left
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    pool = executor
+    if pool is None and workers > 1 and len(moves) > 1:
+        pool = solverPool(workers)
+
+    # The boards each move's search has scored in the processes.  The refills
+    # are sampled the same way at every depth, so the search of a move one
+    # deeper meets the boards it scored before, and only those are sent with it.
+    subtrees = dict((move, {}) for points, move in moves)
+
+    depth = 1
+    while (limit is None or depth <= limit) and time() < deadline:
+        if pool is not None:
+            values = []
+            results = pool.map(rootValue, [(board, move, depth, num_syms, samples, width, search_seed, deadline,
+                                            analytic, subtrees[move]) for points, move in moves])
+            for (points, move), (value, scored) in zip(moves, results):
+                values.append(value)
+                subtrees[move].update(scored)
+        else:
+            values = []
+            try:
+                for points, move in moves:
+                    values.append(chance(board, move, depth, num_syms, samples, width,
+                                         search_seed, deadline, table, analytic))
+            except SearchTimeout:
+                values.append(None)
+        if None in values:
+            break
+
+        # Keep the first of the best moves, in the order they were searched
+        i = values.index(max(values))
+        best = {"move": moves[i][1], "score": values[i], "depth": depth}
+        depth += 1
+
+    return best
+
+
+def solverHint(board, num_syms, turns_left=None, budget=0.5, workers=1, executor=None):
+    """
+    Method Name: solverHint()
+    Description: A hint from the solver, given the same way hint() gives one, for
+    the game and for bots
+    :param board: the game board
+    :param num_syms: the number of different pieces in play
+    :param turns_left: the number of turns left in the game, or None for no limit
+    :param budget: the number of seconds to search for
+    :param workers: the number of processes to search with
+    :param executor: an optional executor to search with, see solve()
+    :return: The row and column of the first piece, followed by the row and
+             column of the second piece.  -1, -1, -1, -1 if there is no move.
+    """
+    return solve(board, num_syms, turns_left, budget, workers=workers, executor=executor)["move"]
+
+
+#
+# Run a series of tests on the solver
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_solve():
+    print("Testing solve...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (7, 7, 5), (6, 6, 4)]:
+        print("  Attempting to solve 3 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(3):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            settle(board, syms)
+            before = deepcopy(board)
+            state = getstate()
+
+            # A fixed depth gives the same answer however it is run
+            result = solve(board, syms, None, 60, 2, 3, 2)
+            if board != before or getstate() != state:
+                problem = ("the board or the random numbers were changed", game)
+                break
+            if result["depth"] != 2 or result["move"] not in legalMoves(board):
+                problem = ("the search did not finish with a legal move", game)
+                break
+            if solve(board, syms, None, 60, 2, 3, 2, 2) != result or solverPool(2) is not solverPool(2):
+                problem = ("the process pool gave a different answer", game)
+                break
+            with ProcessPoolExecutor(2) as executor:
+                if solve(board, syms, None, 60, 2, 3, 2, executor=executor) != result or \
+                        solve(board, syms, None, 60, 2, 3, 2, executor=executor) != result:
+                    problem = ("the caller's executor gave a different answer", game)
+                    break
+
+            # A worker given the boards already scored finds the same score
+            # without scoring any more of them
+            table = TranspositionCache()
+            move = result["move"]
+            value = chance(board, move, 2, syms, 2, 3, 0, time() + 60, table)
+            args = (board, move, 2, syms, 2, 3, 0, time() + 60, False)
+            fresh = rootValue(args + ({},))
+            seeded = rootValue(args + (scoredBoards(table),))
+            if fresh[0] != value or fresh[1] != scoredBoards(table) or seeded != (value, {}):
+                problem = ("the workers' tables were not seeded", game)
+                break
+
+            # Working out the last refill instead of sampling it
+            analytic = solve(board, syms, None, 60, 2, 3, 2, 1, 0, True)
+            if board != before or getstate() != state or analytic["depth"] != 2 or \
+                    analytic["move"] not in legalMoves(board):
+                problem = ("the analytic search did not finish with a legal move", game)
+                break
+
+            # Looking ahead can only find more points on average than the best
+            # single move, and one turn left means one move of lookahead
+            shallow = solve(board, syms, 1, 60, 2, 3)
+            if shallow["depth"] != 1 or result["score"] < shallow["score"]:
+                problem = ("looking ahead found fewer points", game)
+                break
+
+            # The time budget is kept to
+            start = time()
+            quick = solve(board, syms, None, 0.3)
+            if time() - start > 1.5 or quick["move"] not in legalMoves(board):
+                problem = ("the time budget was not kept to", game)
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on game", problem[1])
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_solve()
@@ -0,0 +1,429 @@
+###############################################################################
+#  File: crush_tournament.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               A tournament between policies, to find out whether a new hint
+#               heuristic or solver really beats hint().  Every policy plays
+#               every seed, so they all start on the same board and draw their
+#               refills from the same stream of random numbers, and each policy
+#               is compared with the first one game by game (a paired
+#               comparison), which needs far fewer games than comparing the two
+#               averages.  The seeds are played in shards over a pool of
+#               processes.  The standings are saved to a checkpoint file after
+#               every shard, so a long tournament that is stopped carries on
+#               from where it was.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from crush_calibrate import POLICIES, playGame
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import json
+import math
+import os
+
+# How many latency buckets there are for each doubling of the time a move takes
+LATENCY_STEPS = 4
+
+
+def latencyBucket(seconds):
+    """
+    Method Name: latencyBucket()
+    Description: The latency bucket a decision time falls in.  The buckets grow
+    by the same ratio each time, starting at one microsecond.
+    :param seconds: the time the decision took
+    :return: the bucket number
+    """
+    return max(0, int(math.log2(max(seconds * 1e6, 1.0)) * LATENCY_STEPS))
+
+
+class Standings:
+    """
+    Class Name: Standings
+    Description: The running totals of a tournament, kept without storing the
+    games.  For each policy: its scores, wins and decision times.  For each policy
+    after the first: the difference between its score and the first policy's,
+    and between their wins, on the same seed.  Two of them can be merged, so each
+    shard can be counted on its own.
+    """
+
+    def __init__(self, policies):
+        """
+        Method Name: __init__()
+        Description: Starts with no games
+        :param policies: the names of the policies, the one the others are compared
+                         with first
+        """
+        self.policies = list(policies)
+        self.games = 0
+        self.totals = {}
+        for name in self.policies:
+            self.totals[name] = {"score": 0, "score_sq": 0, "wins": 0, "moves": 0, "seconds": 0.0,
+                                 "slowest": 0.0, "latency": {}, "diff": 0, "diff_sq": 0,
+                                 "win_diff": 0, "win_diff_sq": 0}
+
+    def add(self, results):
+        """
+        Method Name: add()
+        Description: Counts one seed
+        :param results: a dictionary of (score, won, timings) for each policy on the
+                        seed, timings being the seconds each of its moves took
+        :return: none
+        """
+        base_score, base_won, base_timings = results[self.policies[0]]
+        for name in self.policies:
+            score, won, timings = results[name]
+            totals = self.totals[name]
+            totals["score"] += score
+            totals["score_sq"] += score * score
+            totals["wins"] += int(won)
+            totals["moves"] += len(timings)
+            totals["seconds"] += sum(timings)
+            for seconds in timings:
+                totals["slowest"] = max(totals["slowest"], seconds)
+                b = latencyBucket(seconds)
+                totals["latency"][b] = totals["latency"].get(b, 0) + 1
+            diff = score - base_score
+            win_diff = int(won) - int(base_won)
+            totals["diff"] += diff
+            totals["diff_sq"] += diff * diff
+            totals["win_diff"] += win_diff
+            totals["win_diff_sq"] += win_diff * win_diff
+        self.games += 1
+
+    def merge(self, other):
+        """
+        Method Name: merge()
+        Description: Adds the games counted by other Standings to these
+        :param other: Standings of the same policies
+        :return: none
+        """
+        if other.policies != self.policies:
+            raise ValueError("only the standings of the same policies can be merged")
+        for name in self.policies:
+            mine = self.totals[name]
+            theirs = other.totals[name]
+            for key in mine:
+                if key == "slowest":
+                    mine[key] = max(mine[key], theirs[key])
+                elif key == "latency":
+                    for b, count in theirs[key].items():
+                        mine[key][b] = mine[key].get(b, 0) + count
+                else:
+                    mine[key] += theirs[key]
+        self.games += other.games
+
+    def toDict(self):
+        """
+        Method Name: toDict()
+        Description: The standings as a dictionary that can be written as JSON
+        :return: the dictionary
+        """
+        totals = {}
+        for name in self.policies:
+            totals[name] = dict(self.totals[name])
+            totals[name]["latency"] = [[b, count] for b, count in sorted(self.totals[name]["latency"].items())]
+        return {"policies": self.policies, "games": self.games, "totals": totals}
+
+    @staticmethod
+    def fromDict(data):
+        """
+        Method Name: fromDict()
+        Description: Standings read back from toDict()
+        :param data: the dictionary
+        :return: the Standings
+        """
+        standings = Standings(data["policies"])
+        standings.games = data["games"]
+        for name in standings.policies:
+            standings.totals[name] = dict(data["totals"][name])
+            standings.totals[name]["latency"] = dict((b, count) for b, count in data["totals"][name]["latency"])
+        return standings
+
+    def meanScore(self, name, z=1.96):
+        """
+        Method Name: meanScore()
+        Description: A policy's mean score and its confidence interval
+        :param name: the policy
+        :param z: the number of standard errors either side, 1.96 for 95%
+        :return: a tuple of the mean and the half width of the interval
+        """
+        return meanAndWidth(self.totals[name]["score"], self.totals[name]["score_sq"], self.games, z)
+
+    def winRate(self, name, z=1.96):
+        """
+        Method Name: winRate()
+        Description: A policy's win rate and its confidence interval
+        :param name: the policy
+        :param z: the number of standard errors either side, 1.96 for 95%
+        :return: a tuple of the win rate and the half width of the interval
+        """
+        wins = self.totals[name]["wins"]
+        return meanAndWidth(wins, wins, self.games, z)
+
+    def versus(self, name, z=1.96):
+        """
+        Method Name: versus()
+        Description: How much better a policy did than the first one on the same
+        seeds, with confidence intervals.  If an interval does not include 0 the
+        difference is unlikely to be luck.
+        :param name: the policy
+        :param z: the number of standard errors either side, 1.96 for 95%
+        :return: a tuple of (mean score difference, half width) and (win rate
+                 difference, half width)
+        """
+        totals = self.totals[name]
+        return (meanAndWidth(totals["diff"], totals["diff_sq"], self.games, z),
+                meanAndWidth(totals["win_diff"], totals["win_diff_sq"], self.games, z))
+
+    def latency(self, name, q=0.95):
+        """
+        Method Name: latency()
+        Description: How long a policy takes to pick a move
+        :param name: the policy
+        :param q: the quantile to report besides the mean
+        :return: a tuple of the mean, the quantile (to the top of its bucket) and
+                 the slowest time, in seconds
+        """
+        totals = self.totals[name]
+        if totals["moves"] == 0:
+            return (0.0, 0.0, 0.0)
+        rank = max(1, math.ceil(q * totals["moves"]))
+        seen = 0
+        quantile = totals["slowest"]
+        for b in sorted(totals["latency"]):
+            seen += totals["latency"][b]
+            if seen >= rank:
+                quantile = min(totals["slowest"], 2 ** ((b + 1) / LATENCY_STEPS) / 1e6)
+                break
+        return (totals["seconds"] / totals["moves"], quantile, totals["slowest"])
+
+
+def meanAndWidth(total, total_sq, n, z):
+    """
+    Method Name: meanAndWidth()
+    Description: A mean and the half width of its normal confidence interval, from
+    running totals
+    :param total: the sum of the values
+    :param total_sq: the sum of their squares
+    :param n: the number of values
+    :param z: the number of standard errors either side
+    :return: a tuple of the mean and the half width
+    """
+    if n == 0:
+        return (0.0, 0.0)
+    mean = total / n
+    if n == 1:
+        return (mean, float("inf"))
+    variance = max(0.0, (total_sq - n * mean * mean) / (n - 1))
+    return (mean, z * math.sqrt(variance / n))
+
+
+def playShard(args):
+    """
+    Method Name: playShard()
+    Description: Plays a run of seeds with every policy.  Run by the process pool,
+    so it takes a single tuple of arguments.
+    :param args: a tuple of the policy names, the preset, the first seed and the
+                 number of seeds
+    :return: the Standings of the shard
+    """
+    policies, preset, first, games = args
+    standings = Standings(policies)
+    for game_seed in range(first, first + games):
+        results = {}
+        for name in policies:
+            timings = []
+            scores = playGame(preset["rows"], preset["cols"], preset["syms"], preset["max_turns"], name,
+                              game_seed, timings)
+            results[name] = (scores[-1], scores[-1] >= preset["target_score"], timings)
+        standings.add(results)
+    return standings
+
+
+def saveCheckpoint(path, setup, done, standings):
+    """
+    Method Name: saveCheckpoint()
+    Description: Writes a tournament's progress to a file.  The file is written
+    beside the old one and then moved over it, so stopping part way through a
+    write never loses the last checkpoint.
+    :param path: the checkpoint file
+    :param setup: the dictionary that says which tournament this is
+    :param done: the first seed of every shard that has been counted
+    :param standings: the Standings so far
+    :return: none
+    """
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump({"setup": setup, "done": sorted(done), "standings": standings.toDict()}, f)
+    os.replace(temp, path)
+
+
+def tournament(policies, preset, games=1000, first_seed=0, workers=1, chunk=25, checkpoint=None, report=None):
+    """
+    Method Name: tournament()
+    Description: Plays every policy on the same seeds.  Each game is played for the
+    preset's turns, and is won if its score reaches the preset's target.  The
+    seeds are split into shards of chunk seeds, and the Standings of each shard
+    are merged in as it finishes.  With a checkpoint file, the shards already in
+    it are skipped and the file is brought up to date after every shard.
+    :param policies: the names of the policies in POLICIES, the one the others are
+                     compared with first
+    :param preset: a dictionary like the ones in PRESETS
+    :param games: the number of seeds to play
+    :param first_seed: the first seed.  The games use the seeds after it.
+    :param workers: the number of processes to play in.  None uses every core.
+    :param chunk: the number of seeds in a shard
+    :param checkpoint: the file to save progress in, or None
+    :param report: an optional function called with the Standings so far each
+                   time a shard is merged in
+    :return: the Standings of every game
+    """
+    for name in policies:
+        if name not in POLICIES:
+            raise ValueError("there is no policy called %s" % name)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    setup = {"policies": list(policies), "preset": preset, "games": games, "first_seed": first_seed,
+             "chunk": chunk}
+    standings = Standings(policies)
+    done = set()
+    if checkpoint is not None and os.path.isfile(checkpoint):
+        with open(checkpoint) as f:
+            saved = json.load(f)
+        if saved["setup"] != setup:
+            raise ValueError("%s is the checkpoint of a different tournament" % checkpoint)
+        standings = Standings.fromDict(saved["standings"])
+        done = set(saved["done"])
+
+    shards = [(list(policies), preset, first, min(chunk, first_seed + games - first))
+              for first in range(first_seed, first_seed + games, chunk) if first not in done]
+
+    def finished(shard, result):
+        standings.merge(result)
+        done.add(shard[2])
+        if checkpoint is not None:
+            saveCheckpoint(checkpoint, setup, done, standings)
+        if report is not None:
+            report(standings)
+
+    if workers <= 1:
+        for shard in shards:
+            finished(shard, playShard(shard))
+        return standings
+
+    with ProcessPoolExecutor(workers) as pool:
+        shards.reverse()
+        running = {}
+        while len(shards) > 0 or len(running) > 0:
+            while len(shards) > 0 and len(running) < 2 * workers:
+                shard = shards.pop()
+                running[pool.submit(playShard, shard)] = shard
+            ready, waiting = wait(running, return_when=FIRST_COMPLETED)
+            for future in ready:
+                finished(running.pop(future), future.result())
+    return standings
+
+
+def tournamentReport(standings):
+    """
+    Method Name: tournamentReport()
+    Description: Describes the standings as a table, with 95% confidence
+    intervals
+    :param standings: the Standings of a tournament
+    :return: the text
+    """
+    lines = ["%d games each, compared with %s" % (standings.games, standings.policies[0]),
+             "%-10s %20s %16s %22s %14s %12s" % ("policy", "mean score", "win rate", "score vs first",
+                                                 "mean ms/move", "95% ms")]
+    for name in standings.policies:
+        mean, width = standings.meanScore(name)
+        rate, rate_width = standings.winRate(name)
+        (diff, diff_width), (win_diff, win_width) = standings.versus(name)
+        seconds, quantile, slowest = standings.latency(name)
+        lines.append("%-10s %11.0f +/- %5.0f %8.1f%% +/- %3.0f %12.0f +/- %6.0f %14.3f %12.3f" %
+                     (name, mean, width, 100 * rate, 100 * rate_width, diff, diff_width,
+                      1000 * seconds, 1000 * quantile))
+    return "\n".join(lines)
+
+
+#
+# Run a series of tests on the tournament
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_tournament():
+    print("Testing tournament...")
+
+    passed = 0
+    failed = 0
+    preset = PRESETS[3]
+    policies = ["hint", "random", "solver"]
+
+    print("  Attempting a paired comparison of three policies... ", end="")
+    standings = tournament(policies, preset, 6, 40, 1, 4)
+    problem = None
+    diff = 0
+    for game_seed in range(40, 46):
+        hint_score = playGame(preset["rows"], preset["cols"], preset["syms"], preset["max_turns"], "hint",
+                              game_seed)[-1]
+        random_score = playGame(preset["rows"], preset["cols"], preset["syms"], preset["max_turns"], "random",
+                                game_seed)[-1]
+        diff += random_score - hint_score
+    if standings.totals["random"]["diff"] != diff or standings.totals["hint"]["diff_sq"] != 0:
+        problem = "the score differences were not paired by seed"
+    elif standings.totals["solver"]["moves"] == 0 or standings.latency("solver")[0] <= 0:
+        problem = "the decision times were not counted"
+    elif standings.games != 6 or not tournamentReport(standings).startswith("6 games each, compared with hint"):
+        problem = "the report did not cover the games"
+    if problem is None:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED:", problem)
+        failed += 1
+
+    # Stop part way through, then carry on from the checkpoint
+    print("  Attempting to resume a stopped tournament from its checkpoint... ", end="")
+    path = "crush_tournament_test.json"
+    if os.path.isfile(path):
+        os.remove(path)
+
+    def stop(standings):
+        if standings.games >= 4:
+            raise KeyboardInterrupt()
+
+    try:
+        tournament(["hint", "random"], preset, 10, 0, 1, 2, path, stop)
+    except KeyboardInterrupt:
+        pass
+    with open(path) as f:
+        stopped = json.load(f)["standings"]["games"]
+    resumed = tournament(["hint", "random"], preset, 10, 0, 1, 2, path)
+    whole = tournament(["hint", "random"], preset, 10, 0, 2, 2)
+    same = True
+    for name in ["hint", "random"]:
+        for key in ["score", "score_sq", "wins", "moves", "diff", "diff_sq", "win_diff", "win_diff_sq"]:
+            same = same and resumed.totals[name][key] == whole.totals[name][key]
+    try:
+        tournament(["random", "hint"], preset, 10, 0, 1, 2, path)
+        mixed = True
+    except ValueError:
+        mixed = False
+    os.remove(path)
+    if stopped == 4 and resumed.games == 10 and same and not mixed:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the resumed tournament did not match one played straight through")
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_tournament()
@@ -0,0 +1,453 @@
+###############################################################################
+#  File: crush_zobrist.py
+#
+#  Author(s): Dr. Grasser, Anto Ivicevic, David Dunnigan, Ian Pike, Mark Dacar, Nina Bacon
+#  Description:
+#               Zobrist hashing of boards and a transposition cache for the
+#               outcome of moves.  Every (cell, piece) pair has a fixed random
+#               64-bit key and a board's hash is the XOR of the keys of its
+#               pieces, so changing one cell changes the hash with two XORs.
+#               A Journal given a ZobristHash keeps it up to date on every
+#               write.  The cache remembers the part of a move's outcome that
+#               does not depend on the random refill, so positions that come
+#               up again (hint presses, searches, simulations) are not worked
+#               out twice.  Boards that only differ by which colour is which
+#               can share cache entries through their canonical keys.
+#
+#  External Libraries:
+#               (None)
+###############################################################################
+
+from crush_engine import *
+from collections import OrderedDict
+from random import seed, shuffle
+
+MASK64 = (1 << 64) - 1
+
+# The random numbers of moves that are only being worked out.  burstSwap()
+# leaves their destroy animations unshuffled, so the game's own random numbers
+# are never used up.
+QUIET_RANDOM = GameRandom(0, False)
+
+
+def splitmix64(x):
+    """
+    Method Name: splitmix64()
+    Description: Scrambles a 64-bit number into a well mixed 64-bit number
+    :param x: the number to scramble
+    :return: the scrambled number
+    """
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+# The keys handed out so far, by (seed, cell, piece)
+ZOBRIST_KEYS = {}
+
+
+def zobristKey(r, c, v, key_seed=0):
+    """
+    Method Name: zobristKey()
+    Description: The random key for one piece in one cell.  Keys are worked out
+    from the seed, so they are the same in every process and for any number of
+    symbols.
+    :param r: the row of the cell
+    :param c: the column of the cell
+    :param v: the piece
+    :param key_seed: picks a different set of keys
+    :return: a 64-bit key
+    """
+    k = (key_seed, r, c, v)
+    if k not in ZOBRIST_KEYS:
+        x = splitmix64(key_seed & MASK64)
+        x = splitmix64(x ^ (r & 0xFFFF) << 32 ^ (c & 0xFFFF) << 16 ^ ((v + 128) & 0xFFFF))
+        ZOBRIST_KEYS[k] = x
+    return ZOBRIST_KEYS[k]
+
+
+def boardHash(board, key_seed=0):
+    """
+    Method Name: boardHash()
+    Description: Works out the hash of a whole board
+    :param board: the game board
+    :param key_seed: picks a different set of keys
+    :return: the 64-bit hash of the board
+    """
+    h = 0
+    for r in range(len(board)):
+        for c in range(len(board[0])):
+            h ^= zobristKey(r, c, board[r][c], key_seed)
+    return h
+
+
+class ZobristHash:
+    """
+    Class Name: ZobristHash
+    Description: The hash of one board, kept up to date one cell at a time.  Pass
+    it to a Journal to have every change made through the journal update it.
+    """
+
+    def __init__(self, board, key_seed=0):
+        """
+        Method Name: __init__()
+        Description: Works out the hash of a board
+        :param board: the game board
+        :param key_seed: picks a different set of keys
+        """
+        self.key_seed = key_seed
+        self.value = boardHash(board, key_seed)
+
+    def update(self, r, c, old, new):
+        """
+        Method Name: update()
+        Description: Changes the hash for a piece that has been replaced
+        :param r: the row of the cell
+        :param c: the column of the cell
+        :param old: the piece that was in the cell
+        :param new: the piece now in the cell
+        :return: none
+        """
+        self.value ^= zobristKey(r, c, old, self.key_seed) ^ zobristKey(r, c, new, self.key_seed)
+
+
+class TranspositionCache:
+    """
+    Class Name: TranspositionCache
+    Description: A cache of results that holds at most a fixed number of entries.
+    When it is full the entry used longest ago is dropped.  hits, misses and
+    evictions count how well it is working.
+    """
+
+    def __init__(self, size=100000):
+        """
+        Method Name: __init__()
+        Description: Makes an empty cache
+        :param size: the most entries the cache holds
+        """
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Method Name: get()
+        Description: Looks a result up, counting a hit or a miss
+        :param key: the key the result was stored under
+        :return: the result, or None if it is not in the cache
+        """
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Method Name: put()
+        Description: Stores a result, dropping the least recently used one if the
+        cache is full
+        :param key: the key to store the result under
+        :param value: the result
+        :return: none
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """
+        Method Name: stats()
+        Description: Reports how well the cache is working
+        :return: a dictionary of the "size", "entries", "hits", "misses",
+                 "evictions" and "hit_rate" of the cache
+        """
+        lookups = self.hits + self.misses
+        return {"size": self.size, "entries": len(self.entries), "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0}
+
+    def clear(self):
+        """
+        Method Name: clear()
+        Description: Empties the cache and resets the counters
+        :return: none
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+def canonicalBoard(board, mirror=False):
+    """
+    Method Name: canonicalBoard()
+    Description: Makes a key that is the same for every board that only differs by
+    which colour is which.  The colours are renumbered in the order they first
+    appear, reading the rows top to bottom and left to right.  EMPTY and BURST
+    are never renumbered, and no colour is given the number BURST uses.
+    :param board: the game board
+    :param mirror: also treat a board and its left to right mirror image as the
+                   same.  Only use this for results that do not depend on the
+                   order collapse() scans the columns in, such as which swaps are
+                   allowed or findMatchGroups().
+    :return: a tuple of the key, a dictionary from each new colour number back to
+             the board's own colour, and True if the key is for the mirror image
+    """
+    rows = len(board)
+    cols = len(board[0])
+    best = None
+    for mirrored in ([False, True] if mirror else [False]):
+        relabel = {EMPTY: EMPTY, BURST: BURST}
+        mapping = {}
+        cells = bytearray()
+        next_id = 0
+        for r in range(rows):
+            for c in range(cols):
+                v = board[r][cols - 1 - c] if mirrored else board[r][c]
+                if v not in relabel:
+                    if next_id == BURST:
+                        next_id += 1
+                    relabel[v] = next_id
+                    mapping[next_id] = v
+                    next_id += 1
+                cells.append(relabel[v] + 1)
+        key = (rows, cols, bytes(cells))
+        if best is None or key < best[0]:
+            best = (key, mapping, mirrored)
+    return best
+
+
+def mirrorCells(cells, cols):
+    """
+    Method Name: mirrorCells()
+    Description: Moves cells to the other side of the board, for mapping results
+    for a mirrored canonical board back to the board itself, and the other way
+    :param cells: a list of (row, column) cells
+    :param cols: the number of columns on the board
+    :return: the list of mirrored cells, sorted
+    """
+    return sorted((r, cols - 1 - c) for (r, c) in cells)
+
+
+def moveOutcome(board, r1, c1, r2, c2, cache=None, zobrist=None, canonical=False):
+    """
+    Method Name: moveOutcome()
+    Description: Works out what a move does before the board is refilled: the cells
+    it clears, the BURSTs it makes and the points scored.  The board is changed
+    while this runs but is always put back the way it was.
+    :param board: the game board
+    :param r1: the row of the first piece
+    :param c1: the column of the first piece
+    :param r2: the row of the second piece
+    :param c2: the column of the second piece
+    :param cache: an optional TranspositionCache, keyed by (hash, move)
+    :param zobrist: an optional ZobristHash that is up to date with the board.  The
+                    hash is worked out from scratch if it is left out.
+    :param canonical: key the cache by canonicalBoard() instead of the hash, so that
+                      boards that only differ by colour share entries.  The
+                      outcome does not name any colours, so it is the same for all
+                      of them.
+    :return: None if the move is not allowed, otherwise a dictionary holding the
+             sorted "cleared" cells, the sorted "bursts" cells and the "points".
+             Results from the cache are shared, so they must not be changed.
+    """
+    if cache is not None:
+        if canonical:
+            h = canonicalBoard(board)[0]
+        elif zobrist is None:
+            h = boardHash(board)
+        else:
+            h = zobrist.value
+        key = (h, (r1, c1, r2, c2))
+        outcome = cache.get(key)
+        if outcome is not None or key in cache.entries:
+            return outcome
+
+    if not (r1 == r2 and abs(c1 - c2) == 1 or c1 == c2 and abs(r1 - r2) == 1):
+        outcome = None
+    elif isBurstSwap(board, r1, c1, r2, c2) or canSwap(board, r1, c1, r2, c2):
+        journal = Journal()
+        journal.mark()
+        syncAnim = []
+        asyncAnim = []
+        if isBurstSwap(board, r1, c1, r2, c2):
+            burstSwap(board, r1, c1, r2, c2, syncAnim, asyncAnim, 0, None, None, journal, QUIET_RANDOM)
+            cleared = set((anim[1], anim[2]) for anim in syncAnim if anim[0] == "destroy")
+        else:
+            swap(board, r1, c1, r2, c2, journal)
+            start = len(journal.changes)
+            journal.begin()
+            clearMatches(board, journal, 1, syncAnim, asyncAnim)
+            cleared = set((r, c) for (r, c, old, new) in journal.changes[start:] if new == EMPTY)
+        bursts = set((anim[1], anim[2]) for anim in syncAnim if anim[0] == "crossfade")
+        outcome = {"cleared": sorted(cleared - bursts), "bursts": sorted(bursts),
+                   "points": sum(anim[4] for anim in asyncAnim if anim[0] == "score")}
+        journal.undo(board)
+    else:
+        outcome = None
+
+    if cache is not None:
+        cache.put(key, outcome)
+    return outcome
+
+
+#
+# Run a series of tests on the Zobrist hashes and the transposition cache
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_zobrist():
+    print("Testing Zobrist hashing...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (12, 15, 3)]:
+        print("  Attempting to hash and cache 10 games: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        for game in range(10):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            settle(board, syms)
+            zobrist = ZobristHash(board)
+            journal = Journal(zobrist)
+            cache = TranspositionCache(50)
+
+            for step in range(10):
+                r1, c1, r2, c2 = hint(board)
+                if r1 == -1 or c2 < 0:
+                    break
+
+                # The cached outcome must match the outcome worked out again, and
+                # asking must not change the board or its hash
+                before = deepcopy(board)
+                first = moveOutcome(board, r1, c1, r2, c2, cache, zobrist)
+                again = moveOutcome(board, r1, c1, r2, c2, cache, zobrist)
+                fresh = moveOutcome(board, r1, c1, r2, c2)
+                if board != before or zobrist.value != boardHash(board) or \
+                        first != fresh or again is not first or cache.hits < step + 1:
+                    problem = ("the cached outcome was wrong", step)
+                    break
+
+                # Playing the move through the journal keeps the hash up to date
+                if playMove(board, r1, c1, r2, c2, syms, journal) == -1:
+                    break
+                if zobrist.value != boardHash(board):
+                    problem = ("the hash was not kept up to date", step)
+                    break
+
+            # Undoing every move brings the first hash back
+            while journal.undo(board):
+                pass
+            if problem is None and zobrist.value != boardHash(board):
+                problem = ("the hash was wrong after undoing", 0)
+            if problem is not None:
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on game", game, "move", problem[1])
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    # The cache drops the entry used longest ago
+    print("  Attempting to overfill a cache of 2 entries... ", end="")
+    cache = TranspositionCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    stats = cache.stats()
+    if cache.get("b") is None and cache.get("a") == 1 and stats["evictions"] == 1 and stats["entries"] == 2:
+        print("Success.")
+        passed += 1
+    else:
+        print("\nFAILED: the cache kept", list(cache.entries), "with", stats)
+        failed += 1
+
+    print()
+    return (passed, failed)
+
+
+#
+# Run a series of tests on the canonical board keys
+# Parameters: (None)
+# Returns: A tuple of the number of tests passed and failed.
+def test_canonicalBoard():
+    print("Testing canonicalBoard...")
+
+    passed = 0
+    failed = 0
+    for (rows, cols, syms) in [(8, 8, 6), (8, 7, 5), (7, 7, 4), (12, 15, 9)]:
+        print("  Attempting to recolour 20 random boards: %d rows, %d columns and %d symbols... " %
+              (rows, cols, syms), end="")
+        problem = None
+        cache = TranspositionCache()
+        for game in range(20):
+            seed(game)
+            board = createBoard(rows, cols, syms)
+            board[0][0] = EMPTY
+            board[rows - 1][cols - 1] = BURST
+            settle(board, syms)
+
+            # Swap the colours around, leaving EMPTY and BURST alone
+            colours = [v for v in range(syms) if v != BURST]
+            shuffled = colours[:]
+            shuffle(shuffled)
+            recolour = dict(zip(colours, shuffled))
+            recolour[EMPTY] = EMPTY
+            recolour[BURST] = BURST
+            other = [[recolour[v] for v in row] for row in board]
+            mirrored = [row[::-1] for row in other]
+
+            key, mapping, flipped = canonicalBoard(board)
+            if canonicalBoard(other)[0] != key or canonicalBoard(mirrored)[0] == key or \
+                    canonicalBoard(mirrored, True)[0] != canonicalBoard(board, True)[0]:
+                problem = ("the keys did not match", game)
+                break
+
+            # Mapping the key back gives the board again
+            values = [v - 1 for v in key[2]]
+            back = [[mapping.get(values[r * cols + c], values[r * cols + c]) for c in range(cols)]
+                    for r in range(rows)]
+            if back != board or flipped:
+                problem = ("the mapping did not give the board back", game)
+                break
+
+            # A recoloured board gets the outcomes cached for the first one
+            r1, c1, r2, c2 = hint(board)
+            if r1 == -1 or c2 < 0:
+                continue
+            first = moveOutcome(board, r1, c1, r2, c2, cache, None, True)
+            hits = cache.hits
+            second = moveOutcome(other, r1, c1, r2, c2, cache, None, True)
+            if cache.hits != hits + 1 or second != moveOutcome(other, r1, c1, r2, c2) or \
+                    (first is None) != (second is None) or first is not None and first["points"] != second["points"]:
+                problem = ("the recoloured board did not share the outcome", game)
+                break
+
+        if problem is not None:
+            print("\nFAILED:", problem[0], "on game", problem[1])
+            print()
+            failed += 1
+            continue
+
+        print("Success.")
+        passed += 1
+
+    print()
+    return (passed, failed)
+
+
+if __name__ == "__main__":
+    test_zobrist()
+    test_canonicalBoard()